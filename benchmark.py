@@ -0,0 +1,244 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import threading
+import argparse
+import subprocess
+import contextlib
+import multiprocessing
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import ck_store
+import charts
+import tracing
+from spotbugs_stream import read_reports
+
+CK_REPORTS_DIR = "ck_reports"
+SPOTBUGS_REPORTS_DIR = "spotbugs_reports"
+JACOCO_CSV_PATH = os.path.join("jacoco_reports", "jacoco_metrics.csv")
+CORPUS_DIR = "bench_corpus"  # Cópias sintéticas dos relatórios (uma pasta por escala)
+RESULTS_PATH = "benchmark_results.jsonl"
+SCALES = ["1x1", "10x10", "100x1", "1x100"]  # releases x classes
+CORPUS_FORMAT = 2  # Versão dos nomes das releases sintéticas (corpora antigos são regenerados)
+SAMPLE_SECONDS = 0.01  # Intervalo de amostragem da memória quando o pico do kernel não pode ser zerado
+
+def parse_scale(scale):
+    releases, classes = scale.lower().split("x")
+    return int(releases), int(classes)
+
+def synthetic_tag(safe_tag, copy):
+    """
+    safe_tag da cópia sintética de uma release (a cópia 0 mantém o nome original).
+
+    As cópias são versões pós-release da original (ex.: commons-lang-3.10-RC1.post2), que ficam
+    entre ela e a release seguinte tanto no ck_store quanto no Version().
+    """
+    return safe_tag if copy == 0 else f"{safe_tag}.post{copy}"
+
+def link_copies(source, paths):
+    """Cria as cópias de um arquivo como hardlinks (ou cópias, se o sistema não suportar)."""
+    for path in paths:
+        try:
+            os.link(source, path)
+        except OSError:
+            shutil.copyfile(source, path)
+
+def scale_ck_reports(output_dir, release_factor, class_factor):
+    """Replica os CSVs de classe do CK: classes com sufixo _cN e releases com sufixo .postN."""
+    os.makedirs(output_dir, exist_ok=True)
+    for filename in sorted(os.listdir(CK_REPORTS_DIR)):
+        match = ck_store.REPORT_PATTERN.match(filename)
+        if not match or match.group("level") != "class":
+            continue
+        df = pd.read_csv(os.path.join(CK_REPORTS_DIR, filename))
+        if class_factor > 1:
+            df = pd.concat([df.assign(**{"class": df["class"] + f"_c{copy}"}) for copy in range(class_factor)], ignore_index=True)
+
+        safe_tag = match.group("safe_tag")
+        base_path = os.path.join(output_dir, filename)
+        df.to_csv(base_path, index=False)
+        link_copies(base_path, [os.path.join(output_dir, f"{synthetic_tag(safe_tag, copy)}_ck_metrics.csvclass.csv") for copy in range(1, release_factor)])
+
+def scale_spotbugs_reports(output_dir, release_factor, class_factor):
+    """Replica os XMLs do SpotBugs: cada BugInstance é repetido para as classes sintéticas."""
+    os.makedirs(output_dir, exist_ok=True)
+    for filename in sorted(os.listdir(SPOTBUGS_REPORTS_DIR)):
+        if not filename.endswith("_spotbugs.xml"):
+            continue
+        tree = ET.parse(os.path.join(SPOTBUGS_REPORTS_DIR, filename))
+        root = tree.getroot()
+        bugs = root.findall("BugInstance")
+        for copy in range(1, class_factor):
+            for bug in bugs:
+                clone = ET.fromstring(ET.tostring(bug))
+                for element in clone.iter("Class"):
+                    element.set("classname", element.get("classname", "") + f"_c{copy}")
+                root.append(clone)
+
+        safe_tag = filename[:-len("_spotbugs.xml")]
+        base_path = os.path.join(output_dir, filename)
+        tree.write(base_path, encoding="UTF-8", xml_declaration=True)
+        link_copies(base_path, [os.path.join(output_dir, f"{synthetic_tag(safe_tag, copy)}_spotbugs.xml") for copy in range(1, release_factor)])
+
+def scale_jacoco_metrics(output_path, release_factor):
+    """Replica as linhas do jacoco_metrics.csv para as releases sintéticas."""
+    df = pd.read_csv(JACOCO_CSV_PATH)
+    frames = [df.assign(Release=df["Release"].map(lambda tag: synthetic_tag(tag, copy))) for copy in range(release_factor)]
+    pd.concat(frames, ignore_index=True).to_csv(output_path, index=False)
+
+def build_corpus(scale, corpus_dir=CORPUS_DIR):
+    """Gera (ou reaproveita) o corpus sintético de uma escala."""
+    release_factor, class_factor = parse_scale(scale)
+    scale_dir = os.path.join(corpus_dir, f"{scale}_v{CORPUS_FORMAT}")
+    if os.path.exists(os.path.join(scale_dir, "jacoco_metrics.csv")):
+        return scale_dir
+
+    print(f"Gerando corpus sintético {scale}")
+    shutil.rmtree(scale_dir, ignore_errors=True)
+    scale_ck_reports(os.path.join(scale_dir, "ck_reports"), release_factor, class_factor)
+    scale_spotbugs_reports(os.path.join(scale_dir, "spotbugs_reports"), release_factor, class_factor)
+    # Gravado por último: marca o corpus como completo
+    scale_jacoco_metrics(os.path.join(scale_dir, "jacoco_metrics.csv"), release_factor)
+    return scale_dir
+
+def _read_hwm_kb():
+    with open("/proc/self/status", encoding="ascii") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return None
+
+def _reset_hwm():
+    """Zera o pico de memória do processo (VmHWM) no Linux; retorna False onde isso não é possível."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+@contextlib.contextmanager
+def stage_peak_rss(stage):
+    """
+    Mede o pico de memória residente (KB) apenas durante o bloco e o grava em stage["peak_rss_kb"].
+
+    No Linux, o pico do kernel (VmHWM) é zerado no início do bloco; nos demais sistemas, a memória
+    do processo é amostrada a cada SAMPLE_SECONDS (com o psutil, se instalado; sem ele, o pico é None).
+    """
+    if _reset_hwm():
+        try:
+            yield
+        finally:
+            stage["peak_rss_kb"] = _read_hwm_kb()
+        return
+
+    peak = [None]
+    stopped = threading.Event()
+
+    def sample():
+        while True:
+            rss = tracing.tree_rss_bytes(os.getpid())
+            if rss is not None:
+                peak[0] = max(peak[0] or 0, rss)
+            if stopped.wait(SAMPLE_SECONDS):
+                return
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        sampler.join()
+        stage["peak_rss_kb"] = None if peak[0] is None else peak[0] // 1024
+
+def timed(stages, name, func):
+    stage = {"stage": name}
+    with stage_peak_rss(stage):
+        start = time.perf_counter()
+        result = func()
+        stage["seconds"] = time.perf_counter() - start
+    stages.append(stage)
+    return result
+
+def bench_ck(scale_dir, output_dir):
+    stages = []
+    store_dir = os.path.join(output_dir, "ck_store")
+    metrics = list(charts.CK_METRIC_NAMES)
+    timed(stages, "parse", lambda: ck_store.ingest(os.path.join(scale_dir, "ck_reports"), store_dir, levels=["class"]))
+    df = timed(stages, "load", lambda: ck_store.load("class", columns=metrics, store_dir=store_dir))
+    chart_list = timed(stages, "aggregate", lambda: charts.sort_releases(charts.ck_charts(df, output_dir)))
+    timed(stages, "render", lambda: [charts.render_chart(chart) for chart in chart_list])
+    return stages, len(df)
+
+def bench_spotbugs(scale_dir, output_dir):
+    stages = []
+    df = timed(stages, "parse", lambda: read_reports(os.path.join(scale_dir, "spotbugs_reports")).to_dataframe())
+    chart_list = timed(stages, "aggregate", lambda: charts.sort_releases(charts.bug_charts(df, output_dir)))
+    timed(stages, "render", lambda: [charts.render_chart(chart) for chart in chart_list])
+    return stages, len(df)
+
+def bench_jacoco(scale_dir, output_dir):
+    stages = []
+    df = timed(stages, "load", lambda: pd.read_csv(os.path.join(scale_dir, "jacoco_metrics.csv")))
+    chart_list = timed(stages, "aggregate", lambda: charts.sort_releases(charts.jacoco_charts(df, output_dir)))
+    timed(stages, "render", lambda: [charts.render_chart(chart) for chart in chart_list])
+    return stages, len(df)
+
+BENCHMARKS = {"ck": bench_ck, "spotbugs": bench_spotbugs, "jacoco": bench_jacoco}
+
+def run_case(name, scale_dir):
+    """Executa um benchmark (em um processo novo, para o pico de memória ser só dele)."""
+    output_dir = os.path.join(scale_dir, f"output_{name}")
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        stages, rows = BENCHMARKS[name](scale_dir, output_dir)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return stages, rows
+
+def current_commit():
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def run_benchmarks(scales=SCALES, names=list(BENCHMARKS), results_path=RESULTS_PATH):
+    """
+    Executa os benchmarks em cada escala e acrescenta os resultados (um JSON por etapa) em results_path.
+
+    Returns:
+        list: Registros gravados.
+    """
+    context = multiprocessing.get_context("spawn")
+    base = {"commit": current_commit(), "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "python": sys.version.split()[0]}
+
+    records = []
+    for scale in scales:
+        scale_dir = build_corpus(scale)
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                stages, rows = executor.submit(run_case, name, scale_dir).result()
+            for stage in stages:
+                records.append({**base, "scale": scale, "benchmark": name, "rows": rows, **stage})
+                peak = "-" if stage["peak_rss_kb"] is None else f"{stage['peak_rss_kb'] / 1024:.1f}"
+                print(f"{scale:>7} {name:<9} {stage['stage']:<10} {stage['seconds']:8.3f}s {peak:>8} MB")
+
+    with open(results_path, "a") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+    return records
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do pós-processamento (leitura, agregação e gráficos) sobre os relatórios e cópias sintéticas.")
+    parser.add_argument("--scales", default=",".join(SCALES), help="Escalas releases x classes, separadas por vírgula (ex.: 1x1,10x10)")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Benchmarks a executar, separados por vírgula")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Arquivo JSON lines onde os resultados são acrescentados")
+    args = parser.parse_args()
+
+    run_benchmarks(args.scales.split(","), args.benchmarks.split(","), args.output)
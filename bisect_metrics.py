@@ -0,0 +1,134 @@
+import os
+import argparse
+import subprocess
+
+import pandas as pd
+
+import ck
+import bugs
+import cache
+from common import REPO_DIR, clone_repository, checkout_release, compile_code, commit_range
+from spotbugs_stream import iter_bug_instances
+
+BISECT_DIR = os.path.abspath("bisect_reports")  # Relatórios dos commits intermediários (fora dos diretórios das releases)
+BUG_METRIC = "bugs"  # "bugs" conta todos os bugs do SpotBugs; "bugs:CATEGORIA" conta apenas uma categoria
+
+def commit_name(commit_sha):
+    """Nome usado nos relatórios de um commit intermediário."""
+    return f"commit_{commit_sha[:12]}"
+
+def ck_metric(commit_sha, metric, repo_dir=REPO_DIR, output_dir=BISECT_DIR):
+    """
+    Média da métrica de classe do CK em um commit (como no ck-graph.py), usando o cache quando possível.
+
+    Returns:
+        float: A média, ou None se o commit não compilou ou o CK falhou.
+    """
+    name = commit_name(commit_sha)
+    if cache.restore(commit_sha, "ck", ck.CK_CONFIG, name, output_dir) is None:
+        checkout_release(commit_sha, repo_dir, name)
+        if not compile_code(repo_dir, name) or not ck.run_ck_metrics(name, repo_dir, output_dir):
+            return None
+        cache.store(commit_sha, "ck", ck.CK_CONFIG, name, ck.ck_report_paths(name, output_dir))
+
+    class_csv = ck.ck_report_paths(name, output_dir)[ck.CK_LEVELS.index("class")]
+    return float(pd.read_csv(class_csv, usecols=[metric])[metric].mean())
+
+def bug_metric(commit_sha, metric, repo_dir=REPO_DIR, output_dir=BISECT_DIR):
+    """
+    Número de bugs do SpotBugs em um commit (todos ou de uma categoria), usando o cache quando possível.
+
+    Returns:
+        float: A contagem, ou None se o commit não compilou ou o SpotBugs falhou.
+    """
+    name = commit_name(commit_sha)
+    if cache.restore(commit_sha, "spotbugs", bugs.SPOTBUGS_CONFIG, name, output_dir) is None:
+        checkout_release(commit_sha, repo_dir, name)
+        if not compile_code(repo_dir, name) or not bugs.run_spotbugs(name, repo_dir, output_dir):
+            return None
+        cache.store(commit_sha, "spotbugs", bugs.SPOTBUGS_CONFIG, name, bugs.spotbugs_report_paths(name, output_dir))
+
+    category = metric.split(":", 1)[1] if ":" in metric else None
+    xml_path = bugs.spotbugs_report_paths(name, output_dir)[0]
+    return float(sum(1 for bug in iter_bug_instances(xml_path) if category is None or bug[1] == category))
+
+def measure(commit_sha, metric, repo_dir=REPO_DIR, output_dir=BISECT_DIR):
+    if metric == BUG_METRIC or metric.startswith(f"{BUG_METRIC}:"):
+        return bug_metric(commit_sha, metric, repo_dir, output_dir)
+    return ck_metric(commit_sha, metric, repo_dir, output_dir)
+
+def bisect(base_tag, target_tag, metric, threshold, repo_dir=REPO_DIR):
+    """
+    Busca binária pelo primeiro commit entre duas tags em que a métrica cruza o limite.
+
+    A métrica deve estar de um lado do limite em base_tag e do outro em target_tag (subindo ou descendo).
+    Apenas O(log n) commits são analisados; commits que não compilam são ignorados, como no "git bisect skip".
+
+    Returns:
+        dict: Commit encontrado, valor da métrica nele e no último commit antes dele, e o número de análises.
+    """
+    commits = commit_range(base_tag, target_tag, repo_dir)
+    values = {}
+
+    def value(index):
+        if index not in values:
+            values[index] = measure(commits[index], metric, repo_dir)
+            shown = "falhou" if values[index] is None else f"{values[index]:.4f}"
+            print(f"[{index}/{len(commits) - 1}] {commits[index][:12]} {metric} = {shown}")
+        return values[index]
+
+    base_value, target_value = value(0), value(len(commits) - 1)
+    if base_value is None or target_value is None:
+        print("Não foi possível medir a métrica em uma das tags.")
+        return None
+
+    rising = base_value < threshold
+    crossed = (lambda v: v >= threshold) if rising else (lambda v: v <= threshold)
+    if crossed(base_value) or not crossed(target_value):
+        print(f"A métrica não cruza {threshold} entre {base_tag} ({base_value:.4f}) e {target_tag} ({target_value:.4f}).")
+        return None
+
+    low, high = 0, len(commits) - 1  # Invariante: low não cruzou, high cruzou
+    skipped = set()
+    while high - low > 1:
+        candidates = [index for index in range(low + 1, high) if index not in skipped]
+        if not candidates:
+            break
+        middle = min(candidates, key=lambda index: abs(index - (low + high) // 2))
+        middle_value = value(middle)
+        if middle_value is None:
+            skipped.add(middle)
+        elif crossed(middle_value):
+            high = middle
+        else:
+            low = middle
+
+    subject = subprocess.run(["git", "log", "-1", "--format=%s", commits[high]], cwd=repo_dir,
+                             capture_output=True, text=True).stdout.strip()
+    result = {
+        "commit": commits[high],
+        "subject": subject,
+        "value": values[high],
+        "previous_commit": commits[low],
+        "previous_value": values[low],
+        "analyzed": sum(1 for measured in values.values() if measured is not None),
+        "commits_in_range": len(commits),
+        "ambiguous": high - low > 1,  # Commits entre os dois não puderam ser analisados
+    }
+    print(f"\nPrimeiro commit em que {metric} cruza {threshold}: {result['commit'][:12]} {subject}")
+    print(f"{metric}: {result['previous_value']:.4f} -> {result['value']:.4f} "
+          f"({result['analyzed']} de {result['commits_in_range']} commits analisados)")
+    if result["ambiguous"]:
+        print(f"Atenção: commits entre {commits[low][:12]} e {commits[high][:12]} não compilaram; o responsável pode ser um deles.")
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encontra, por busca binária, o commit em que uma métrica cruzou um limite entre duas tags.")
+    parser.add_argument("base_tag", help="Tag anterior (ex.: rel/commons-lang-3.16.0)")
+    parser.add_argument("target_tag", help="Tag posterior (ex.: rel/commons-lang-3.17.0)")
+    parser.add_argument("metric", help='Métrica de classe do CK (ex.: cbo) ou "bugs" / "bugs:CATEGORIA" do SpotBugs')
+    parser.add_argument("threshold", type=float, help="Limite que a métrica cruza entre as duas tags")
+    args = parser.parse_args()
+
+    clone_repository()
+    bisect(args.base_tag, args.target_tag, args.metric, args.threshold)
@@ -0,0 +1,151 @@
+import os
+import argparse
+import hashlib
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import ck_store
+from spotbugs_stream import iter_elements
+
+SPOTBUGS_REPORTS_DIR = "./spotbugs_reports"
+STORE_DIR = "./bugs_store"  # Índice de fingerprints por release, no mesmo formato do ck_store
+FINGERPRINT_LEVEL = "fingerprints"
+# Anotações e atributos que dependem de linhas ou posições no bytecode ficam fora da identidade do bug
+IGNORED_ANNOTATIONS = ("SourceLine", "Property")
+IGNORED_ATTRIBUTES = ("start", "end", "startBytecode", "endBytecode", "pc", "register", "sourcefile", "sourcepath", "isStatic", "classAnnotationNames")
+
+def bug_identity(elem):
+    """
+    Identidade de um BugInstance sem números de linha: tipo, classe, método (nome e assinatura)
+    e as demais anotações (campos, variáveis locais, tipos, strings) na ordem do relatório.
+    """
+    parts = [elem.get("type", "")]
+    for child in elem:
+        if child.tag in IGNORED_ANNOTATIONS:
+            continue
+        attributes = sorted((key, value) for key, value in child.attrib.items() if key not in IGNORED_ATTRIBUTES)
+        parts.append(child.tag + "|" + ",".join(f"{key}={value}" for key, value in attributes))
+    return "\n".join(parts)
+
+def fingerprint(identity, occurrence=0):
+    """Fingerprint de 64 bits de uma identidade; occurrence distingue bugs idênticos na mesma release."""
+    digest = hashlib.blake2b(f"{identity}\n#{occurrence}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+def read_fingerprints(xml_path):
+    """
+    Fingerprints dos bugs de um relatório XML do SpotBugs.
+
+    Returns:
+        DataFrame: Colunas fingerprint, type, category, rank, class e method (nome + assinatura).
+    """
+    occurrences = Counter()
+    rows = []
+    for elem in iter_elements(xml_path):
+        identity = bug_identity(elem)
+        class_elem = elem.find("Class")
+        method_elem = elem.find("Method")
+        rows.append((
+            fingerprint(identity, occurrences[identity]),
+            elem.get("type", ""),
+            elem.get("category", ""),
+            int(elem.get("rank", 0)),
+            class_elem.get("classname", "") if class_elem is not None else "",
+            method_elem.get("name", "") + method_elem.get("signature", "") if method_elem is not None else "",
+        ))
+        occurrences[identity] += 1
+    df = pd.DataFrame(rows, columns=["fingerprint", "type", "category", "rank", "class", "method"])
+    return df.astype({"fingerprint": "int64", "rank": "int8"})
+
+def ingest(reports_dir=SPOTBUGS_REPORTS_DIR, store_dir=STORE_DIR):
+    """
+    Atualiza o índice de fingerprints com os relatórios XML novos ou alterados.
+
+    Returns:
+        int: Número de releases (re)indexadas.
+    """
+    indexed = 0
+    for filename in sorted(os.listdir(reports_dir)):
+        if not filename.endswith("_spotbugs.xml"):
+            continue
+        xml_path = os.path.join(reports_dir, filename)
+        partition = ck_store.partition_path(FINGERPRINT_LEVEL, filename[:-len("_spotbugs.xml")], store_dir)
+        signature = ck_store.source_signature(xml_path)
+        if ck_store.is_fresh(partition, signature):
+            continue
+        ck_store.write_partition(read_fingerprints(xml_path), partition, signature)
+        indexed += 1
+    return indexed
+
+def load_fingerprints(safe_tag, columns=None, store_dir=STORE_DIR):
+    return ck_store.load_partition(FINGERPRINT_LEVEL, safe_tag, columns, store_dir)
+
+def compare(old_tag, new_tag, store_dir=STORE_DIR):
+    """
+    Compara os bugs de duas releases (safe_tags) pelos fingerprints, com junções por hash (tempo linear).
+
+    Returns:
+        dict: DataFrames "introduced" (só na nova), "fixed" (só na antiga) e "persisting" (nas duas).
+    """
+    old = load_fingerprints(old_tag, store_dir=store_dir)
+    new = load_fingerprints(new_tag, store_dir=store_dir)
+    in_old = new["fingerprint"].isin(old["fingerprint"])
+    in_new = old["fingerprint"].isin(new["fingerprint"])
+    return {"introduced": new[~in_old], "fixed": old[~in_new], "persisting": new[in_old]}
+
+def trend(store_dir=STORE_DIR):
+    """
+    Bugs introduzidos, corrigidos e persistentes em cada release em relação à anterior, em uma única passada pelo índice.
+
+    Returns:
+        DataFrame: Uma linha por release, em ordem de versão.
+    """
+    safe_tags = ck_store.list_releases(FINGERPRINT_LEVEL, store_dir)
+    frames = []
+    for position, safe_tag in enumerate(safe_tags):
+        df = load_fingerprints(safe_tag, ["fingerprint"], store_dir)
+        df["position"] = np.int32(position)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["Release", "total", "introduced", "fixed", "persisting"])
+    df = pd.concat(frames, ignore_index=True)
+
+    # Cada bug é comparado com a release seguinte por uma única junção (fingerprint, posição)
+    following = df.assign(position=df["position"] - 1, present=True)
+    merged = df.merge(following, on=["fingerprint", "position"], how="left")
+    persisted = merged["present"].notna().to_numpy()
+
+    positions = df["position"].to_numpy()
+    total = np.bincount(positions, minlength=len(safe_tags))
+    # Persistentes na release p = bugs da release p - 1 que continuam em p
+    persisting = np.zeros(len(safe_tags), dtype=np.int64)
+    persisting[1:] = np.bincount(positions[persisted], minlength=len(safe_tags))[:-1]
+    fixed = np.zeros(len(safe_tags), dtype=np.int64)
+    fixed[1:] = total[:-1] - persisting[1:]
+    introduced = total - persisting
+    introduced[0] = 0  # A primeira release não tem com o que ser comparada
+
+    return pd.DataFrame({
+        "Release": [ck_store.release_from_tag(safe_tag) for safe_tag in safe_tags],
+        "total": total,
+        "introduced": introduced,
+        "fixed": fixed,
+        "persisting": persisting,
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Identidade estável dos bugs do SpotBugs e bugs introduzidos/corrigidos entre releases.")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTIGA", "NOVA"), help="Compara duas releases (safe_tags, ex.: rel_commons-lang-3.16.0)")
+    args = parser.parse_args()
+
+    print(f"{ingest()} releases indexadas.")
+    if args.compare:
+        sets = compare(*args.compare)
+        for name, df in sets.items():
+            print(f"\n{name}: {len(df)}")
+            if name != "persisting" and not df.empty:
+                print(df[["type", "category", "class", "method"]].to_string(index=False))
+    else:
+        print(trend().to_string(index=False))
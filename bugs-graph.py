@@ -1,53 +1,21 @@
-import os
-import re
-import pandas as pd
-import xml.etree.ElementTree as ET
 import matplotlib.pyplot as plt
 from packaging.version import Version
+from spotbugs_stream import read_reports
 
 directory = "./spotbugs_reports"
 
-files = os.listdir(directory)
-
-data = []
-
-for filename in files:
-    if filename.endswith(".xml"):
-        print(f"Processando arquivo: {filename}")
-        file_path = os.path.join(directory, filename)
-
-        # Extrair a versão do nome do arquivo
-        match = re.search(r'commons-lang-(.+?)_spotbugs', filename)
-        if match:
-            version = match.group(1)
-        else:
-            version = filename
-
-        # Parse do XML
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-
-        # Contar bugs por categoria
-        for bug in root.findall(".//BugInstance"):
-            category = bug.get('category')  # Captura a categoria do bug
-            data.append({
-                "Release": version,
-                "Category": category,
-                "BugCount": 1  # Contabiliza 1 bug por instância
-            })
-
-# Criar DataFrame
-df = pd.DataFrame(data)
+# Leitura incremental dos relatórios direto para um buffer colunar (um registro por BugInstance)
+df = read_reports(directory).to_dataframe()
 
 # Criar DataFrame para o gráfico total
-df_total = df.groupby(['Release']).count().reset_index()
+df_total = df.groupby(['Release'], observed=True).size().reset_index(name="BugCount")
 
 # Criar DataFrame para o gráfico por categoria
-df_grouped = df.groupby(['Release', 'Category']).sum().reset_index()
+df_grouped = df.groupby(['Release', 'Category'], observed=True).size().reset_index(name="BugCount")
 
 # Ordenar o DataFrame pelas versões das releases
-df_total["Release"] = df_total["Release"].apply(Version)
-df_grouped["Release"] = df_grouped["Release"].apply(Version)
+df_total["Release"] = df_total["Release"].astype(str).apply(Version)
+df_grouped["Release"] = df_grouped["Release"].astype(str).apply(Version)
 df_total = df_total.sort_values("Release").reset_index(drop=True)
 df_grouped = df_grouped.sort_values("Release").reset_index(drop=True)
 
@@ -1,74 +1,51 @@
 import os
+import argparse
+import tempfile
 import subprocess
-import requests
+import xml.etree.ElementTree as ET
+import cache
+import journal
+import tracing
+from collections import Counter
+from spotbugs_html import render_report
+from common import REPO_DIR, fetch_releases, clone_repository, checkout_release, compile_code
+from worktrees import run_parallel
 
-# URLs e configurações
-GITHUB_API_URL = "https://api.github.com/repos/apache/commons-lang/tags"
-REPO_DIR = "apache_commons_repo"  # Nome do diretório onde o repositório será clonado
-MAVEN_PATH = "C:/apache-maven-3.9.9/bin/mvn.cmd"  # Caminho do Maven
+# Configurações (repositório, Maven e releases ficam em common.py)
 SPOTBUGS_PATH = "C:/spotbugs-4.8.6/bin/spotbugs.bat"  # Diretório do spotBugs
+SPOTBUGS_VERSION = "4.8.6"  # Versão do SpotBugs (faz parte da chave do cache de resultados)
 OUTPUT_DIR = "C:/Users/felip/Documents/UDESC/75QUA/commons-lang-metrics/spotbugs_reports"  # Diretório onde será salvo o resultado do spotBugs
+N_WORKERS = 1  # Número de processos paralelos (1 = modo sequencial)
+SPOTBUGS_CONFIG = cache.config_hash(SPOTBUGS_PATH, SPOTBUGS_VERSION, "-textui", "-xml", "html-local")  # Chave de cache da versão/configuração
+SPOTBUGS_INCREMENTAL_CONFIG = cache.config_hash(SPOTBUGS_PATH, SPOTBUGS_VERSION, "-textui", "-xml", "html-local", "incremental")
+INCREMENTAL_MAX_CLASSES = 150  # Acima deste número de classes alteradas a análise completa é usada
+INCREMENTAL_MAX_ARG_LENGTH = 6000  # Limite da lista do -onlyAnalyze (a linha de comando do spotbugs.bat tem ~8 mil caracteres)
+SOURCE_ROOT = "src/main/java"
+CLASSES_DIR = "target/classes"
 
-def fetch_releases(limit=20): #20 releases
-    """Busca as últimas releases no GitHub."""
-    response = requests.get(GITHUB_API_URL)
-    response.raise_for_status()
-    releases = response.json()[:limit]
-    return [(release["name"], release["commit"]["sha"]) for release in releases]
-
-def clone_repository():
-    """Clona o repositório se ele ainda não estiver clonado."""
-    if not os.path.exists(REPO_DIR):
-        print("Clonando o repositório...")
-        subprocess.run(["git", "clone", "https://github.com/apache/commons-lang.git", REPO_DIR], check=True)
-
-def checkout_release(commit_sha):
-    """Faz o checkout de um commit específico no repositório"""
-    os.chdir(REPO_DIR)
-    subprocess.run(["git", "checkout", commit_sha], check=True)
-    os.chdir("..")
-
-def compile_code():
-    """Compila o código Java da release usando Maven."""
-    os.chdir(REPO_DIR)  # Muda para o diretório do repositório
-    print("Compilando o código...")
-    
-    # Executa o Maven
-    result = subprocess.run([MAVEN_PATH, "clean", "compile"], capture_output=True, text=True)
-    os.chdir("..")
-    
-    if result.returncode == 0:
-        print("Compilação concluída com sucesso.")
-        if os.path.exists(os.path.join(REPO_DIR, "target/classes")):
-            return True
-        else:
-            print("Erro: O diretório target/classes não foi gerado após a compilação.")
-            return False
-    else:
-        print("Erro na compilação:")
-        print(result.stdout)
-        print(result.stderr)
-        return False
-     
-def run_spotbugs(tag):
-    """Executa o SpotBugs e gera os relatórios XML e HTML para uma tag/release específica."""
-    # Verifica se o arquivo está formatado e que o diretório OUTPUT_DIR existe
+def spotbugs_report_paths(tag, output_dir=OUTPUT_DIR):
+    """Retorna os caminhos dos relatórios XML e HTML do SpotBugs para uma tag/release."""
     safe_tag = tag.replace("/", "_")
-    report_dir = os.path.join(REPO_DIR, OUTPUT_DIR)
+    report_dir = os.path.join(REPO_DIR, output_dir)
     xml_report_path = os.path.abspath(os.path.join(report_dir, f"{safe_tag}_spotbugs.xml"))
     html_report_path = os.path.abspath(os.path.join(report_dir, f"{safe_tag}_spotbugs.html"))
+    return xml_report_path, html_report_path
+
+def run_spotbugs(tag, repo_dir=REPO_DIR, output_dir=OUTPUT_DIR):
+    """Executa o SpotBugs e gera os relatórios XML e HTML para uma tag/release específica."""
+    # Verifica se o arquivo está formatado e que o diretório de saída existe
+    report_dir = os.path.join(REPO_DIR, output_dir)
+    xml_report_path, html_report_path = spotbugs_report_paths(tag, output_dir)
     
     print(f"Executando SpotBugs para a tag {tag}...")
 
     # Cria o diretório OUTPUT_DIR se ainda não existir
     os.makedirs(report_dir, exist_ok=True)
     
-    os.chdir(REPO_DIR)
-    
     #Gera o relatório XML
-    result_xml = subprocess.run(
+    result_xml = tracing.run(
         [SPOTBUGS_PATH, "-textui", "-xml", "-output", xml_report_path, "target/classes"],
-        capture_output=True, text=True
+        "spotbugs xml", tag, cwd=repo_dir, outputs=[xml_report_path]
     )
     
     # Verifica se o relatório XML foi gerado com sucesso
@@ -77,47 +54,286 @@ def run_spotbugs(tag):
         print(result_xml.stderr)
         if not os.path.exists(xml_report_path):
             print(f"Erro: O relatório SpotBugs {xml_report_path} não foi criado.")
-        os.chdir("..")
-        return  # Encerra a função se houve erro no XML
+        return False  # Encerra a função se houve erro no XML
+
+    print(f"Relatório SpotBugs gerado: {xml_report_path}")
+    return write_html_report(xml_report_path, html_report_path, tag)
+
+def write_html_report(xml_report_path, html_report_path, tag=""):
+    """Gera o relatório HTML a partir do XML, sem executar a análise do SpotBugs uma segunda vez."""
+    with tracing.span("spotbugs html", tag, outputs=[html_report_path]) as record:
+        try:
+            render_report(xml_report_path, html_report_path)
+        except (OSError, ET.ParseError) as e:
+            record["status"] = 1
+            print(f"Erro ao gerar o relatório HTML {html_report_path}: {e}")
+            return False
+    print(f"Relatório SpotBugs em HTML gerado: {html_report_path}")
+    return True
 
-    #Gera o relatório HTML 
-    result_html = subprocess.run(
-        [SPOTBUGS_PATH, "-textui", "-html", "-output", html_report_path, "target/classes"],
-        capture_output=True, text=True
+def changed_source_files(base_sha, commit_sha, repo_dir=REPO_DIR):
+    """Caminhos (relativos a src/main/java, ex.: org/apache/commons/lang3/X.java) dos .java alterados ou removidos entre dois commits."""
+    result = subprocess.run(
+        ["git", "diff", "--name-only", "--no-renames", base_sha, commit_sha, "--", SOURCE_ROOT],
+        cwd=repo_dir, capture_output=True, text=True, check=True
     )
-    
-    os.chdir("..")
-    
-    # Verifica se o relatório HTML foi gerado com sucesso
-    if result_html.returncode == 0 and os.path.exists(html_report_path):
-        print(f"Relatório SpotBugs gerado: {xml_report_path}")
-        print(f"Relatório SpotBugs em HTML gerado: {html_report_path}")
+    return {path[len(SOURCE_ROOT) + 1:] for path in result.stdout.splitlines() if path.endswith(".java")}
+
+def compiled_from(class_path, source_name):
+    """Indica se o .class foi compilado de source_name (ex.: X.java), pela constante do atributo SourceFile."""
+    encoded = source_name.encode("utf-8")
+    constant = b"\x01" + len(encoded).to_bytes(2, "big") + encoded  # CONSTANT_Utf8 do pool de constantes
+    with open(class_path, "rb") as class_file:
+        return constant in class_file.read()
+
+def compiled_class_names(source_files, repo_dir=REPO_DIR):
+    """
+    Lista as classes compiladas dos arquivos fonte informados (relativos a src/main/java).
+
+    Entram as classes com o prefixo do arquivo no pacote (pkg.X, pkg.X$Interna, pkg.X$1) e as demais classes do
+    pacote compiladas a partir dele, como as classes de topo não públicas (pelo atributo SourceFile do .class).
+    """
+    classes_dir = os.path.join(repo_dir, CLASSES_DIR)
+    names = set()
+    for source_file in sorted(source_files):
+        package_path, _, source_name = source_file.rpartition("/")
+        stem = source_name[:-len(".java")]
+        package_dir = os.path.join(classes_dir, *package_path.split("/"))
+        if not os.path.isdir(package_dir):
+            continue
+        for entry in os.scandir(package_dir):
+            if not entry.name.endswith(".class"):
+                continue
+            class_name = entry.name[:-len(".class")]
+            if class_name == stem or class_name.startswith(stem + "$") or compiled_from(entry.path, source_name):
+                names.add(f"{package_path.replace('/', '.')}.{class_name}".lstrip("."))
+    return sorted(names)
+
+def bug_source_path(bug):
+    """Caminho do arquivo fonte (relativo a src/main/java) do primeiro SourceLine de um BugInstance."""
+    source_line = bug.find(".//SourceLine")
+    return source_line.get("sourcepath") if source_line is not None else None
+
+def class_stats_source_path(class_stats):
+    """Caminho do arquivo fonte de um ClassStats do FindBugsSummary (pacote da classe + sourceFile)."""
+    package = class_stats.get("class", "").rpartition(".")[0]
+    return f"{package.replace('.', '/')}/{class_stats.get('sourceFile', '')}".lstrip("/")
+
+def rebuild_summary(root, base_summary, changed_files):
+    """
+    Recalcula o FindBugsSummary a partir dos BugInstances do relatório mesclado.
+
+    Os ClassStats das classes inalteradas vêm do resumo da base e os das classes dos arquivos alterados, do resumo
+    da análise parcial; as contagens de bugs e prioridades de classes, pacotes e do total são recontadas.
+    """
+    summary = root.find("FindBugsSummary")
+    if summary is None:
+        return
+    # Sem análise parcial (summary é o da base), as classes dos arquivos alterados foram removidas
+    class_stats = [] if summary is base_summary else [stats for stats in summary.iter("ClassStats") if class_stats_source_path(stats) in changed_files]
+    if base_summary is not None:
+        class_stats += [stats for stats in base_summary.iter("ClassStats") if class_stats_source_path(stats) not in changed_files]
+
+    bugs_by_class = {}
+    for bug in root.findall("BugInstance"):
+        class_elem = bug.find("Class")
+        class_name = class_elem.get("classname") if class_elem is not None else ""
+        bugs_by_class.setdefault(class_name, Counter())[bug.get("priority", "")] += 1
+
+    def set_counts(element, counts):
+        for name in [name for name in element.attrib if name.startswith("priority_")]:
+            del element.attrib[name]
+        for priority, count in sorted(counts.items()):
+            if priority:
+                element.set(f"priority_{priority}", str(count))
+
+    packages = {}
+    for stats in class_stats:
+        counts = bugs_by_class.get(stats.get("class"), Counter())
+        stats.set("bugs", str(sum(counts.values())))
+        set_counts(stats, counts)
+        packages.setdefault(stats.get("class", "").rpartition(".")[0], []).append(stats)
+
+    for package_stats in summary.findall("PackageStats"):
+        summary.remove(package_stats)
+    position = 0
+    for package in sorted(packages):
+        members = sorted(packages[package], key=lambda stats: stats.get("class"))
+        package_counts = Counter()
+        for stats in members:
+            package_counts.update(bugs_by_class.get(stats.get("class"), Counter()))
+        package_stats = ET.Element("PackageStats", {
+            "package": package,
+            "total_bugs": str(sum(package_counts.values())),
+            "total_types": str(len(members)),
+            "total_size": str(sum(int(stats.get("size", 0)) for stats in members)),
+        })
+        set_counts(package_stats, package_counts)
+        package_stats.extend(members)
+        summary.insert(position, package_stats)
+        position += 1
+
+    # Bugs de classes sem ClassStats (ex.: resumo parcial incompleto) também entram no total
+    total = Counter()
+    for counts in bugs_by_class.values():
+        total.update(counts)
+    summary.set("total_bugs", str(sum(total.values())))
+    summary.set("total_classes", str(len(class_stats)))
+    summary.set("total_size", str(sum(int(stats.get("size", 0)) for stats in class_stats)))
+    summary.set("num_packages", str(len(packages)))
+    set_counts(summary, total)
+
+def merge_spotbugs_reports(base_xml_path, partial_xml_path, changed_files, output_path):
+    """
+    Monta o relatório completo de uma release a partir do relatório da release base e de uma análise parcial.
+
+    Os BugInstances da base são mantidos para as classes declaradas em arquivos que não mudaram (pelo
+    sourcepath do SourceLine, o que inclui classes de topo não públicas); os dos arquivos alterados vêm da
+    análise parcial. O FindBugsSummary é recalculado a partir dos BugInstances mesclados.
+    """
+    base_root = ET.parse(base_xml_path).getroot()
+    carried = [bug for bug in base_root.findall("BugInstance") if bug_source_path(bug) not in changed_files]
+
+    root = ET.parse(partial_xml_path).getroot() if partial_xml_path else base_root
+    new_bugs = root.findall("BugInstance") if partial_xml_path else []
+    for bug in root.findall("BugInstance"):
+        root.remove(bug)
+
+    # Os BugInstances ficam no início do BugCollection, logo após o Project
+    position = list(root).index(root.find("Project")) + 1 if root.find("Project") is not None else 0
+    for offset, bug in enumerate(carried + new_bugs):
+        root.insert(position + offset, bug)
+
+    rebuild_summary(root, base_root.find("FindBugsSummary"), changed_files)
+
+    with journal.atomic_write(output_path, "wb") as output_file:
+        ET.ElementTree(root).write(output_file, encoding="UTF-8", xml_declaration=True)
+
+def run_spotbugs_incremental(tag, commit_sha, base_tag, base_sha, repo_dir=REPO_DIR):
+    """
+    Executa o SpotBugs apenas nas classes alteradas desde a release base e mescla o resultado
+    com os achados da base para as classes inalteradas. O HTML é gerado a partir do XML mesclado.
+
+    O diretório target/classes completo continua sendo o projeto analisado, então as classes
+    inalteradas seguem disponíveis para a resolução de tipos; o -onlyAnalyze restringe a análise.
+    Se houver classes alteradas demais, a análise completa é usada.
+    """
+    base_xml_path, _ = spotbugs_report_paths(base_tag)
+    xml_report_path, html_report_path = spotbugs_report_paths(tag)
+    if not os.path.exists(base_xml_path):
+        print(f"Relatório base {base_xml_path} não encontrado. Executando a análise completa.")
+        return run_spotbugs(tag, repo_dir)
+
+    changed = changed_source_files(base_sha, commit_sha, repo_dir)
+    classes = compiled_class_names(changed, repo_dir)
+    if len(classes) > INCREMENTAL_MAX_CLASSES or len(",".join(classes)) > INCREMENTAL_MAX_ARG_LENGTH:
+        print(f"{len(classes)} classes alteradas desde {base_tag}. Executando a análise completa.")
+        return run_spotbugs(tag, repo_dir)
+
+    print(f"Executando SpotBugs incremental para a tag {tag} ({len(classes)} classes alteradas desde {base_tag})...")
+    if not classes:
+        merge_spotbugs_reports(base_xml_path, None, changed, xml_report_path)
+        return write_html_report(xml_report_path, html_report_path, tag)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        partial_xml_path = os.path.join(tmp_dir, "partial_spotbugs.xml")
+        result = tracing.run(
+            [SPOTBUGS_PATH, "-textui", "-onlyAnalyze", ",".join(classes), "-xml", "-output", partial_xml_path, CLASSES_DIR],
+            "spotbugs xml (incremental)", tag, cwd=repo_dir, outputs=[partial_xml_path]
+        )
+        if result.returncode != 0 or not os.path.exists(partial_xml_path):
+            print("Erro ao executar o SpotBugs incremental:")
+            print(result.stderr)
+            return False
+        merge_spotbugs_reports(base_xml_path, partial_xml_path, changed, xml_report_path)
+
+    print(f"Relatório SpotBugs gerado: {xml_report_path}")
+    return write_html_report(xml_report_path, html_report_path, tag)
+
+def process_release(name, commit_sha, repo_dir=REPO_DIR, base=None):
+    """
+    Faz checkout, compila e executa o SpotBugs para uma release em repo_dir.
+
+    Se base=(tag, sha) de uma release já analisada for informada, usa o modo incremental.
+    """
+    print(f"\nProcessando release {name} - Commit: {commit_sha}")
+
+    # Faz o checkout da release específica
+    checkout_release(commit_sha, repo_dir, name)
+
+    # Compila o código
+    if compile_code(repo_dir, name):
+        if base is None:
+            if run_spotbugs(name, repo_dir):
+                cache.store(commit_sha, "spotbugs", SPOTBUGS_CONFIG, name, spotbugs_report_paths(name))
+        elif run_spotbugs_incremental(name, commit_sha, base[0], base[1], repo_dir):
+            cache.store(commit_sha, "spotbugs", SPOTBUGS_INCREMENTAL_CONFIG, name, spotbugs_report_paths(name))
+        print(f"Análise SpotBugs concluída para a tag {name}.\n")
+        return True
     else:
-        print("Erro ao executar o SpotBugs ou ao gerar o relatório HTML:")
-        print(result_html.stderr)
-        if not os.path.exists(html_report_path):
-            print(f"Erro: O relatório SpotBugs {html_report_path} não foi criado.")
+        print(f"Erro na compilação da tag {name}. Pulando para a próxima.\n")
+        return False
 
 def process_releases():
     """Clona, processa as releases e executa o SpotBugs para cada uma."""
-    # Clona o repositório se necessário
+    # O clone vem antes do cache: as entradas são indexadas pelo hash da árvore, resolvido no clone
     clone_repository()
-    
-    # Busca as últimas releases
-    releases = fetch_releases()
-    
+
+    # Busca as últimas releases e restaura do cache as que já foram analisadas
+    all_releases = fetch_releases()
+    releases, _ = cache.split_cached(all_releases, "spotbugs", SPOTBUGS_CONFIG, os.path.join(REPO_DIR, OUTPUT_DIR))
+    if not releases:
+        print("Todas as releases já estão no cache do SpotBugs.")
+        return
+
     for name, commit_sha in releases:
-        print(f"\nProcessando release {name} - Commit: {commit_sha}")
-        
-        # Faz o checkout da release específica
-        checkout_release(commit_sha)
-        
-        # Compila o código
-        if compile_code():
-            run_spotbugs(name)
-            print(f"Análise SpotBugs concluída para a tag {name}.\n")
-        else:
-            print(f"Erro na compilação da tag {name}. Pulando para a próxima.\n")
+        process_release(name, commit_sha)
+
+    # Releases com o mesmo código de produção de uma release processada agora recebem os relatórios dela
+    cache.split_cached(all_releases, "spotbugs", SPOTBUGS_CONFIG, os.path.join(REPO_DIR, OUTPUT_DIR))
+
+def process_releases_incremental():
+    """
+    Processa as releases da mais antiga para a mais recente, analisando cada uma
+    apenas nas classes alteradas desde a release anterior já analisada.
+    """
+    clone_repository()
+    report_dir = os.path.join(REPO_DIR, OUTPUT_DIR)
+    releases = list(reversed(fetch_releases()))  # fetch_releases lista as tags mais recentes primeiro
+
+    base = None
+    for name, commit_sha in releases:
+        if cache.restore(commit_sha, "spotbugs", SPOTBUGS_CONFIG, name, report_dir) or \
+                cache.restore(commit_sha, "spotbugs", SPOTBUGS_INCREMENTAL_CONFIG, name, report_dir):
+            print(f"Release {name} ({commit_sha[:10]}) restaurada do cache de spotbugs.")
+            base = (name, commit_sha)
+            continue
+
+        if process_release(name, commit_sha, base=base) and os.path.exists(spotbugs_report_paths(name)[0]):
+            base = (name, commit_sha)
+
+def process_releases_parallel(workers=N_WORKERS, keep_worktrees=False):
+    """Processa as releases em paralelo, uma worktree do repositório por worker."""
+    clone_repository()
+    all_releases = fetch_releases()
+    releases, _ = cache.split_cached(all_releases, "spotbugs", SPOTBUGS_CONFIG, os.path.join(REPO_DIR, OUTPUT_DIR))
+    if not releases:
+        print("Todas as releases já estão no cache do SpotBugs.")
+        return
+
+    run_parallel(releases, process_release, REPO_DIR, workers, keep_worktrees)
+    cache.split_cached(all_releases, "spotbugs", SPOTBUGS_CONFIG, os.path.join(REPO_DIR, OUTPUT_DIR))
 
 if __name__ == "__main__":
-    process_releases()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Executa o SpotBugs nas releases do commons-lang.")
+    parser.add_argument("--workers", type=int, default=N_WORKERS, help="Número de processos paralelos (1 = modo sequencial)")
+    parser.add_argument("--keep-worktrees", action="store_true", help="Mantém as worktrees dos workers ao final (reaproveitadas na próxima execução)")
+    parser.add_argument("--incremental", action="store_true", help="Analisa apenas as classes alteradas desde a release anterior (modo sequencial)")
+    args = parser.parse_args()
+
+    if args.incremental:
+        process_releases_incremental()
+    elif args.workers > 1:
+        process_releases_parallel(args.workers, args.keep_worktrees)
+    else:
+        process_releases()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+from collections import defaultdict
+
+import tracing
+from tracing import RUN_ID
+
+BUILD_STAMP = os.path.join("target", ".build_tree_hash")  # Hash da árvore de fontes do último build bem-sucedido
+BUILD_TIMINGS_PATH = "build_timings.jsonl"  # Tempos de cada etapa de build (uma linha JSON por execução)
+DAEMON_AUTO = "auto"  # Procura o mvnd no PATH
+
+def source_tree_hash(repo_dir):
+    """Hash da árvore de fontes: o tree do commit atual mais as alterações locais (ex.: pom.xml ajustado)."""
+    tree = subprocess.run(["git", "rev-parse", "HEAD^{tree}"], cwd=repo_dir, capture_output=True, text=True, check=True).stdout
+    diff = subprocess.run(["git", "diff", "HEAD"], cwd=repo_dir, capture_output=True, check=True).stdout
+    return hashlib.sha1(tree.encode("utf-8") + diff).hexdigest()
+
+class BuildExecutor:
+    """
+    Executa os builds Maven de todas as releases com o mesmo processo e o mesmo repositório local.
+
+    Com o Maven Daemon (mvnd), a JVM e os plugins ficam aquecidos entre as releases; com daemon_path="auto",
+    o mvnd é procurado no PATH e, se não for encontrado, cada build usa o Maven comum (JVM nova).
+    O "clean" é omitido quando a árvore de fontes não mudou desde o último build no mesmo diretório,
+    e o modo offline usa apenas o repositório local pré-populado (ver prefetch_dependencies).
+    """
+
+    def __init__(self, maven_path, daemon_path=None, offline=False, local_repo=None, timings_path=BUILD_TIMINGS_PATH):
+        if daemon_path == DAEMON_AUTO:
+            daemon_path = shutil.which("mvnd")
+        self.daemon = bool(daemon_path)
+        self.executable = daemon_path or maven_path
+        self.mode_logged = False
+        self.offline = offline
+        self.local_repo = os.path.abspath(local_repo) if local_repo else None
+        self.timings_path = timings_path
+
+    def command(self, goals):
+        """Monta a linha de comando do Maven com as opções de modo offline e repositório local."""
+        command = [self.executable]
+        if self.offline:
+            command.append("-o")
+        if self.local_repo:
+            command.append(f"-Dmaven.repo.local={self.local_repo}")
+        return command + list(goals)
+
+    def run(self, goals, repo_dir, stage, release=""):
+        """Executa os goals do Maven em repo_dir e registra o tempo da etapa (também no trace do pipeline)."""
+        self.log_mode()
+        start = time.perf_counter()
+        result = tracing.run(self.command(goals), stage, release, cwd=repo_dir)
+        self._record(release, stage, time.perf_counter() - start, result.returncode == 0)
+        return result
+
+    def log_mode(self):
+        """Informa, uma vez por execução, se os builds usam o daemon aquecido ou o Maven comum."""
+        if not self.mode_logged:
+            self.mode_logged = True
+            if self.daemon:
+                print(f"Builds com o Maven Daemon (JVM aquecida entre as releases): {self.executable}")
+            else:
+                print(f"Builds com o Maven comum (uma JVM nova por build; instale o mvnd para reaproveitá-la): {self.executable}")
+
+    def run_after_compile(self, goals, repo_dir, stage, release=""):
+        """
+        Executa os goals precedidos de "compile", incluindo "clean" apenas se a árvore de fontes mudou.
+
+        Returns:
+            CompletedProcess: Resultado da execução do Maven.
+        """
+        stamp_path = os.path.join(repo_dir, BUILD_STAMP)
+        tree_hash = source_tree_hash(repo_dir)
+        previous_hash = None
+        if os.path.exists(stamp_path):
+            with open(stamp_path, encoding="utf-8") as stamp_file:
+                previous_hash = stamp_file.read().strip()
+
+        clean = [] if tree_hash == previous_hash else ["clean"]
+        if not clean:
+            print("Árvore de fontes inalterada desde o último build: pulando o clean.")
+        # O stamp é removido antes do build: se ele falhar, o target/ pode ter saída parcial de outra árvore
+        if previous_hash is not None:
+            os.remove(stamp_path)
+        result = self.run(clean + ["compile"] + list(goals), repo_dir, stage if clean else f"{stage} (incremental)", release)
+
+        if result.returncode == 0:
+            os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+            with open(stamp_path, "w", encoding="utf-8") as stamp_file:
+                stamp_file.write(tree_hash)
+        return result
+
+    def compile(self, repo_dir, release=""):
+        """Compila a release, omitindo o clean quando possível."""
+        return self.run_after_compile([], repo_dir, "compile", release)
+
+    def prefetch_dependencies(self, repo_dir):
+        """Baixa para o repositório local as dependências e plugins da release, para builds offline depois."""
+        command = [self.executable]
+        if self.local_repo:
+            command.append(f"-Dmaven.repo.local={self.local_repo}")
+        self.log_mode()
+        return tracing.run(command + ["dependency:go-offline"], "prefetch", cwd=repo_dir)
+
+    def _record(self, release, stage, seconds, success):
+        with open(self.timings_path, "a", encoding="utf-8") as timings_file:
+            record = {"run": RUN_ID, "release": release, "stage": stage, "seconds": round(seconds, 3), "success": success}
+            timings_file.write(json.dumps(record) + "\n")
+
+def report_timings(timings_path=BUILD_TIMINGS_PATH, run_id=None):
+    """Imprime o total, a média e o número de execuções de cada etapa de build (de uma execução ou de todas)."""
+    if not os.path.exists(timings_path):
+        print("Nenhum tempo de build registrado.")
+        return
+
+    totals = defaultdict(list)
+    with open(timings_path, encoding="utf-8") as timings_file:
+        for line in timings_file:
+            record = json.loads(line)
+            if run_id is not None and record.get("run") != run_id:
+                continue
+            totals[record["stage"]].append(record["seconds"])
+
+    print(f"{'Etapa':<32}{'Execuções':>10}{'Total (s)':>12}{'Média (s)':>12}")
+    for stage, seconds in sorted(totals.items()):
+        print(f"{stage:<32}{len(seconds):>10}{sum(seconds):>12.1f}{sum(seconds) / len(seconds):>12.1f}")
+
+if __name__ == "__main__":
+    import argparse
+    from common import REPO_DIR, build_executor
+
+    parser = argparse.ArgumentParser(description="Relatório de tempos de build e preparação do repositório Maven local.")
+    parser.add_argument("--prefetch", action="store_true", help="Baixa as dependências da release atual para o repositório local")
+    args = parser.parse_args()
+
+    if args.prefetch:
+        result = build_executor.prefetch_dependencies(REPO_DIR)
+        print("Dependências baixadas." if result.returncode == 0 else result.stdout)
+    else:
+        report_timings()
@@ -0,0 +1,187 @@
+import os
+import json
+import hashlib
+import subprocess
+from functools import lru_cache
+from common import REPO_DIR
+from journal import atomic_copy
+
+CACHE_DIR = "metrics_cache"  # Diretório local do cache de resultados
+MANIFEST_NAME = "manifest.json"
+TAG_PLACEHOLDER = "{tag}"
+# Partes da árvore que determinam o resultado de cada analisador (os demais dependem da árvore inteira).
+# O SpotBugs analisa apenas target/classes, que só depende do código de produção e do pom.xml.
+ANALYZER_SCOPES = {"spotbugs": ("src/main", "pom.xml")}
+
+def file_fingerprint(path):
+    """Identifica um arquivo (ex.: o JAR de uma ferramenta) pelo caminho, tamanho e data de modificação."""
+    if not os.path.exists(path):
+        return f"{path}:ausente"
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{int(stat.st_mtime)}"
+
+def config_hash(*parts):
+    """Gera o hash da versão/configuração de um analisador a partir das partes informadas."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+@lru_cache(maxsize=None)
+def _rev_parse_cached(repo_dir, *revisions):
+    result = subprocess.run(["git", "rev-parse", *revisions], cwd=repo_dir, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+def _rev_parse(repo_dir, *revisions):
+    # Falhas não ficam em cache: o commit pode aparecer no clone depois (ex.: após um fetch)
+    try:
+        return _rev_parse_cached(repo_dir, *revisions)
+    except subprocess.CalledProcessError:
+        return None
+
+def tree_hash(commit_sha, paths=(), repo_dir=REPO_DIR):
+    """
+    Hash do conteúdo de um commit: o tree inteiro ou, se paths for informado, os objetos dessas partes.
+
+    Tags diferentes (ex.: o último RC e a release final) que apontam para a mesma árvore têm o mesmo hash.
+
+    Returns:
+        str: O hash, ou None se o commit (ou alguma das partes) não estiver no clone local.
+    """
+    if not os.path.isdir(repo_dir):
+        return None
+    revisions = [f"{commit_sha}:{path}" for path in paths] if paths else [f"{commit_sha}^{{tree}}"]
+    hashes = _rev_parse(repo_dir, *revisions)
+    if hashes is None:
+        return None
+    return hashes[0] if len(hashes) == 1 else hashlib.sha1(" ".join(hashes).encode("utf-8")).hexdigest()
+
+def content_key(commit_sha, analyzer, repo_dir=REPO_DIR):
+    """
+    Chave do cache: o hash da parte da árvore que o analisador lê (o SHA do commit se não for possível resolvê-la).
+
+    Sem o clone, a chave cai para o SHA e não encontra as entradas indexadas pela árvore: clone o repositório
+    antes de consultar o cache.
+    """
+    scope = ANALYZER_SCOPES.get(analyzer, ())
+    return tree_hash(commit_sha, scope, repo_dir) or tree_hash(commit_sha, (), repo_dir) or commit_sha
+
+def entry_dir(commit_sha, analyzer, config):
+    """Diretório da entrada do cache para (conteúdo do commit, analisador, configuração)."""
+    return os.path.join(CACHE_DIR, analyzer, config, content_key(commit_sha, analyzer))
+
+def _find_entry(commit_sha, analyzer, config):
+    # Entradas antigas eram indexadas pelo SHA do commit
+    for directory in dict.fromkeys([entry_dir(commit_sha, analyzer, config), os.path.join(CACHE_DIR, analyzer, config, commit_sha)]):
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as manifest_file:
+                return directory, json.load(manifest_file)
+    return None, None
+
+def lookup(commit_sha, analyzer, config):
+    """Retorna o manifesto da entrada do cache, ou None se o resultado ainda não foi calculado."""
+    return _find_entry(commit_sha, analyzer, config)[1]
+
+def store(commit_sha, analyzer, config, tag, paths, data=None):
+    """
+    Guarda no cache os relatórios gerados para um commit.
+
+    Os nomes dos arquivos são salvos com o safe_tag substituído por um marcador,
+    para que o mesmo resultado possa ser restaurado sob outra tag com a mesma árvore.
+
+    Args:
+        commit_sha (str): SHA do commit analisado.
+        analyzer (str): Nome do analisador (ex.: "ck", "spotbugs", "jacoco").
+        config (str): Hash da versão/configuração do analisador.
+        tag (str): Nome da tag/release analisada.
+        paths (list): Caminhos dos relatórios gerados.
+        data (dict): Dados adicionais a guardar no manifesto (ex.: métricas extraídas).
+    """
+    safe_tag = tag.replace("/", "_")
+    target_dir = entry_dir(commit_sha, analyzer, config)
+    os.makedirs(target_dir, exist_ok=True)
+
+    files = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        template = os.path.basename(path).replace(safe_tag, TAG_PLACEHOLDER)
+        atomic_copy(path, os.path.join(target_dir, template))
+        files.append(template)
+
+    # O manifesto é escrito por último: uma entrada sem manifesto é tratada como ausente
+    manifest = {"commit": commit_sha, "analyzer": analyzer, "config": config, "tag": tag, "files": files, "data": data}
+    manifest_path = os.path.join(target_dir, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return stat.st_size, int(stat.st_mtime)
+
+def restore(commit_sha, analyzer, config, tag, output_dir):
+    """
+    Restaura em output_dir os relatórios em cache de um commit, nomeados com o safe_tag da tag informada.
+
+    Os relatórios são cópias independentes da entrada do cache, que pode ser reescrita pelos analisadores sem afetá-la.
+
+    Returns:
+        dict: O manifesto da entrada, ou None se não houver resultado em cache.
+    """
+    source_dir, manifest = _find_entry(commit_sha, analyzer, config)
+    if manifest is None:
+        return None
+
+    safe_tag = tag.replace("/", "_")
+    os.makedirs(output_dir, exist_ok=True)
+    for template in manifest["files"]:
+        source_path = os.path.join(source_dir, template)
+        target_path = os.path.join(output_dir, template.replace(TAG_PLACEHOLDER, safe_tag))
+        # Um relatório diferente do cache (ex.: escrito pela metade antes de uma interrupção) é substituído
+        if not os.path.exists(target_path) or _file_stat(target_path) != _file_stat(source_path):
+            atomic_copy(source_path, target_path)
+    return manifest
+
+def split_duplicates(releases, analyzer=None):
+    """
+    Separa as releases cuja árvore é igual à de uma release anterior da lista.
+
+    Returns:
+        tuple: (releases com árvore única, releases duplicadas), na ordem original.
+    """
+    unique, duplicates = [], []
+    seen = set()
+    for name, commit_sha in releases:
+        key = content_key(commit_sha, analyzer)
+        if key in seen:
+            print(f"Release {name} tem a mesma árvore de uma release anterior: os relatórios serão reaproveitados.")
+            duplicates.append((name, commit_sha))
+        else:
+            seen.add(key)
+            unique.append((name, commit_sha))
+    return unique, duplicates
+
+def split_cached(releases, analyzer, config, output_dir):
+    """
+    Restaura do cache as releases já analisadas.
+
+    Das releases pendentes com a mesma árvore, apenas a primeira é devolvida; chame split_cached
+    de novo depois de processá-las para restaurar as demais.
+
+    Returns:
+        tuple: (releases pendentes, dict com os dados em cache de cada release restaurada)
+    """
+    pending = []
+    restored = {}
+    for name, commit_sha in releases:
+        manifest = restore(commit_sha, analyzer, config, name, output_dir)
+        if manifest is None:
+            pending.append((name, commit_sha))
+        else:
+            print(f"Release {name} ({commit_sha[:10]}) restaurada do cache de {analyzer}.")
+            restored[name] = manifest["data"]
+    pending, _ = split_duplicates(pending, analyzer)
+    return pending, restored
@@ -0,0 +1,189 @@
+import os
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")  # Renderização sem janela (CI/servidores)
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import ck_store
+from spotbugs_stream import read_reports
+
+CK_REPORTS_DIR = "ck_reports"
+SPOTBUGS_REPORTS_DIR = "spotbugs_reports"
+JACOCO_REPORTS_DIR = "jacoco_reports"
+JACOCO_CSV_PATH = os.path.join(JACOCO_REPORTS_DIR, "jacoco_metrics.csv")
+CHARTS_MANIFEST_PATH = "charts_manifest.json"  # Hash dos agregados de cada gráfico já renderizado
+N_WORKERS = 4
+
+CK_METRIC_NAMES = {
+    "wmc": "Weighted Methods per Class",
+    "dit": "Depth of Inheritance Tree",
+    "noc": "Number of Children",
+    "cbo": "Coupling Between Object Classes",
+    "lcom*": "Lack of Cohesion of Methods",
+    "rfc": "Response For a Class",
+    "loc": "Lines of Code"
+}
+INVERTED_METRICS = ["wmc", "dit", "cbo", "lcom*"]  # Invertidas no cálculo da saúde geral (como em ck-graph2.py)
+
+def ck_charts(df, output_dir=CK_REPORTS_DIR):
+    """Médias por release das métricas do CK e a saúde geral do código."""
+    metrics = list(CK_METRIC_NAMES)
+    charts = []
+    means = df.groupby("Release", observed=True)[metrics].mean()
+    for metric in metrics:
+        charts.append({
+            "path": os.path.join(output_dir, f"{metric.replace('*', '')}.png"),
+            "title": f"Evolução da métrica {CK_METRIC_NAMES[metric]}",
+            "ylabel": metric.upper(),
+            "series": {metric: means[metric]},
+        })
+
+    inverted = df[metrics].astype("float64")
+    inverted[INVERTED_METRICS] = 1 / (inverted[INVERTED_METRICS] + 1)
+    health = inverted.mean(axis=1).groupby(df["Release"], observed=True).mean()
+    charts.append({
+        "path": os.path.join(output_dir, "health.png"),
+        "title": "Evolução da Saúde Geral do Código ao Longo das Releases",
+        "ylabel": "Saúde Geral do Código (Média das Métricas)",
+        "series": {"average_health": health},
+    })
+    return charts
+
+def ck_aggregates():
+    ck_store.ingest(levels=["class"])
+    df = ck_store.load("class", columns=list(CK_METRIC_NAMES))
+    return ck_charts(df) if not df.empty else []
+
+def bug_charts(df, output_dir=SPOTBUGS_REPORTS_DIR):
+    """Total de bugs e bugs por categoria em cada release."""
+    by_category = df.groupby(["Category", "Release"], observed=True).size()
+    return [
+        {
+            "path": os.path.join(output_dir, "bugs_total.png"),
+            "title": "Evolução Total dos Bugs nas Releases",
+            "ylabel": "Número de Bugs",
+            "series": {"BugCount": df.groupby("Release", observed=True).size()},
+        },
+        {
+            "path": os.path.join(output_dir, "bugs_by_category.png"),
+            "title": "Evolução dos Bugs nas Releases por Categoria",
+            "ylabel": "Número de Bugs",
+            "series": {str(category): by_category[category] for category in by_category.index.get_level_values(0).unique()},
+        },
+    ]
+
+def bugs_aggregates():
+    if not os.path.exists(SPOTBUGS_REPORTS_DIR):
+        return []
+    df = read_reports(SPOTBUGS_REPORTS_DIR).to_dataframe()
+    return bug_charts(df) if not df.empty else []
+
+def jacoco_charts(df, output_dir=JACOCO_REPORTS_DIR):
+    """Cobertura por release de cada contador do JaCoCo."""
+    df = df.assign(Release=df["Release"].str.replace("rel/", "", regex=False))
+    df = df.drop_duplicates(["Release", "Metric"], keep="last")
+
+    charts = []
+    for metric, metric_data in df.groupby("Metric"):
+        charts.append({
+            "path": os.path.join(output_dir, f"{metric}_coverage.png"),
+            "title": f"Métrica: {metric}",
+            "ylabel": "Cobertura (%)",
+            "series": {"Coverage (%)": metric_data.set_index("Release")["Coverage"]},
+        })
+    return charts
+
+def jacoco_aggregates():
+    if not os.path.exists(JACOCO_CSV_PATH):
+        return []
+    return jacoco_charts(pd.read_csv(JACOCO_CSV_PATH))
+
+def sort_releases(charts):
+    """Ordena as séries de cada gráfico pela versão das releases."""
+    for chart in charts:
+        for label, series in chart["series"].items():
+            series.index = series.index.astype(str)
+            chart["series"][label] = series.sort_index(key=lambda index: index.map(ck_store.release_sort_key))
+    return charts
+
+def build_charts():
+    """Tabela pré-agregada de todos os gráficos: uma entrada por arquivo PNG, com as séries por release."""
+    return sort_releases(ck_aggregates() + bugs_aggregates() + jacoco_aggregates())
+
+def chart_hash(chart):
+    """Hash do título e dos valores agregados de um gráfico."""
+    digest = hashlib.sha256(chart["title"].encode())
+    for label, series in chart["series"].items():
+        digest.update(label.encode())
+        digest.update(series.to_json().encode())
+    return digest.hexdigest()
+
+def render_chart(chart):
+    """Renderiza um gráfico de linhas (uma linha por série) em PNG."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for label, series in chart["series"].items():
+        ax.plot(series.index, series.values, marker="o", linestyle="-", label=label)
+    ax.set_xlabel("Release")
+    ax.set_ylabel(chart["ylabel"])
+    ax.set_title(chart["title"])
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.grid(True, linestyle="--", alpha=0.6)
+    if len(chart["series"]) > 1:
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(chart["path"])
+    plt.close(fig)
+    return chart["path"]
+
+def load_manifest(path=CHARTS_MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
+
+def render_all(workers=N_WORKERS, force=False, manifest_path=CHARTS_MANIFEST_PATH):
+    """
+    Renderiza em paralelo os gráficos cujos agregados mudaram desde a última execução.
+
+    Args:
+        workers (int): Número de processos de renderização.
+        force (bool): Renderiza todos os gráficos, mesmo os inalterados.
+
+    Returns:
+        list: Caminhos dos gráficos gerados.
+    """
+    manifest = load_manifest(manifest_path)
+    pending = []
+    for chart in build_charts():
+        digest = chart_hash(chart)
+        if not force and manifest.get(chart["path"]) == digest and os.path.exists(chart["path"]):
+            continue
+        manifest[chart["path"]] = digest
+        pending.append(chart)
+
+    rendered = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for path in executor.map(render_chart, pending):
+                print(f"Gráfico gerado: {path}")
+                rendered.append(path)
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return rendered
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os gráficos de CK, SpotBugs e JaCoCo em PNG, sem janelas.")
+    parser.add_argument("--workers", type=int, default=N_WORKERS, help="Número de processos de renderização")
+    parser.add_argument("--force", action="store_true", help="Renderiza todos os gráficos, mesmo os inalterados")
+    args = parser.parse_args()
+
+    rendered = render_all(args.workers, args.force)
+    print(f"{len(rendered)} gráficos gerados.")
@@ -1,19 +1,10 @@
-import os
-import re
-import pandas as pd
+import argparse
 import matplotlib.pyplot as plt
 from packaging.version import Version
+import ck_store
+import ck_quick
 import seaborn as sns
 
-# Diretório onde os arquivos CSV estão localizados
-directory = "./ck_reports"
-
-# Listar arquivos no diretório
-files = os.listdir(directory)
-
-# Lista para armazenar os dados
-data = []
-
 metric_names = {
     "wmc": "Weighted Methods per Class",
     "dit": "Depth of Inheritance Tree",
@@ -24,38 +15,27 @@ metric_names = {
     "loc": "Lines of Code"
 }
 
-# Processar cada arquivo CSV
-for filename in files:
-    if filename.endswith(".csvclass.csv"):
-        print(f"Processando arquivo: {filename}")
-        file_path = os.path.join(directory, filename)
-
-        # Extrair a versão do nome do arquivo
-        match = re.search(r'commons-lang-(.+?)_ck_metrics', filename)
-        if match:
-            version = match.group(1)
-        else:
-            version = filename
+parser = argparse.ArgumentParser(description="Gráficos da evolução das métricas CK por release.")
+parser.add_argument("--quick", action="store_true", help="Usa os CSVs aproximados do ck_quick.py em vez dos relatórios do CK")
+args = parser.parse_args()
+reports_dir, store_dir = (ck_quick.QUICK_REPORTS_DIR, ck_quick.QUICK_STORE_DIR) if args.quick else (ck_store.CK_REPORTS_DIR, ck_store.STORE_DIR)
 
-        # Carregar o CSV
-        df_csv = pd.read_csv(file_path)
-
-        # Selecionar as metricas
-        metrics = ["wmc", "dit", "noc", "cbo", "lcom*", "rfc", "loc"]
-        if all(metric in df_csv.columns for metric in metrics):
-            df_csv['Release'] = version
-            data.append(df_csv[metrics + ['Release']])
-
-if data:
-    df_metrics = pd.concat(data, ignore_index=True)
+# Converte para o armazenamento colunar os CSVs novos e carrega apenas as métricas usadas
+metrics = ["wmc", "dit", "noc", "cbo", "lcom*", "rfc", "loc"]
+ck_store.ingest(reports_dir, store_dir, levels=["class"])
+df_metrics = ck_store.load("class", columns=metrics, store_dir=store_dir)
 
+if not df_metrics.empty:
     df_metrics["Release"] = df_metrics["Release"].apply(Version)
 
     # Ordenar os dados por Release
     df_metrics = df_metrics.sort_values("Release").reset_index(drop=True)
 
     # Gerar gráficos para cada métrica
-    metrics_to_plot = ["wmc", "dit", "noc", "cbo", "lcom*", "rfc", "loc"]
+    # Métricas sem nenhum valor (ex.: nos CSVs aproximados do ck_quick.py) ficam fora dos gráficos
+    metrics_to_plot = [metric for metric in metrics if df_metrics[metric].notna().any()]
+    for metric in sorted(set(metrics) - set(metrics_to_plot)):
+        print(f"Métrica {metric} sem valores; gráfico omitido.")
     plt.figure(figsize=(20, 14))
 
     for i, metric in enumerate(metrics_to_plot, 1):
@@ -68,8 +48,9 @@ if data:
         plt.title(f"Evolução da métrica {metric_names[metric]}")
         plt.xticks(rotation=45)
         plt.grid(True)
-        plt.tight_layout()
-        plt.show()
-    
+
+    plt.tight_layout()
+    plt.show()
+
 else:
     print("Nenhum dado foi encontrado nos arquivos CSV.")
@@ -1,50 +1,21 @@
-import os
-import re
-import pandas as pd
 import matplotlib.pyplot as plt
 from packaging.version import Version
+import ck_store
 
-# Diretório onde os arquivos CSV estão localizados
-directory = "./ck_reports"
-
-# Listar arquivos no diretório
-files = os.listdir(directory)
-
-# Lista para armazenar os dados
-data = []
-
-# Processar cada arquivo CSV
-for filename in files:
-    if filename.endswith(".csvclass.csv"):
-        print(f"Processando arquivo: {filename}")
-        file_path = os.path.join(directory, filename)
-
-        # Extrair a versão do nome do arquivo
-        match = re.search(r'commons-lang-(.+?)_ck_metrics', filename)
-        if match:
-            version = match.group(1)
-        else:
-            version = filename
-
-        # Carregar o CSV
-        df_csv = pd.read_csv(file_path)
-
-        metrics = ["wmc", "dit", "noc", "cbo", "lcom*", "rfc", "loc"]
-        if all(metric in df_csv.columns for metric in metrics):
-            df_csv['Release'] = version
-            data.append(df_csv[metrics + ['Release']])
-
-# Combinar todos os dados em um único DataFrame
-if data:
-    df_metrics = pd.concat(data, ignore_index=True)
+# Converte para o armazenamento colunar os CSVs novos e carrega apenas as métricas usadas
+metrics = ["wmc", "dit", "noc", "cbo", "lcom*", "rfc", "loc"]
+ck_store.ingest(levels=["class"])
+df_metrics = ck_store.load("class", columns=metrics)
 
+if not df_metrics.empty:
     # Converter a coluna Release para versão ordenável
     df_metrics["Release"] = df_metrics["Release"].apply(Version)
 
     # Ordenar os dados por Release
     df_metrics = df_metrics.sort_values("Release").reset_index(drop=True)
 
-    # Inverter as métricas para que valores mais baixos indiquem melhoria
+    # Inverter as métricas para que valores mais baixos indiquem melhoria (em float: as colunas inteiras vêm compactadas)
+    df_metrics[metrics] = df_metrics[metrics].astype(float)
     df_metrics['wmc'] = 1 / (df_metrics['wmc'] + 1)  # Inverter WMC
     df_metrics['dit'] = 1 / (df_metrics['dit'] + 1)  # Inverter DIT
     df_metrics['cbo'] = 1 / (df_metrics['cbo'] + 1)  # Inverter CBO
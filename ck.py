@@ -1,100 +1,106 @@
 import os
-import subprocess
-import requests
+import argparse
+import cache
+import tracing
+from common import REPO_DIR, fetch_releases, clone_repository, checkout_release, compile_code
+from worktrees import run_parallel
 
-GITHUB_API_URL="https://api.github.com/repos/apache/commons-lang/tags" # Repositório a ser analisado
-REPO_DIR="apache_commons_repo"  # Diretório onde será clonado o repositório de análise
-MAVEN_PATH="C:/apache-maven-3.9.9/bin/mvn.cmd"  # Diretório do Maven
 OUTPUT_DIR="C:/Users/Bruno/Documents/commons-lang-metrics/ck_reports"  # Diretório onde será salvo o resultado do CK
 CK_REPO_JAR_DIR="C:/Users/Bruno/Documents/commons-lang-metrics/ck/target/ck-0.7.1-SNAPSHOT-jar-with-dependencies.jar" # Diretório do JAR do CK 
-N_RELEASES=20 # Número de Releases que serão analisadas
-
-def fetch_releases(limit=N_RELEASES):
-    """Busca as últimas releases no GitHub."""
-    response = requests.get(GITHUB_API_URL)
-    response.raise_for_status()
-    releases = response.json()[:limit]
-    return [(release["name"], release["commit"]["sha"]) for release in releases]
-
-def clone_repository():
-    """Clona o repositório se ele ainda não estiver clonado."""
-    if not os.path.exists(REPO_DIR):
-        print("Clonando o repositório...")
-        subprocess.run(["git", "clone", "https://github.com/apache/commons-lang.git", REPO_DIR], check=True)
-
-def checkout_release(commit_sha):
-    """Faz o checkout de um commit específico no repositório"""
-    os.chdir(REPO_DIR)
-    subprocess.run(["git", "checkout", commit_sha], check=True)
-    os.chdir("..")
-
-def compile_code():
-    """Compila o código Java da release usando Maven."""
-    os.chdir(REPO_DIR)
-    print("Compilando o código...")
-    
-    result = subprocess.run([MAVEN_PATH, "clean", "compile"], capture_output=True, text=True)
-    os.chdir("..")
-    
-    if result.returncode == 0:
-        print("Compilação concluída com sucesso.")
-        if os.path.exists(os.path.join(REPO_DIR, "src/main")):
-            return True
-        else:
-            print("Erro: O diretório src/main não foi gerado após a compilação.")
-            return False
-    else:
-        print("Erro na compilação:")
-        print(result.stdout)
-        print(result.stderr)
-        return False
+N_WORKERS=1 # Número de processos paralelos (1 = modo sequencial)
+CK_LEVELS=["class", "method", "field", "variable"] # Níveis dos CSVs gerados pelo CK
+CK_ARGS=["true", "0", "true"] # Usar JARs, máximo de arquivos por partição, coletar variáveis e campos
+CK_CONFIG=cache.config_hash(cache.file_fingerprint(CK_REPO_JAR_DIR), *CK_ARGS) # Chave de cache da versão/configuração do CK
+
+def ck_report_paths(tag, output_dir=OUTPUT_DIR):
+    """Retorna os caminhos dos CSVs gerados pelo CK para uma tag/release."""
+    safe_tag = tag.replace("/", "_")
+    return [os.path.normpath(os.path.join(output_dir, f"{safe_tag}_ck_metrics.csv{level}.csv")) for level in CK_LEVELS]
      
-def run_ck_metrics(tag):
+def run_ck_metrics(tag, repo_dir=REPO_DIR, output_dir=OUTPUT_DIR):
     """Executa a ferramenta CK para extrair as métricas e gera os relatórios JSON e CSV para uma tag/release específica."""
     safe_tag = tag.replace("/", "_")
-    csv_report_path = os.path.normpath(os.path.join(OUTPUT_DIR, f"{safe_tag}_ck_metrics.csv"))
+    csv_report_path = os.path.normpath(os.path.join(output_dir, f"{safe_tag}_ck_metrics.csv"))
 
-    # Cria o diretório OUTPUT_DIR se ainda não existir
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    # Cria o diretório de saída se ainda não existir
+    os.makedirs(output_dir, exist_ok=True)
     
     # Verifica se o JAR existe
     if not os.path.exists(CK_REPO_JAR_DIR):
         print(f"Erro: O JAR CK não foi encontrado no caminho {CK_REPO_JAR_DIR}. Certifique-se de ter compilado o repositório CK corretamente.")
-        return 
+        return False
 
     # Executa a ferramenta CK para gerar métricas
-    result_csv = subprocess.run(
+    result_csv = tracing.run(
         [
             "java", "-jar", CK_REPO_JAR_DIR,
-            REPO_DIR,  # Diretório do código compilado
-            "true",  # Usar JARs
-            "0",  # Máximo de arquivos por partição (automático)
-            "true",  # Coletar métricas de variáveis e campos
+            repo_dir,  # Diretório do código compilado
+            *CK_ARGS,  # Usar JARs, partição automática e coleta de variáveis e campos
             csv_report_path,  # Diretório de saída
         ],
-        capture_output=True, text=True
+        "ck", tag, outputs=ck_report_paths(tag, output_dir)
     )
 
+    if result_csv.returncode != 0:
+        print(f"Erro ao executar o CK para a tag {tag}:")
+        print(result_csv.stderr)
+        return False
+    return True
+
+def process_release(name, commit_sha, repo_dir=REPO_DIR):
+    """Faz checkout, compila e executa o CK para uma release em repo_dir."""
+    print(f"\nProcessando release {name} - Commit: {commit_sha}")
+
+    # Faz o checkout da release específica
+    checkout_release(commit_sha, repo_dir, name)
+
+    # Compila o código
+    if compile_code(repo_dir, name):
+        if run_ck_metrics(name, repo_dir):
+            cache.store(commit_sha, "ck", CK_CONFIG, name, ck_report_paths(name))
+        print(f"Análise CK concluída para a tag {name}.\n")
+        return True
+    else:
+        print(f"Erro na compilação da tag {name}. Pulando para a próxima.\n")
+        return False
+
 def process_releases():
     """Clona, processa as releases e executa o SpotBugs para cada uma."""
-    # Clona o repositório se necessário
+    # O clone vem antes do cache: as entradas são indexadas pelo hash da árvore, resolvido no clone
     clone_repository()
-    
-    # Busca as últimas releases
-    releases = fetch_releases()
-    
+
+    # Busca as últimas releases e restaura do cache as que já foram analisadas
+    all_releases = fetch_releases()
+    releases, _ = cache.split_cached(all_releases, "ck", CK_CONFIG, OUTPUT_DIR)
+    if not releases:
+        print("Todas as releases já estão no cache do CK.")
+        return
+
     for name, commit_sha in releases:
-        print(f"\nProcessando release {name} - Commit: {commit_sha}")
-        
-        # Faz o checkout da release específica
-        checkout_release(commit_sha)
-        
-        # Compila o código
-        if compile_code():
-            run_ck_metrics(name)
-            print(f"Análise CK concluída para a tag {name}.\n")
-        else:
-            print(f"Erro na compilação da tag {name}. Pulando para a próxima.\n")
+        process_release(name, commit_sha)
+
+    # Releases com a mesma árvore de uma release processada agora recebem os relatórios dela
+    cache.split_cached(all_releases, "ck", CK_CONFIG, OUTPUT_DIR)
+
+def process_releases_parallel(workers=N_WORKERS, keep_worktrees=False):
+    """Processa as releases em paralelo, uma worktree do repositório por worker."""
+    clone_repository()
+    all_releases = fetch_releases()
+    releases, _ = cache.split_cached(all_releases, "ck", CK_CONFIG, OUTPUT_DIR)
+    if not releases:
+        print("Todas as releases já estão no cache do CK.")
+        return
+
+    run_parallel(releases, process_release, REPO_DIR, workers, keep_worktrees)
+    cache.split_cached(all_releases, "ck", CK_CONFIG, OUTPUT_DIR)
 
 if __name__ == "__main__":
-    process_releases()
+    parser = argparse.ArgumentParser(description="Extrai as métricas CK das releases do commons-lang.")
+    parser.add_argument("--workers", type=int, default=N_WORKERS, help="Número de processos paralelos (1 = modo sequencial)")
+    parser.add_argument("--keep-worktrees", action="store_true", help="Mantém as worktrees dos workers ao final (reaproveitadas na próxima execução)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        process_releases_parallel(args.workers, args.keep_worktrees)
+    else:
+        process_releases()
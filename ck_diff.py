@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from packaging.version import Version
+
+import ck_store
+
+DIFF_LEVEL = "class_diff"  # Nível do armazenamento onde ficam as diferenças entre releases consecutivas
+DIFF_METRICS = ["wmc", "dit", "noc", "cbo", "lcom*", "rfc", "loc"]
+
+def _load_releases(safe_tags, metrics):
+    """Carrega as classes e métricas de várias releases em um único DataFrame com a coluna Tag."""
+    frames = []
+    for safe_tag in safe_tags:
+        df = ck_store.load_partition("class", safe_tag, ["class"] + metrics)
+        if df is not None:
+            # Classes com o mesmo nome (ex.: em src/main e src/test) são consideradas uma vez
+            df = df.drop_duplicates("class")
+            df["Tag"] = safe_tag
+            frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+def compute_diffs(pairs, metrics=DIFF_METRICS):
+    """
+    Calcula, em uma única junção vetorizada, as diferenças de classe para vários pares de releases.
+
+    Args:
+        pairs (list): Pares (release anterior, release atual) de safe_tags.
+        metrics (list): Métricas do CK a comparar.
+
+    Returns:
+        DataFrame: Uma linha por classe e par, com Tag (release atual), class, status
+        (added, removed, changed ou unchanged), métrica atual, anterior ("_prev") e delta ("_delta").
+    """
+    pair_ids = pd.DataFrame(pairs, columns=["Previous", "Tag"])
+    frame = _load_releases(sorted(set(pair_ids["Previous"]) | set(pair_ids["Tag"])), metrics)
+
+    current = frame.merge(pair_ids[["Tag"]], on="Tag")
+    previous = frame.rename(columns={"Tag": "Previous"}).merge(pair_ids, on="Previous").drop(columns="Previous")
+
+    merged = current.merge(previous, on=["Tag", "class"], how="outer", suffixes=("", "_prev"), indicator=True)
+    merged["status"] = np.select(
+        [merged["_merge"] == "left_only", merged["_merge"] == "right_only"],
+        ["added", "removed"],
+        default="unchanged",
+    )
+    both = merged["_merge"] == "both"
+    changed = np.zeros(len(merged), dtype=bool)
+    for metric in metrics:
+        merged[f"{metric}_delta"] = merged[metric] - merged[f"{metric}_prev"]
+        # Métricas indefinidas (NaN, ex.: lcom*) nas duas releases não contam como alteração
+        same = (merged[metric] == merged[f"{metric}_prev"]) | (merged[metric].isna() & merged[f"{metric}_prev"].isna())
+        changed |= (both & ~same).to_numpy()
+    merged.loc[changed, "status"] = "changed"
+
+    columns = ["Tag", "class", "status"]
+    for metric in metrics:
+        columns += [metric, f"{metric}_prev", f"{metric}_delta"]
+    return merged[columns]
+
+def update(metrics=DIFF_METRICS):
+    """
+    Atualiza as diferenças entre releases consecutivas no armazenamento colunar.
+
+    Apenas os pares cujas partições de origem mudaram (por exemplo, uma release nova) são recalculados.
+
+    Returns:
+        int: Número de pares recalculados.
+    """
+    safe_tags = ck_store.list_releases("class")
+    pending = []
+    signatures = {}
+    for previous, current in zip(safe_tags, safe_tags[1:]):
+        signature = ck_store.source_signature(
+            ck_store.partition_path("class", previous), ck_store.partition_path("class", current)
+        )
+        if not ck_store.is_fresh(ck_store.partition_path(DIFF_LEVEL, current), signature):
+            pending.append((previous, current))
+            signatures[current] = signature
+
+    if not pending:
+        return 0
+
+    diffs = compute_diffs(pending, metrics)
+    for current, df in diffs.groupby("Tag", sort=False):
+        print(f"Gravando diferenças de classes para {current}")
+        ck_store.write_partition(df.drop(columns="Tag").reset_index(drop=True), ck_store.partition_path(DIFF_LEVEL, current), signatures[current])
+    return len(pending)
+
+def load_diffs(columns=None, releases=None):
+    """Carrega as diferenças de classe já calculadas (a coluna Release indica a release atual do par)."""
+    return ck_store.load(DIFF_LEVEL, columns=columns, releases=releases)
+
+def summarize(diffs):
+    """Resume as diferenças por release: classes adicionadas, removidas e alteradas, e a soma dos deltas."""
+    counts = pd.crosstab(diffs["Release"], diffs["status"])
+    deltas = diffs.groupby("Release")[[column for column in diffs.columns if column.endswith("_delta")]].sum()
+    return counts.join(deltas)
+
+if __name__ == "__main__":
+    ck_store.ingest(levels=["class"])
+    print(f"{update()} pares de releases recalculados.")
+    summary = summarize(load_diffs())
+    summary = summary.loc[sorted(summary.index, key=Version)]
+    print(summary.to_string())
@@ -0,0 +1,119 @@
+import os
+import argparse
+
+import pandas as pd
+
+import ck_store
+from quantile_sketch import QuantileSketch
+
+SUMMARY_LEVELS = ["method", "field", "variable"]
+QUANTILES = [0.5, 0.9, 0.99]
+CHUNK_SIZE = 200_000  # Linhas lidas por vez dos CSVs grandes
+EXCLUDED_COLUMNS = ["line"]  # Colunas numéricas que não são métricas (número da linha no fonte)
+
+def sketch_csv(csv_path, chunksize=CHUNK_SIZE):
+    """
+    Lê um CSV do CK em uma única passada, em blocos, acumulando um sketch por coluna numérica.
+
+    Returns:
+        dict: {coluna: QuantileSketch}
+    """
+    sketches = {}
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        for column in chunk.columns:
+            series = chunk[column]
+            if column in EXCLUDED_COLUMNS or pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+                continue
+            sketches.setdefault(column, QuantileSketch()).add(series.to_numpy())
+    return sketches
+
+def summary_frame(sketches):
+    """Resumo por coluna: contagem, média, quantis aproximados, mínimo e máximo."""
+    rows = []
+    for column, sketch in sketches.items():
+        row = {"column": column, "count": sketch.count, "mean": sketch.mean(), "sum": sketch.sum, "min": sketch.min}
+        for q in QUANTILES:
+            row[f"p{round(q * 100)}"] = sketch.quantile(q)
+        row["max"] = sketch.max
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def buckets_frame(sketches):
+    """Buckets de todos os sketches em formato longo (column, bucket, count)."""
+    frames = [sketch.to_frame().assign(column=column) for column, sketch in sketches.items()]
+    if not frames:
+        return pd.DataFrame(columns=["column", "bucket", "count"])
+    return pd.concat(frames, ignore_index=True)[["column", "bucket", "count"]]
+
+def ingest(reports_dir=ck_store.CK_REPORTS_DIR, store_dir=ck_store.STORE_DIR, levels=SUMMARY_LEVELS):
+    """
+    Gera os resumos e sketches por release dos CSVs de método, campo e variável.
+
+    Os resumos ficam nos níveis "<nível>_summary" e os buckets em "<nível>_sketch" do ck_store;
+    apenas os CSVs novos ou alterados são relidos.
+
+    Returns:
+        int: Número de releases/níveis (re)processados.
+    """
+    processed = 0
+    for filename in sorted(os.listdir(reports_dir)):
+        match = ck_store.REPORT_PATTERN.match(filename)
+        if not match or match.group("level") not in levels:
+            continue
+
+        csv_path = os.path.join(reports_dir, filename)
+        signature = ck_store.source_signature(csv_path)
+        level, safe_tag = match.group("level"), match.group("safe_tag")
+        summary_partition = ck_store.partition_path(f"{level}_summary", safe_tag, store_dir)
+        sketch_partition = ck_store.partition_path(f"{level}_sketch", safe_tag, store_dir)
+        if ck_store.is_fresh(summary_partition, signature) and ck_store.is_fresh(sketch_partition, signature):
+            continue
+
+        print(f"Resumindo arquivo: {filename}")
+        sketches = sketch_csv(csv_path)
+        ck_store.write_partition(buckets_frame(sketches), sketch_partition, signature)
+        ck_store.write_partition(summary_frame(sketches), summary_partition, signature)
+        processed += 1
+    return processed
+
+def load_summary(level="method", columns=None, releases=None, store_dir=ck_store.STORE_DIR):
+    """Resumos por release e coluna de um nível (sem reler as linhas dos CSVs)."""
+    return ck_store.load(f"{level}_summary", columns=columns, releases=releases, store_dir=store_dir)
+
+def load_sketch(level, column, releases=None, store_dir=ck_store.STORE_DIR):
+    """
+    Combina os sketches de uma coluna nas releases pedidas (None usa todas).
+
+    Returns:
+        QuantileSketch: Distribuição conjunta das releases.
+    """
+    merged = QuantileSketch()
+    for safe_tag in ck_store.list_releases(f"{level}_summary", store_dir):
+        if releases is not None and safe_tag not in releases:
+            continue
+        summary = ck_store.load_partition(f"{level}_summary", safe_tag, store_dir=store_dir)
+        buckets = ck_store.load_partition(f"{level}_sketch", safe_tag, store_dir=store_dir)
+        row = summary[summary["column"] == column]
+        if row.empty:
+            continue
+        row = row.iloc[0]
+        buckets = buckets[buckets["column"] == column]
+        merged.merge(QuantileSketch.from_frame(buckets, row["count"], row["sum"], row["min"], row["max"]))
+    return merged
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumos de quantis por release dos CSVs de método, campo e variável do CK.")
+    parser.add_argument("--levels", default=",".join(SUMMARY_LEVELS), help="Níveis a resumir, separados por vírgula")
+    parser.add_argument("--level", default="method", help="Nível da coluna a mostrar")
+    parser.add_argument("--column", help="Mostra o resumo de uma coluna em cada release e em todas juntas")
+    args = parser.parse_args()
+
+    processed = ingest(levels=[level.strip() for level in args.levels.split(",")])
+    print(f"{processed} arquivos resumidos.")
+
+    if args.column:
+        summary = load_summary(args.level)
+        print(summary[summary["column"] == args.column].drop(columns=["sum"]).to_string(index=False))
+        merged = load_sketch(args.level, args.column)
+        quantiles = ", ".join(f"p{round(q * 100)}={merged.quantile(q):.2f}" for q in QUANTILES)
+        print(f"Todas as releases: count={merged.count}, mean={merged.mean():.2f}, {quantiles}, max={merged.max}")
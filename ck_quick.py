@@ -0,0 +1,258 @@
+import os
+import re
+import csv
+import argparse
+import subprocess
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+import ck
+import ck_store
+from common import REPO_DIR, fetch_releases, clone_repository, commit_range
+from journal import atomic_write
+from releases import tag_version
+
+QUICK_REPORTS_DIR = "./ck_quick_reports"  # CSVs aproximados, no mesmo formato dos CSVs de classe do CK (nunca em ck_reports)
+QUICK_STORE_DIR = "./ck_quick_store"  # Armazenamento colunar dos CSVs aproximados (separado do ck_store dos relatórios reais)
+SOURCE_DIR = "src/main/java"  # Fontes lidas direto do git (sem checkout nem compilação)
+N_WORKERS = os.cpu_count() or 1  # Processos que analisam os arquivos .java
+CHUNK_SIZE = 32  # Arquivos enviados de uma vez a cada processo
+
+# Colunas do CSV de classe do CK; as que o scanner não calcula ficam vazias
+CK_CLASS_COLUMNS = [
+    "file", "class", "type", "cbo", "cboModified", "fanin", "fanout", "wmc", "dit", "noc", "rfc", "lcom", "lcom*", "tcc", "lcc",
+    "totalMethodsQty", "staticMethodsQty", "publicMethodsQty", "privateMethodsQty", "protectedMethodsQty", "defaultMethodsQty",
+    "visibleMethodsQty", "abstractMethodsQty", "finalMethodsQty", "synchronizedMethodsQty", "totalFieldsQty", "staticFieldsQty",
+    "publicFieldsQty", "privateFieldsQty", "protectedFieldsQty", "defaultFieldsQty", "finalFieldsQty", "synchronizedFieldsQty",
+    "nosi", "loc", "returnQty", "loopQty", "comparisonsQty", "tryCatchQty", "parenthesizedExpsQty", "stringLiteralsQty",
+    "numbersQty", "assignmentsQty", "mathOperationsQty", "variablesQty", "maxNestedBlocksQty", "anonymousClassesQty",
+    "innerClassesQty", "lambdasQty", "uniqueWordsQty", "modifiers", "logStatementsQty",
+]
+
+# Comentários e literais de texto/caractere (o conteúdo é descartado, as quebras de linha são mantidas)
+STRIP_PATTERN = re.compile(r'"""[\s\S]*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*[\s\S]*?\*/')
+# Uso de anotações (ex.: @SuppressWarnings("x")), cujos parênteses confundiriam a detecção de métodos
+ANNOTATION_PATTERN = re.compile(r'@(?!interface\b)[\w.]+(?:\s*\((?:[^()]|\([^()]*\))*\))?')
+PACKAGE_PATTERN = re.compile(r'\bpackage\s+([\w.]+)\s*;')
+TOKEN_PATTERN = re.compile(r'[A-Za-z_$][\w$]*|&&|\|\||[{}();,=?<>]')
+TYPE_KEYWORDS = {"class": "class", "interface": "interface", "enum": "enum", "record": "class"}
+BRANCH_TOKENS = {"if", "for", "while", "case", "catch", "&&", "||"}  # Cada um soma 1 à complexidade do método
+WILDCARD_FOLLOWERS = {">", ",", "extends", "super"}  # "?" seguido destes é um curinga de generics, não um ternário
+
+def _blank(match):
+    """Substitui um comentário ou literal por suas quebras de linha (literais viram "")."""
+    text = match.group(0)
+    newlines = "\n" * text.count("\n")
+    return newlines if text.startswith("/") else '""' + newlines
+
+def _count_declarators(tokens):
+    """Número de variáveis declaradas em um campo (ex.: "int a, b = 1;" declara 2)."""
+    count, depth = 1, 0
+    for token in tokens:
+        if token in ("(", "<"):
+            depth += 1
+        elif token in (")", ">"):
+            depth = max(0, depth - 1)
+        elif token == "," and depth == 0:
+            count += 1
+    return count
+
+def scan_source(path, source):
+    """
+    Métricas aproximadas de classe (loc, totalMethodsQty, totalFieldsQty e wmc) das classes de um arquivo .java.
+
+    Um scanner de tokens acompanha o aninhamento das chaves: declarações com parênteses no corpo de um tipo
+    são métodos, as demais são campos, e o wmc soma 1 por método mais 1 por desvio (if, for, while, case,
+    catch, &&, || e ?) no corpo. Classes anônimas e locais são contadas no método que as contém.
+
+    Returns:
+        list: Uma linha (dict com as colunas do CK) por classe, interface ou enum, incluindo as aninhadas.
+    """
+    code = ANNOTATION_PATTERN.sub(lambda match: "\n" * match.group(0).count("\n"), STRIP_PATTERN.sub(_blank, source))
+    package = PACKAGE_PATTERN.search(code)
+    prefix = package.group(1) + "." if package else ""
+
+    # Linhas não vazias acumuladas, para o loc de cada tipo sem reler o texto
+    line_starts = [0] + [match.end() for match in re.finditer("\n", code)]
+    non_blank = [0]
+    for line in code.split("\n"):
+        non_blank.append(non_blank[-1] + (1 if line.strip() else 0))
+
+    tokens = [(match.group(0), match.start()) for match in TOKEN_PATTERN.finditer(code)]
+    types = []
+    # Pilha de contextos: corpos de tipo (com as declarações pendentes) e blocos de código (com a profundidade)
+    stack = [{"kind": "file", "pending": [], "parens": 0}]
+
+    for position, (token, offset) in enumerate(tokens):
+        frame = stack[-1]
+        if frame["kind"] == "block":
+            if token == "{":
+                frame["depth"] += 1
+            elif token == "}":
+                frame["depth"] -= 1
+                if frame["depth"] == 0:
+                    stack.pop()
+            elif frame["type"] is not None:
+                following = tokens[position + 1][0] if position + 1 < len(tokens) else ""
+                if token in BRANCH_TOKENS or (token == "?" and following not in WILDCARD_FOLLOWERS):
+                    frame["type"]["wmc"] += 1
+            continue
+
+        pending = frame["pending"]
+        if token == "(":
+            frame["parens"] += 1
+        elif token == ")":
+            frame["parens"] = max(0, frame["parens"] - 1)
+        if frame["parens"] > 0 or token not in ("{", ";", "}"):
+            pending.append(token)
+            continue
+
+        record = frame.get("type")
+        keyword = next((word for word in pending if word in TYPE_KEYWORDS), None)
+        if token == "{" and keyword and "=" not in pending[:pending.index(keyword)]:
+            name = pending[pending.index(keyword) + 1] if pending.index(keyword) + 1 < len(pending) else "?"
+            nested = record is not None
+            kind = TYPE_KEYWORDS[keyword]
+            new_type = {
+                "file": path,
+                "class": f"{record['class']}${name}" if nested else prefix + name,
+                "type": "innerclass" if nested and kind == "class" else kind,
+                "wmc": 0, "totalMethodsQty": 0, "totalFieldsQty": 0,
+                "start": bisect_right(line_starts, offset),
+            }
+            types.append(new_type)
+            frame["pending"] = []
+            stack.append({"kind": "type", "type": new_type, "pending": [], "parens": 0, "constants": kind == "enum"})
+        elif token == "{":
+            # Corpo de método, inicializador, constante de enum com corpo ou valor de campo (mantém a declaração pendente)
+            is_method = record is not None and not frame.get("constants") and "=" not in pending and "(" in pending
+            if is_method:
+                record["totalMethodsQty"] += 1
+                record["wmc"] += 1
+            if "=" not in pending:
+                frame["pending"] = []
+            stack.append({"kind": "block", "type": record if is_method else None, "depth": 1})
+        elif token == ";":
+            if record is not None and frame.get("constants"):
+                frame["constants"] = False  # Fim das constantes do enum
+            elif record is not None and pending:
+                if "(" in pending and "=" not in pending[:pending.index("(")]:
+                    record["totalMethodsQty"] += 1  # Método abstrato ou de interface
+                    record["wmc"] += 1
+                else:
+                    record["totalFieldsQty"] += _count_declarators(pending)
+            frame["pending"] = []
+        elif frame["kind"] == "type":
+            record["loc"] = non_blank[bisect_right(line_starts, offset)] - non_blank[record.pop("start") - 1]
+            stack.pop()
+
+    return [{column: row.get(column, "") for column in CK_CLASS_COLUMNS} for row in types if "loc" in row]
+
+def _scan_item(item):
+    return scan_source(*item)
+
+def list_sources(revision, repo_dir=REPO_DIR, source_dir=SOURCE_DIR):
+    """Pares (sha do blob, caminho) dos arquivos .java de uma revisão."""
+    result = subprocess.run(["git", "ls-tree", "-r", revision, "--", source_dir], cwd=repo_dir,
+                            capture_output=True, text=True, check=True)
+    sources = []
+    for line in result.stdout.splitlines():
+        info, path = line.split("\t", 1)
+        if path.endswith(".java"):
+            sources.append((info.split()[2], path))
+    return sources
+
+def read_blobs(blob_shas, repo_dir=REPO_DIR):
+    """Conteúdo dos blobs (em um único "git cat-file --batch", em vez de um "git show" por arquivo)."""
+    if not blob_shas:
+        return {}
+    result = subprocess.run(["git", "cat-file", "--batch"], cwd=repo_dir, input="\n".join(blob_shas).encode() + b"\n",
+                            capture_output=True, check=True)
+    output, contents, offset = result.stdout, {}, 0
+    for blob_sha in blob_shas:
+        header_end = output.index(b"\n", offset)
+        size = int(output[offset:header_end].split()[2])
+        contents[blob_sha] = output[header_end + 1:header_end + 1 + size].decode("utf-8", errors="replace")
+        offset = header_end + 1 + size + 1
+    return contents
+
+def range_revisions(base_tag, target_tag, repo_dir=REPO_DIR):
+    """
+    Pares (nome, commit) de todos os commits entre duas tags.
+
+    Os commits intermediários recebem nomes de versão pós-release da tag base (ex.: commons-lang-3.16.0.post5),
+    que o ck_store e o ck-graph.py ordenam entre as duas releases. Quando as duas tags apontam para o mesmo
+    commit, ele recebe o nome da tag alvo.
+
+    Raises:
+        ValueError: Se a versão da tag base não puder ser extraída (ex.: LANG_2_0_M1).
+    """
+    base_version = tag_version(base_tag)
+    if base_version is None:
+        raise ValueError(f"Versão da tag base {base_tag} não reconhecida; não é possível nomear os commits intermediários.")
+    commits = commit_range(base_tag, target_tag, repo_dir)
+    if len(commits) == 1:
+        return [(target_tag, commits[0])]
+    names = [base_tag] + [f"commons-lang-{base_version}.post{index}" for index in range(1, len(commits) - 1)] + [target_tag]
+    return list(zip(names, commits))
+
+def is_ck_output_dir(output_dir):
+    """Indica se output_dir é um diretório de relatórios do CK real, que o scanner não deve sobrescrever."""
+    real_dirs = {os.path.normcase(os.path.abspath(directory)) for directory in (ck.OUTPUT_DIR, ck_store.CK_REPORTS_DIR, ck_store.STORE_DIR)}
+    return os.path.normcase(os.path.abspath(output_dir)) in real_dirs
+
+def scan_revisions(revisions, output_dir=QUICK_REPORTS_DIR, repo_dir=REPO_DIR, workers=N_WORKERS):
+    """
+    Gera o CSV de classe aproximado de cada revisão, sem checkout nem compilação.
+
+    Arquivos com o mesmo blob em revisões diferentes são analisados uma única vez, de modo que percorrer
+    todos os commits entre duas releases só analisa os arquivos alterados.
+
+    Args:
+        revisions (list): Pares (nome, revisão), onde nome é a tag ou o nome usado nos relatórios.
+
+    Returns:
+        bool: False se output_dir for o diretório dos relatórios do CK (nada é gravado).
+    """
+    if is_ck_output_dir(output_dir):
+        print(f"Erro: {output_dir} contém os relatórios do CK; os CSVs aproximados os sobrescreveriam. Use outro diretório.")
+        return False
+    os.makedirs(output_dir, exist_ok=True)
+    scanned = {}  # {sha do blob: linhas}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for name, revision in revisions:
+            sources = list_sources(revision, repo_dir)
+            missing = sorted({blob_sha for blob_sha, _ in sources if blob_sha not in scanned})
+            contents = read_blobs(missing, repo_dir)
+            paths = {blob_sha: path for blob_sha, path in sources}
+            items = [(paths[blob_sha], contents[blob_sha]) for blob_sha in missing]
+            for blob_sha, rows in zip(missing, executor.map(_scan_item, items, chunksize=CHUNK_SIZE)):
+                scanned[blob_sha] = rows
+
+            safe_tag = name.replace("/", "_")
+            csv_path = os.path.join(output_dir, f"{safe_tag}_ck_metrics.csvclass.csv")
+            with atomic_write(csv_path, newline="", encoding="utf-8") as file:
+                writer = csv.DictWriter(file, fieldnames=CK_CLASS_COLUMNS)
+                writer.writeheader()
+                for blob_sha, path in sources:
+                    # O caminho é o da revisão atual (um blob igual pode ter outro caminho em outra revisão)
+                    writer.writerows({**row, "file": path} for row in scanned[blob_sha])
+            print(f"{name}: {len(sources)} arquivos ({len(missing)} analisados) -> {csv_path}")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Métricas de classe aproximadas (loc, métodos, campos, wmc) direto das fontes no git, sem a JVM.")
+    parser.add_argument("--range", nargs=2, metavar=("BASE", "ALVO"), help="Analisa todos os commits entre duas tags (ex.: rel/commons-lang-3.16.0 rel/commons-lang-3.17.0)")
+    parser.add_argument("--output-dir", default=QUICK_REPORTS_DIR, help="Diretório dos CSVs (não pode ser o diretório dos relatórios do CK)")
+    parser.add_argument("--workers", type=int, default=N_WORKERS, help="Número de processos")
+    args = parser.parse_args()
+
+    clone_repository()
+    if args.range:
+        try:
+            revisions = range_revisions(*args.range)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        revisions = [(tag, commit_sha) for tag, commit_sha in fetch_releases()]
+    scan_revisions(revisions, args.output_dir, workers=args.workers)
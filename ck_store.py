@@ -0,0 +1,262 @@
+import os
+import re
+import argparse
+
+import numpy as np
+import pandas as pd
+from common import REPO_DIR
+from releases import tag_version
+from worktrees import WORKTREES_DIR
+
+CK_REPORTS_DIR = "./ck_reports"  # Diretório com os CSVs gerados pelo CK
+STORE_DIR = "./ck_store"  # Diretório do armazenamento colunar (um arquivo por nível e release)
+CK_LEVELS = ["class", "method", "field", "variable"]
+SOURCE_KEY = "__source__"  # Tamanho e data de modificação do CSV de origem, para detectar partições desatualizadas
+COLUMN_PREFIX = "c_"  # Prefixo das colunas dentro do .npz (evita conflito de nomes como "file" com os argumentos do numpy)
+CODE_PREFIX = "k_"  # Prefixo das colunas gravadas como códigos do dicionário do nível
+INTERNED_COLUMNS = ["file", "class", "type", "method", "variable"]  # Textos com um dicionário compartilhado por todas as releases do nível
+STORE_FORMAT = 3  # Versão do formato das partições do CK (caminhos relativos, textos internados e inteiros compactos)
+DICTIONARY_ID_KEY = "__id__"  # Identificador do dicionário do nível, sorteado quando ele é criado (não muda com os acréscimos)
+
+REPORT_PATTERN = re.compile(r'^(?P<safe_tag>.+)_ck_metrics\.csv(?P<level>class|method|field|variable)\.csv$')
+VERSION_PATTERN = re.compile(r'commons-lang-(.+?)$')
+# Prefixo absoluto dos caminhos gerados pelo CK (o clone ou uma worktree de worker), removido na conversão
+REPO_ROOT_PATTERN = re.compile(rf'^.*?(?:{re.escape(REPO_DIR)}|{re.escape(WORKTREES_DIR)}[\\/][^\\/]+)[\\/]')
+
+_categories = {}  # Dicionários já carregados: {caminho: (mtime, identificador, {coluna: Index})}
+
+def release_from_tag(safe_tag):
+    """Extrai a versão (ex.: 3.17.0-RC1) do safe_tag de uma release."""
+    match = VERSION_PATTERN.search(safe_tag)
+    return match.group(1) if match else safe_tag
+
+def release_sort_key(safe_tag):
+    """Chave de ordenação de releases pela versão semântica (RCs antes da versão final)."""
+    version = tag_version(safe_tag)
+    return (version is None, version or tag_version("0"), safe_tag)
+
+def partition_path(level, safe_tag, store_dir=STORE_DIR):
+    """Caminho da partição de um nível/release no armazenamento."""
+    return os.path.join(store_dir, level, f"{safe_tag}.npz")
+
+def source_signature(*paths):
+    """Assinatura (tamanho e data de modificação) dos arquivos de origem de uma partição."""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature += [stat.st_size, stat.st_mtime_ns]
+    return np.array(signature, dtype=np.int64)
+
+def is_fresh(partition, source_signature):
+    """Indica se a partição existe e foi gerada a partir das mesmas versões dos arquivos de origem."""
+    if not os.path.exists(partition):
+        return False
+    with np.load(partition) as npz:
+        return SOURCE_KEY in npz.files and np.array_equal(npz[SOURCE_KEY], source_signature)
+
+def _column_array(series):
+    """Converte uma coluna do CSV em um array numpy sem objetos Python (textos viram unicode de tamanho fixo)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy()
+    return series.fillna("").to_numpy(dtype=str)
+
+def write_partition(df, partition, signature, interned=()):
+    """
+    Grava um DataFrame como partição colunar comprimida, de forma atômica.
+
+    As colunas em interned (categóricas com as categorias do dicionário do nível) são gravadas apenas como códigos.
+    """
+    columns = {}
+    for column in df.columns:
+        if column in interned:
+            columns[CODE_PREFIX + column] = df[column].cat.codes.to_numpy()
+        else:
+            columns[COLUMN_PREFIX + column] = _column_array(df[column])
+    columns[SOURCE_KEY] = signature
+
+    os.makedirs(os.path.dirname(partition), exist_ok=True)
+    tmp_path = partition + ".tmp.npz"
+    np.savez_compressed(tmp_path, **columns)
+    os.replace(tmp_path, partition)
+
+def csv_signature(csv_path, level, store_dir=STORE_DIR):
+    """
+    Assinatura de uma partição do CK: a versão do formato, o identificador do dicionário do nível e o tamanho e a data do CSV.
+
+    Como os códigos das colunas internadas só valem para o dicionário em que foram gravados, apagar ou recriar
+    o dicionário torna desatualizadas todas as partições do nível.
+    """
+    return np.concatenate([[STORE_FORMAT, dictionary_id(level, store_dir)], source_signature(csv_path)]).astype(np.int64)
+
+def relative_path(path):
+    """Caminho relativo à raiz do repositório analisado, com "/" como separador."""
+    return REPO_ROOT_PATTERN.sub("", path).replace("\\", "/")
+
+def dictionary_path(level, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"{level}.dictionary.npz")
+
+def load_categories(level, store_dir=STORE_DIR):
+    """
+    Dicionário dos textos internados de um nível: {coluna: Index}.
+
+    Os mesmos objetos Index são devolvidos enquanto o arquivo não muda, então as colunas
+    categóricas de todas as releases compartilham as categorias (e o pd.concat as mantém categóricas).
+    """
+    return _load_dictionary(level, store_dir)[1]
+
+def dictionary_id(level, store_dir=STORE_DIR):
+    """Identificador do dicionário de um nível (0 se ele ainda não existir)."""
+    return _load_dictionary(level, store_dir)[0]
+
+def _load_dictionary(level, store_dir):
+    path = dictionary_path(level, store_dir)
+    if not os.path.exists(path):
+        return 0, {}
+    mtime = os.stat(path).st_mtime_ns
+    cached = _categories.get(path)
+    if cached is None or cached[0] != mtime:
+        with np.load(path) as npz:
+            categories = {name[len(COLUMN_PREFIX):]: pd.Index(npz[name], dtype=object) for name in npz.files if name.startswith(COLUMN_PREFIX)}
+            cached = (mtime, int(npz[DICTIONARY_ID_KEY]) if DICTIONARY_ID_KEY in npz.files else 0, categories)
+        _categories[path] = cached
+    return cached[1:]
+
+def intern(df, level, store_dir=STORE_DIR):
+    """
+    Converte as colunas de texto em categóricas com as categorias do dicionário do nível.
+
+    Textos novos são acrescentados ao final do dicionário, então os códigos das partições já gravadas continuam válidos.
+
+    Returns:
+        list: Colunas internadas.
+    """
+    identifier, categories = _load_dictionary(level, store_dir)
+    categories = dict(categories)
+    interned = [column for column in INTERNED_COLUMNS if column in df.columns]
+    changed = False
+    for column in interned:
+        values = df[column].fillna("").astype(object)
+        known = categories.get(column, pd.Index([], dtype=object))
+        new_values = pd.unique(values[~values.isin(known)])
+        if len(new_values):
+            known = known.append(pd.Index(new_values, dtype=object))
+            categories[column] = known
+            changed = True
+        df[column] = pd.Categorical.from_codes(known.get_indexer(values), categories=known)
+
+    if changed:
+        path = dictionary_path(level, store_dir)
+        os.makedirs(store_dir, exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        arrays = {COLUMN_PREFIX + column: index.to_numpy(dtype=str) for column, index in categories.items()}
+        # Um dicionário novo (ou sem identificador) recebe um identificador novo, que invalida as partições antigas
+        arrays[DICTIONARY_ID_KEY] = np.int64(identifier or int.from_bytes(os.urandom(7), "little"))
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    return interned
+
+def compact_integers(df):
+    """Reduz cada coluna inteira ao menor tipo que comporta seus valores."""
+    for column in df.columns:
+        if pd.api.types.is_integer_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+def ingest_file(csv_path, level, safe_tag, store_dir=STORE_DIR):
+    """Converte um CSV do CK em uma partição colunar comprimida (caminhos relativos, textos internados e inteiros compactos)."""
+    df = pd.read_csv(csv_path)
+    if "file" in df.columns:
+        df["file"] = df["file"].fillna("").map(relative_path)
+    interned = intern(df, level, store_dir)
+    # A assinatura é calculada depois do intern, que pode ter criado o dicionário
+    write_partition(compact_integers(df), partition_path(level, safe_tag, store_dir), csv_signature(csv_path, level, store_dir), interned)
+
+def ingest(reports_dir=CK_REPORTS_DIR, store_dir=STORE_DIR, levels=CK_LEVELS):
+    """
+    Converte os CSVs do CK em partições colunares por nível e release.
+
+    Apenas os CSVs novos ou alterados desde a última conversão são relidos.
+
+    Returns:
+        int: Número de partições (re)geradas.
+    """
+    converted = 0
+    for filename in sorted(os.listdir(reports_dir)):
+        match = REPORT_PATTERN.match(filename)
+        if not match or match.group("level") not in levels:
+            continue
+
+        csv_path = os.path.join(reports_dir, filename)
+        level, safe_tag = match.group("level"), match.group("safe_tag")
+        if is_fresh(partition_path(level, safe_tag, store_dir), csv_signature(csv_path, level, store_dir)):
+            continue
+
+        print(f"Convertendo arquivo: {filename}")
+        ingest_file(csv_path, level, safe_tag, store_dir)
+        converted += 1
+    return converted
+
+def list_releases(level="class", store_dir=STORE_DIR):
+    """Lista os safe_tags das releases disponíveis em um nível, em ordem de versão."""
+    level_dir = os.path.join(store_dir, level)
+    if not os.path.exists(level_dir):
+        return []
+    safe_tags = [filename[:-len(".npz")] for filename in os.listdir(level_dir) if filename.endswith(".npz")]
+    return sorted(safe_tags, key=release_sort_key)
+
+def load_partition(level, safe_tag, columns=None, store_dir=STORE_DIR):
+    """
+    Carrega uma partição lendo do disco apenas as colunas pedidas.
+
+    Returns:
+        DataFrame: Colunas da partição, ou None se alguma coluna pedida não existir nela.
+    """
+    with np.load(partition_path(level, safe_tag, store_dir)) as npz:
+        keys = {name[len(COLUMN_PREFIX):]: name for name in npz.files if name.startswith((COLUMN_PREFIX, CODE_PREFIX))}
+        selected = list(keys) if columns is None else list(columns)
+        if any(column not in keys for column in selected):
+            return None
+
+        categories = load_categories(level, store_dir) if any(keys[column].startswith(CODE_PREFIX) for column in selected) else {}
+        data = {}
+        for column in selected:
+            if keys[column].startswith(CODE_PREFIX):
+                data[column] = pd.Categorical.from_codes(npz[keys[column]], categories=categories[column])
+            else:
+                data[column] = npz[keys[column]]
+        return pd.DataFrame(data)
+
+def load(level="class", columns=None, releases=None, store_dir=STORE_DIR):
+    """
+    Carrega um nível do armazenamento com uma coluna Release (versão extraída do nome da tag).
+
+    Args:
+        level (str): Nível do CK (class, method, field ou variable).
+        columns (list): Colunas a carregar (None carrega todas).
+        releases (list): safe_tags das releases a carregar (None carrega todas).
+
+    Returns:
+        DataFrame: Dados concatenados de todas as releases selecionadas (vazio se não houver dados).
+    """
+    frames = []
+    for safe_tag in list_releases(level, store_dir):
+        if releases is not None and safe_tag not in releases:
+            continue
+        df = load_partition(level, safe_tag, columns, store_dir)
+        if df is not None:
+            df["Release"] = release_from_tag(safe_tag)
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=list(columns or []) + ["Release"])
+    return pd.concat(frames, ignore_index=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte os CSVs do CK em um armazenamento colunar por nível e release.")
+    parser.add_argument("--levels", default=",".join(CK_LEVELS), help="Níveis a converter, separados por vírgula")
+    args = parser.parse_args()
+
+    converted = ingest(levels=[level.strip() for level in args.levels.split(",")])
+    print(f"{converted} partições convertidas.")
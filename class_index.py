@@ -0,0 +1,166 @@
+import os
+import argparse
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import ck_store
+import jacoco_stream
+import bug_fingerprints
+from spotbugs_html import CATEGORY_NAMES
+from spotbugs_stream import iter_bug_instances
+
+SPOTBUGS_REPORTS_DIR = "./spotbugs_reports"
+INDEX_DIR = "./class_index"  # Índice por (release, classe) no mesmo formato do ck_store
+INDEX_LEVEL = "classes"
+CK_METRICS = ["wmc", "dit", "noc", "cbo", "lcom*", "rfc", "loc"]
+BUG_CATEGORIES = sorted(CATEGORY_NAMES)
+# Faixas de rank do SpotBugs (1 = mais grave)
+RANK_BUCKETS = [("scariest", 1, 4), ("scary", 5, 9), ("troubling", 10, 14), ("concern", 15, 20)]
+COVERAGE_COUNTERS = ["LINE", "BRANCH"]
+INDEX_FORMAT = 2  # Versão das partições do índice (2: bugs por classe exata e new_bugs pelos fingerprints)
+
+def spotbugs_report_path(safe_tag):
+    return os.path.join(SPOTBUGS_REPORTS_DIR, f"{safe_tag}_spotbugs.xml")
+
+def source_paths(safe_tag):
+    """Arquivos de origem (existentes) de uma release: partição do CK, XML do SpotBugs e tabela do JaCoCo."""
+    paths = [
+        ck_store.partition_path("class", safe_tag),
+        spotbugs_report_path(safe_tag),
+        ck_store.partition_path(jacoco_stream.COVERAGE_LEVEL, safe_tag, jacoco_stream.JACOCO_STORE_DIR),
+    ]
+    return [path for path in paths if os.path.exists(path)]
+
+def bug_columns():
+    return ["bugs_total"] + [f"bugs_{category}" for category in BUG_CATEGORIES] + [f"bugs_{bucket}" for bucket, _, _ in RANK_BUCKETS]
+
+def bug_counts(xml_path):
+    """Conta os bugs do SpotBugs por classe (com as classes internas, ex.: pkg.X$Interna), categoria e faixa de rank."""
+    counts = Counter()
+    for _, category, _, rank, class_name, _ in iter_bug_instances(xml_path):
+        counts[(class_name, "bugs_total")] += 1
+        counts[(class_name, f"bugs_{category}")] += 1
+        for bucket, low, high in RANK_BUCKETS:
+            if low <= rank <= high:
+                counts[(class_name, f"bugs_{bucket}")] += 1
+
+    if not counts:
+        return pd.DataFrame(columns=["class"] + bug_columns())
+    df = pd.Series(counts).unstack(fill_value=0).reindex(columns=bug_columns(), fill_value=0)
+    return df.rename_axis("class").reset_index()
+
+def class_coverage(safe_tag):
+    """Cobertura de linhas e branches (%) por classe, a partir da tabela do JaCoCo da release."""
+    columns = ["Level", "Class", "Counter", "Missed", "Covered"]
+    partition = ck_store.partition_path(jacoco_stream.COVERAGE_LEVEL, safe_tag, jacoco_stream.JACOCO_STORE_DIR)
+    if not os.path.exists(partition):
+        return pd.DataFrame(columns=["class"] + [f"{counter.lower()}_coverage" for counter in COVERAGE_COUNTERS])
+
+    df = ck_store.load_partition(jacoco_stream.COVERAGE_LEVEL, safe_tag, columns, jacoco_stream.JACOCO_STORE_DIR)
+    df = jacoco_stream.coverage(df[(df["Level"] == "class") & df["Counter"].isin(COVERAGE_COUNTERS)])
+    df = df.pivot_table(index="Class", columns="Counter", values="Coverage", aggfunc="first")
+    df = df.reindex(columns=COVERAGE_COUNTERS)
+    df.columns = [f"{counter.lower()}_coverage" for counter in df.columns]
+    return df.rename_axis("class").reset_index()
+
+def new_bug_counts(safe_tag, previous_tag):
+    """
+    Bugs introduzidos em cada classe: fingerprints da release que não existem na release anterior.
+
+    Uma correção e um bug novo na mesma classe contam como 1 bug novo (e não como saldo 0).
+    """
+    introduced = bug_fingerprints.compare(previous_tag, safe_tag, bug_fingerprints.STORE_DIR)["introduced"]
+    return introduced.groupby(introduced["class"].astype(str)).size()
+
+def build_release(safe_tag, previous_tag=None):
+    """
+    Junta, por classe, as métricas do CK, os bugs do SpotBugs e a cobertura do JaCoCo de uma release.
+
+    Args:
+        safe_tag (str): Release a indexar.
+        previous_tag (str): Última release anterior com relatório do SpotBugs, para calcular new_bugs
+            (sem ela, ou sem relatório da release atual, new_bugs fica 0).
+    """
+    ck_partition = ck_store.partition_path("class", safe_tag)
+    if os.path.exists(ck_partition):
+        ck = ck_store.load_partition("class", safe_tag, ["file", "class"] + CK_METRICS).drop_duplicates("class")
+        ck["source"] = np.where(ck["file"].str.contains(r"src[\\/]test[\\/]", regex=True), "test", "main")
+        ck = ck.drop(columns="file")
+    else:
+        ck = pd.DataFrame(columns=["class", "source"] + CK_METRICS)
+
+    xml_path = spotbugs_report_path(safe_tag)
+    bugs = bug_counts(xml_path) if os.path.exists(xml_path) else pd.DataFrame(columns=["class"] + bug_columns())
+    df = ck.merge(bugs, on="class", how="outer").merge(class_coverage(safe_tag), on="class", how="outer")
+
+    numeric_columns = CK_METRICS + [f"{counter.lower()}_coverage" for counter in COVERAGE_COUNTERS]
+    df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric).astype("float64")
+    df[bug_columns()] = df[bug_columns()].fillna(0).astype("int32")
+    if previous_tag is not None and os.path.exists(xml_path):
+        df["new_bugs"] = df["class"].map(new_bug_counts(safe_tag, previous_tag)).fillna(0).astype("int32")
+    else:
+        df["new_bugs"] = np.zeros(len(df), dtype="int32")
+    df["source"] = df["source"].fillna("main")
+    return df
+
+def release_tags():
+    """Releases com algum relatório (CK, SpotBugs ou JaCoCo), em ordem de versão."""
+    safe_tags = set(ck_store.list_releases("class"))
+    safe_tags |= set(ck_store.list_releases(jacoco_stream.COVERAGE_LEVEL, jacoco_stream.JACOCO_STORE_DIR))
+    if os.path.exists(SPOTBUGS_REPORTS_DIR):
+        safe_tags |= {filename[:-len("_spotbugs.xml")] for filename in os.listdir(SPOTBUGS_REPORTS_DIR) if filename.endswith("_spotbugs.xml")}
+    return sorted(safe_tags, key=ck_store.release_sort_key)
+
+def update():
+    """
+    Atualiza o índice com as releases cujos relatórios são novos ou mudaram.
+
+    A assinatura de cada release inclui o XML do SpotBugs da última release anterior com relatório,
+    com o qual os fingerprints dos bugs são comparados para calcular o new_bugs.
+
+    Returns:
+        int: Número de releases (re)indexadas.
+    """
+    ck_store.ingest(levels=["class"])
+    jacoco_stream.ingest()
+    if os.path.exists(SPOTBUGS_REPORTS_DIR):
+        bug_fingerprints.ingest(SPOTBUGS_REPORTS_DIR)
+
+    updated = 0
+    previous = None  # Última release com relatório do SpotBugs
+    for safe_tag in release_tags():
+        paths = source_paths(safe_tag)
+        if previous is not None:
+            paths.append(spotbugs_report_path(previous))
+        signature = np.concatenate([[INDEX_FORMAT], ck_store.source_signature(*paths)]).astype(np.int64)
+        partition = ck_store.partition_path(INDEX_LEVEL, safe_tag, INDEX_DIR)
+
+        if not ck_store.is_fresh(partition, signature):
+            print(f"Indexando release {safe_tag}")
+            ck_store.write_partition(build_release(safe_tag, previous), partition, signature)
+            updated += 1
+        if os.path.exists(spotbugs_report_path(safe_tag)):
+            previous = safe_tag
+    return updated
+
+def load_index(columns=None, releases=None):
+    """Carrega o índice de todas as releases (ou apenas das colunas/releases pedidas)."""
+    return ck_store.load(INDEX_LEVEL, columns=columns, releases=releases, store_dir=INDEX_DIR)
+
+def query(expression, columns=None):
+    """
+    Consulta o índice de todas as releases com uma expressão do pandas, por exemplo:
+    "wmc > 50 and line_coverage < 60 and new_bugs > 0".
+    """
+    return load_index(columns).query(expression)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice por release e classe com métricas CK, bugs do SpotBugs e cobertura do JaCoCo.")
+    parser.add_argument("query", nargs="?", help='Consulta, ex.: "wmc > 50 and line_coverage < 60 and new_bugs > 0"')
+    args = parser.parse_args()
+
+    print(f"{update()} releases indexadas.")
+    if args.query:
+        print(query(args.query).to_string(index=False))
@@ -0,0 +1,43 @@
+from array import array
+
+import pandas as pd
+
+# Tipos do pandas correspondentes aos typecodes de array usados nas colunas inteiras
+INT_DTYPES = {"b": "int8", "h": "int16", "i": "int32", "q": "int64"}
+
+class ColumnBuffer:
+    """
+    Buffer colunar tipado para leitura incremental de relatórios.
+
+    Colunas de texto são codificadas em dicionário (um código int32 por linha) e colunas
+    inteiras ficam em arrays compactos, sem um objeto Python por registro.
+    """
+
+    STRING_COLUMNS = ()
+    INT_COLUMNS = ()
+    INT_TYPECODE = "i"
+
+    def __init__(self):
+        self.codes = {column: array("i") for column in self.STRING_COLUMNS}
+        self.dictionaries = {column: {} for column in self.STRING_COLUMNS}
+        self.ints = {column: array(self.INT_TYPECODE) for column in self.INT_COLUMNS}
+
+    def __len__(self):
+        return len(self.codes[self.STRING_COLUMNS[0]])
+
+    def _encode(self, column, value):
+        dictionary = self.dictionaries[column]
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+        self.codes[column].append(code)
+
+    def to_dataframe(self):
+        """Converte o buffer em um DataFrame com colunas categóricas e inteiros compactos."""
+        data = {}
+        for column in self.STRING_COLUMNS:
+            categories = list(self.dictionaries[column])
+            data[column] = pd.Categorical.from_codes(self.codes[column], categories=categories)
+        for column in self.INT_COLUMNS:
+            data[column] = pd.array(self.ints[column], dtype=INT_DTYPES[self.INT_TYPECODE])
+        return pd.DataFrame(data)
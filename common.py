@@ -0,0 +1,79 @@
+import os
+import subprocess
+import releases
+import tracing
+from build import BuildExecutor
+
+# Configurações compartilhadas pelos coletores (ck.py, bugs.py, tests.py e pipeline.py)
+GITHUB_REPO_URL = "https://github.com/apache/commons-lang.git"  # Repositório a ser analisado
+GITHUB_API_URL = "https://api.github.com/repos/apache/commons-lang/tags"
+REPO_DIR = "apache_commons_repo"  # Diretório onde será clonado o repositório de análise
+MAVEN_PATH = "C:/apache-maven-3.9.9/bin/mvn.cmd"  # Caminho do Maven
+MAVEN_DAEMON_PATH = "auto"  # Caminho do Maven Daemon (mvnd), que mantém o build aquecido entre as releases; "auto" procura no PATH, None desativa
+MAVEN_OFFLINE = False  # Builds offline, usando apenas o repositório local (ver build.prefetch_dependencies)
+MAVEN_LOCAL_REPO = None  # Repositório Maven local compartilhado por todos os builds (ex.: "maven_repo")
+N_RELEASES = 20  # Número de releases que serão analisadas
+RELEASE_PATTERN = None  # Expressão regular para filtrar as tags (ex.: "^rel/" para ignorar os RCs e tags antigas)
+INCLUDE_RC = True  # Se False, descarta os release candidates
+
+# Executor de build compartilhado por todas as releases da execução
+build_executor = BuildExecutor(MAVEN_PATH, MAVEN_DAEMON_PATH, MAVEN_OFFLINE, MAVEN_LOCAL_REPO)
+
+def fetch_releases(limit=N_RELEASES, pattern=RELEASE_PATTERN, include_rc=INCLUDE_RC):
+    """
+    Lista as últimas releases (mais recentes primeiro) a partir das tags do clone local, sem acesso à rede.
+
+    Sem clone local nem cache de tags, o repositório é clonado uma vez. Para buscar tags novas
+    publicadas depois do clone, use "python releases.py --fetch".
+    """
+    tags = releases.resolve_tags(REPO_DIR)
+    if tags is None:
+        clone_repository()
+        tags = releases.resolve_tags(REPO_DIR)
+    return releases.select_releases(tags, limit, pattern, include_rc)
+
+def clone_repository(repo_dir=REPO_DIR):
+    """Clona o repositório se ele ainda não estiver clonado."""
+    if not os.path.exists(repo_dir):
+        print("Clonando o repositório...")
+        tracing.run(["git", "clone", GITHUB_REPO_URL, repo_dir], "clone", check=True)
+
+def checkout_release(commit_sha, repo_dir=REPO_DIR, release=""):
+    """Faz o checkout de um commit específico no repositório"""
+    tracing.run(["git", "checkout", commit_sha], "checkout", release, cwd=repo_dir, check=True)
+
+def commit_range(base_tag, target_tag, repo_dir=REPO_DIR):
+    """
+    Commits da primeira linha de parentesco entre as duas tags, do mais antigo ao mais novo.
+
+    Returns:
+        list: SHAs de base_tag (inclusive) até target_tag (inclusive).
+    """
+    def rev_parse(revision):
+        return subprocess.run(["git", "rev-parse", f"{revision}^{{commit}}"], cwd=repo_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+
+    base_sha = rev_parse(base_tag)
+    result = subprocess.run(["git", "rev-list", "--first-parent", "--reverse", f"{base_sha}..{rev_parse(target_tag)}"],
+                            cwd=repo_dir, capture_output=True, text=True, check=True)
+    return [base_sha] + result.stdout.split()
+
+def compile_code(repo_dir=REPO_DIR, release=""):
+    """Compila o código Java da release usando Maven."""
+    print("Compilando o código...")
+
+    # Executa o Maven no diretório do repositório (o clean é omitido se a árvore de fontes não mudou)
+    result = build_executor.compile(repo_dir, release)
+
+    if result.returncode == 0:
+        print("Compilação concluída com sucesso.")
+        if os.path.exists(os.path.join(repo_dir, "target/classes")):
+            return True
+        else:
+            print("Erro: O diretório target/classes não foi gerado após a compilação.")
+            return False
+    else:
+        print("Erro na compilação:")
+        print(result.stdout)
+        print(result.stderr)
+        return False
@@ -0,0 +1,187 @@
+import json
+import heapq
+import hashlib
+import argparse
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+import ck_store
+import releases
+from common import REPO_DIR
+
+HEALTH_LEVEL = "class_health"  # Nível do armazenamento com a saúde de cada classe por release
+# Pesos das métricas na saúde da classe (pesos iguais reproduzem o average_health do ck-graph2.py)
+HEALTH_WEIGHTS = {"wmc": 1.0, "dit": 1.0, "noc": 1.0, "cbo": 1.0, "lcom*": 1.0, "rfc": 1.0, "loc": 1.0}
+INVERTED_METRICS = ["wmc", "dit", "cbo", "lcom*"]  # Invertidas (1 / (x + 1)), como no ck-graph2.py
+CHURN_WEIGHT = 1.0  # Peso do churn no ranking: chave * (1 + CHURN_WEIGHT * log(1 + linhas alteradas)); 0 ignora o churn
+TOP_K = 20
+
+def config_signature(weights=HEALTH_WEIGHTS):
+    """Inteiro que identifica os pesos usados, para recalcular as partições quando eles mudam."""
+    digest = hashlib.blake2b(json.dumps(weights, sort_keys=True).encode(), digest_size=7).digest()
+    return int.from_bytes(digest, "little")
+
+def health_scores(df, weights=HEALTH_WEIGHTS):
+    """
+    Saúde ponderada de cada classe, calculada de forma vetorizada sobre todas as linhas.
+
+    Segue o ck-graph2.py: quanto maior o valor, pior a saúde. Métricas indefinidas (NaN, ex.: lcom*)
+    ficam fora da média da classe.
+
+    Returns:
+        ndarray: Uma saúde por linha de df.
+    """
+    metrics = list(weights)
+    values = df[metrics].to_numpy(dtype="float64")
+    inverted = [metrics.index(metric) for metric in INVERTED_METRICS if metric in weights]
+    values[:, inverted] = 1 / (values[:, inverted] + 1)
+    weight_row = np.array([weights[metric] for metric in metrics])
+    present = ~np.isnan(values)
+    total_weight = (present * weight_row).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(present, values, 0.0) @ weight_row / total_weight
+
+def release_shas(repo_dir=REPO_DIR):
+    """{safe_tag: sha} das tags do clone local (ou do cache de tags), vazio sem nenhum dos dois."""
+    tags = releases.resolve_tags(repo_dir) or []
+    return {tag.replace("/", "_"): sha for tag, sha in tags}
+
+def file_churn(previous_sha, sha, repo_dir=REPO_DIR):
+    """Linhas adicionadas + removidas por arquivo entre dois commits (git diff --numstat)."""
+    result = subprocess.run(["git", "diff", "--numstat", "--no-renames", previous_sha, sha, "--", "src"],
+                            cwd=repo_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Erro ao calcular o churn entre {previous_sha[:12]} e {sha[:12]}: {result.stderr.strip()}")
+        return None
+    churn = {}
+    for line in result.stdout.splitlines():
+        added, deleted, path = line.split("\t", 2)
+        # Arquivos binários aparecem com "-" no lugar das contagens
+        churn[path] = (int(added) if added != "-" else 0) + (int(deleted) if deleted != "-" else 0)
+    return churn
+
+def release_health(safe_tag, previous_tag, churn=None, weights=HEALTH_WEIGHTS):
+    """
+    Saúde das classes de uma release, variação em relação à release anterior e churn do arquivo da classe.
+
+    Args:
+        churn (dict): Linhas alteradas por arquivo desde a release anterior (ver file_churn), ou None se desconhecido.
+
+    Returns:
+        DataFrame: Colunas class, file, health, health_delta (NaN para classes novas) e churn (NaN sem o churn).
+    """
+    columns = ["file", "class"] + list(weights)
+    df = ck_store.load_partition("class", safe_tag, columns).drop_duplicates("class")
+    result = pd.DataFrame({"class": df["class"].astype(str), "file": df["file"].astype(str), "health": health_scores(df, weights)})
+
+    result["health_delta"] = np.nan
+    if previous_tag is not None:
+        previous = ck_store.load_partition("class", previous_tag, columns).drop_duplicates("class")
+        previous_health = pd.Series(health_scores(previous, weights), index=previous["class"].astype(str))
+        result["health_delta"] = result["health"] - result["class"].map(previous_health).to_numpy(dtype="float64")
+
+    result["churn"] = np.nan
+    if churn is not None:
+        result["churn"] = result["file"].map(churn).fillna(0).to_numpy(dtype="float64")
+    return result
+
+def update(weights=HEALTH_WEIGHTS, repo_dir=REPO_DIR):
+    """
+    Atualiza a saúde por classe das releases novas ou alteradas (e das que vêm logo depois delas).
+
+    Returns:
+        int: Número de releases recalculadas.
+    """
+    safe_tags = ck_store.list_releases("class")
+    shas = release_shas(repo_dir)
+    config = config_signature(weights)
+    updated = 0
+    for previous, current in zip([None] + safe_tags, safe_tags):
+        paths = [ck_store.partition_path("class", current)]
+        if previous is not None:
+            paths.append(ck_store.partition_path("class", previous))
+        sources = ck_store.source_signature(*paths)
+
+        def signature(has_churn):
+            return np.concatenate([[config, has_churn], sources]).astype(np.int64)
+
+        # O churn só entra quando os SHAs das duas tags são conhecidos; uma partição gravada sem o churn
+        # (ex.: git diff falhou) não é considerada atualizada e é recalculada na próxima execução
+        churn_known = previous in shas and current in shas
+        partition = ck_store.partition_path(HEALTH_LEVEL, current)
+        if ck_store.is_fresh(partition, signature(int(churn_known))):
+            continue
+        print(f"Calculando a saúde das classes para {current}")
+        churn = file_churn(shas[previous], shas[current], repo_dir) if churn_known else None
+        ck_store.write_partition(release_health(current, previous, churn, weights), partition, signature(int(churn is not None)))
+        updated += 1
+    return updated
+
+def ranking_key(values, churn, churn_weight=CHURN_WEIGHT):
+    """Chave de ordenação combinada com o churn: classes ruins e muito alteradas sobem no ranking."""
+    return values * (1 + churn_weight * np.log1p(np.nan_to_num(churn)))
+
+def push_top(heap, keys, rows, k):
+    """Mantém em heap (mínimo) apenas as k maiores chaves, considerando antes só as k maiores da partição."""
+    valid = np.flatnonzero(~np.isnan(keys))
+    if len(valid) > k:
+        valid = valid[np.argpartition(keys[valid], -k)[-k:]]
+    for index in valid:
+        item = (float(keys[index]), rows[index])
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+def hotspots(k=TOP_K, release_tags=None, churn_weight=CHURN_WEIGHT):
+    """
+    Top-k das classes com pior saúde e das que mais pioraram, combinadas com o churn.
+
+    Cada partição é lida uma vez e apenas k candidatos por ranking ficam em memória.
+
+    Args:
+        release_tags (list): safe_tags consideradas (padrão: apenas a release mais recente).
+
+    Returns:
+        dict: DataFrames "worst" e "degrading", do maior para o menor valor da chave.
+    """
+    safe_tags = ck_store.list_releases(HEALTH_LEVEL)
+    if release_tags is None:
+        release_tags = safe_tags[-1:]
+    worst, degrading = [], []
+    for safe_tag in release_tags:
+        df = ck_store.load_partition(HEALTH_LEVEL, safe_tag)
+        df.insert(0, "Release", ck_store.release_from_tag(safe_tag))
+        rows = list(df.itertuples(index=False, name=None))
+        churn = df["churn"].to_numpy()
+        push_top(worst, ranking_key(df["health"].to_numpy(), churn, churn_weight), rows, k)
+        delta = df["health_delta"].to_numpy()
+        # Só entram no ranking de piora as classes cuja saúde piorou em relação à release anterior
+        push_top(degrading, np.where(delta > 0, ranking_key(delta, churn, churn_weight), np.nan), rows, k)
+
+    def to_frame(heap):
+        ranked = sorted(heap, key=lambda item: item[0], reverse=True)
+        frame = pd.DataFrame([row for _, row in ranked], columns=["Release", "class", "file", "health", "health_delta", "churn"])
+        frame.insert(0, "score", [key for key, _ in ranked])
+        return frame
+
+    return {"worst": to_frame(worst), "degrading": to_frame(degrading)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ranking das classes com pior saúde e das que mais pioraram, combinado com o churn do git.")
+    parser.add_argument("-k", type=int, default=TOP_K, help="Tamanho de cada ranking")
+    parser.add_argument("--all", action="store_true", help="Considera todas as releases (padrão: apenas a mais recente)")
+    parser.add_argument("--churn-weight", type=float, default=CHURN_WEIGHT, help="Peso do churn no ranking (0 ignora o churn)")
+    args = parser.parse_args()
+
+    ck_store.ingest(levels=["class"])
+    print(f"{update()} releases recalculadas.")
+    tags = ck_store.list_releases(HEALTH_LEVEL) if args.all else None
+    rankings = hotspots(args.k, tags, args.churn_weight)
+    pd.set_option("display.width", 200)
+    print("\nClasses com pior saúde:")
+    print(rankings["worst"].to_string(index=False))
+    print("\nClasses que mais pioraram em relação à release anterior:")
+    print(rankings["degrading"].to_string(index=False))
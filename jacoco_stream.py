@@ -0,0 +1,156 @@
+import os
+import re
+import argparse
+import xml.etree.ElementTree as ET
+
+import ck_store
+from columnar import ColumnBuffer
+
+COVERAGE_BY_RELEASE_DIR = os.path.join("jacoco_reports", "jacoco_coverage_by_release")
+JACOCO_STORE_DIR = "./jacoco_store"  # Tabelas de cobertura por release (mesmo formato do ck_store)
+COVERAGE_LEVEL = "counters"
+LEVELS = ("report", "package", "class", "method")  # Níveis cujos contadores são extraídos
+REPORT_PATTERN = re.compile(r'^jacoco_(?P<safe_tag>.+)\.xml$')
+
+class CoverageBuffer(ColumnBuffer):
+    """Contadores do JaCoCo em formato colunar: uma linha por contador de relatório, pacote, classe ou método."""
+
+    STRING_COLUMNS = ("Level", "Package", "Class", "Method", "Counter")
+    INT_COLUMNS = ("Missed", "Covered")
+    INT_TYPECODE = "i"
+
+    def append(self, level, package, class_name, method, counter, missed, covered):
+        """Adiciona um contador ao buffer."""
+        self._encode("Level", level)
+        self._encode("Package", package)
+        self._encode("Class", class_name)
+        self._encode("Method", method)
+        self._encode("Counter", counter)
+        self.ints["Missed"].append(missed)
+        self.ints["Covered"].append(covered)
+
+def iter_counters(file_path):
+    """
+    Percorre um jacoco.xml de forma incremental, gerando uma tupla
+    (level, package, class, method, counter, missed, covered) por contador.
+
+    Os contadores de sourcefile e as linhas (line) são ignorados. Cada elemento é removido
+    da árvore ao terminar, então a memória não cresce com o tamanho do relatório.
+    """
+    stack = []
+    names = {"package": "", "class": "", "method": ""}
+    for event, elem in ET.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == "package":
+                names["package"] = elem.get("name", "").replace("/", ".")
+            elif elem.tag == "class":
+                names["class"] = elem.get("name", "").replace("/", ".")
+            elif elem.tag == "method":
+                names["method"] = elem.get("name", "") + elem.get("desc", "")
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+        if elem.tag == "counter" and parent is not None and parent.tag in LEVELS:
+            level = parent.tag
+            yield (
+                level,
+                names["package"] if level != "report" else "",
+                names["class"] if level in ("class", "method") else "",
+                names["method"] if level == "method" else "",
+                elem.get("type"),
+                int(elem.get("missed", 0)),
+                int(elem.get("covered", 0)),
+            )
+
+        if elem.tag == "method":
+            names["method"] = ""
+        elif elem.tag == "class":
+            names["class"] = ""
+        elif elem.tag == "package":
+            names["package"] = ""
+
+        if parent is not None:
+            parent.remove(elem)
+
+def read_coverage(file_path):
+    """Lê todos os contadores de um jacoco.xml para um DataFrame colunar."""
+    buffer = CoverageBuffer()
+    for record in iter_counters(file_path):
+        buffer.append(*record)
+    return buffer.to_dataframe()
+
+def report_metrics(df):
+    """
+    Extrai os contadores do nível do relatório (totais do projeto) no formato usado pelo jacoco_metrics.csv.
+
+    Returns:
+        dict: {tipo: {"covered", "missed", "total", "coverage"}}
+    """
+    metrics = {}
+    for row in df[df["Level"] == "report"].itertuples():
+        total = row.Covered + row.Missed
+        metrics[row.Counter] = {
+            "covered": int(row.Covered),
+            "missed": int(row.Missed),
+            "total": int(total),
+            "coverage": (row.Covered / total) * 100 if total > 0 else 0,
+        }
+    return metrics
+
+def ingest_file(file_path, safe_tag, store_dir=JACOCO_STORE_DIR):
+    """Grava a tabela de contadores de um relatório como partição da release."""
+    df = read_coverage(file_path)
+    # Categorias viram texto de tamanho fixo na partição; os contadores mantêm o tipo int32
+    ck_store.write_partition(df, ck_store.partition_path(COVERAGE_LEVEL, safe_tag, store_dir), ck_store.source_signature(file_path))
+    return df
+
+def ingest(reports_dir=COVERAGE_BY_RELEASE_DIR, store_dir=JACOCO_STORE_DIR):
+    """
+    Converte os jacoco_<release>.xml novos ou alterados em tabelas de contadores por release.
+
+    Returns:
+        int: Número de releases (re)convertidas.
+    """
+    converted = 0
+    for filename in sorted(os.listdir(reports_dir)):
+        match = REPORT_PATTERN.match(filename)
+        if not match:
+            continue
+        file_path = os.path.join(reports_dir, filename)
+        partition = ck_store.partition_path(COVERAGE_LEVEL, match.group("safe_tag"), store_dir)
+        if ck_store.is_fresh(partition, ck_store.source_signature(file_path)):
+            continue
+        print(f"Convertendo arquivo: {filename}")
+        ingest_file(file_path, match.group("safe_tag"), store_dir)
+        converted += 1
+    return converted
+
+def load_coverage(level=None, columns=None, releases=None, store_dir=JACOCO_STORE_DIR):
+    """Carrega os contadores de cobertura de todas as releases (opcionalmente de um único nível)."""
+    df = ck_store.load(COVERAGE_LEVEL, columns=columns, releases=releases, store_dir=store_dir)
+    if level is not None:
+        df = df[df["Level"] == level]
+    return df.reset_index(drop=True)
+
+def coverage(df):
+    """Adiciona ao DataFrame a coluna Coverage (%) a partir de Missed e Covered."""
+    total = df["Missed"] + df["Covered"]
+    return df.assign(Coverage=(df["Covered"] / total.where(total > 0)) * 100)
+
+def class_trend(class_name, counter="LINE", store_dir=JACOCO_STORE_DIR):
+    """Evolução da cobertura de uma classe (nome completo, ex.: org.apache.commons.lang3.StringUtils) entre as releases."""
+    df = load_coverage("class", ["Level", "Class", "Counter", "Missed", "Covered"], store_dir=store_dir)
+    df = df[(df["Class"] == class_name) & (df["Counter"] == counter)]
+    return coverage(df)[["Release", "Missed", "Covered", "Coverage"]]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte os relatórios do JaCoCo em tabelas de cobertura por release.")
+    parser.add_argument("--class-name", help="Mostra a evolução da cobertura de uma classe")
+    parser.add_argument("--counter", default="LINE", help="Tipo de contador (LINE, BRANCH, INSTRUCTION, ...)")
+    args = parser.parse_args()
+
+    print(f"{ingest()} releases convertidas.")
+    if args.class_name:
+        print(class_trend(args.class_name, args.counter).to_string(index=False))
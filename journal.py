@@ -0,0 +1,111 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+
+JOURNAL_PATH = "pipeline_journal.jsonl"  # Estágios concluídos por release, com os checksums dos relatórios gerados
+CHUNK_SIZE = 1 << 20
+
+_write_lock = threading.Lock()
+
+def file_checksum(path):
+    """SHA-256 do conteúdo de um arquivo."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+@contextmanager
+def atomic_write(path, mode="w", **kwargs):
+    """
+    Abre um arquivo temporário ao lado de path e o renomeia para path só ao final do bloco.
+
+    Uma interrupção no meio da escrita nunca deixa um arquivo parcial em path.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, mode, **kwargs) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def atomic_copy(source, target):
+    """
+    Copia source para target (com a data de modificação), substituindo-o de forma atômica.
+
+    Não usa hardlinks: o CK e o SpotBugs reescrevem os relatórios no lugar, e um link alteraria também a origem.
+    """
+    tmp_path = f"{target}.tmp"
+    shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+def load(journal_path=JOURNAL_PATH):
+    """
+    Lê o journal. Para cada (release, estágio) vale o último registro.
+
+    Returns:
+        dict: {(release, estágio): registro}
+    """
+    entries = {}
+    if not os.path.exists(journal_path):
+        return entries
+    with open(journal_path, encoding="utf-8") as journal_file:
+        for line in journal_file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Última linha incompleta de uma execução interrompida
+            entries[(entry["release"], entry["stage"])] = entry
+    return entries
+
+def record_stage(release, commit_sha, stage, config, paths, data=None, journal_path=JOURNAL_PATH):
+    """Registra no journal (de forma durável) que um estágio de uma release terminou, com os checksums dos relatórios."""
+    outputs = {path: file_checksum(path) for path in paths if os.path.exists(path)}
+    entry = {"release": release, "commit": commit_sha, "stage": stage, "config": config, "outputs": outputs, "data": data}
+    with _write_lock, open(journal_path, "a", encoding="utf-8") as journal_file:
+        journal_file.write(json.dumps(entry) + "\n")
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+def completed_stage(entries, release, commit_sha, stage, config):
+    """
+    Registro do estágio se ele já foi concluído para o mesmo commit e configuração
+    e todos os relatórios continuam no disco com o mesmo conteúdo; senão None.
+    """
+    entry = entries.get((release, stage))
+    if entry is None or entry["commit"] != commit_sha or entry["config"] != config or not entry["outputs"]:
+        return None
+    for path, checksum in entry["outputs"].items():
+        if not os.path.exists(path) or file_checksum(path) != checksum:
+            return None
+    return entry
+
+def report(journal_path=JOURNAL_PATH):
+    """Imprime os estágios concluídos de cada release."""
+    stages = {}
+    for (release, stage) in load(journal_path):
+        stages.setdefault(release, []).append(stage)
+    if not stages:
+        print("Nenhum estágio registrado no journal.")
+    for release, names in stages.items():
+        print(f"{release:<32}{', '.join(sorted(names))}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estágios concluídos por release no journal do pipeline.")
+    parser.add_argument("--reset", action="store_true", help="Apaga o journal (a próxima execução verifica tudo de novo)")
+    args = parser.parse_args()
+
+    if args.reset:
+        if os.path.exists(JOURNAL_PATH):
+            os.remove(JOURNAL_PATH)
+        print("Journal apagado.")
+    else:
+        report()
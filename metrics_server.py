@@ -0,0 +1,332 @@
+import io
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict, Counter
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+import ck_store
+import charts
+from spotbugs_stream import iter_bug_instances
+
+HOST = "127.0.0.1"
+PORT = 8765
+CACHE_SIZE = 256  # Agregados por (fonte, release) mantidos em memória (LRU)
+REFRESH_SECONDS = 2.0  # Intervalo mínimo entre duas verificações dos diretórios de relatórios
+CK_CLASS_COLUMNS = ["class"] + list(charts.CK_METRIC_NAMES)
+MISSING = object()  # Marca a ausência de uma entrada no cache (um agregado pode ser None)
+
+# O pyplot não é thread-safe: a renderização dos gráficos usa um lock próprio, separado do lock do cache
+_render_lock = threading.Lock()
+
+class UnknownNames(ValueError):
+    """Nomes de métricas, categorias ou contadores inexistentes em um parâmetro da consulta."""
+
+    def __init__(self, parameter, unknown, valid):
+        super().__init__(f"Valores desconhecidos para {parameter}: {', '.join(unknown)}")
+        self.valid = valid
+
+class LRUCache:
+    """Cache LRU de agregados por release, com invalidação seletiva de uma release."""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # {(fonte, safe_tag): agregado}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        """Valor em cache da chave, ou MISSING."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return MISSING
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+def ck_aggregate(safe_tag):
+    """Médias das métricas do CK, saúde geral (como no charts.py) e métricas por classe de uma release."""
+    df = ck_store.load_partition("class", safe_tag, CK_CLASS_COLUMNS)
+    if df is None or df.empty:
+        return {"means": {}, "health": None, "classes": {}}
+    metrics = df[list(charts.CK_METRIC_NAMES)].astype("float64")
+    inverted = metrics.copy()
+    inverted[charts.INVERTED_METRICS] = 1 / (inverted[charts.INVERTED_METRICS] + 1)
+    by_class = metrics.set_index(df["class"].astype(str))
+    return {
+        "means": metrics.mean().to_dict(),
+        "health": float(inverted.mean(axis=1).mean()),
+        "classes": by_class[~by_class.index.duplicated()].to_dict("index"),
+    }
+
+def bugs_aggregate(xml_path):
+    """Total de bugs, bugs por categoria e bugs por classe de um relatório do SpotBugs."""
+    categories, classes = Counter(), Counter()
+    for _, category, _, _, class_name, _ in iter_bug_instances(xml_path):
+        categories[category] += 1
+        classes[class_name] += 1
+    return {"total": sum(categories.values()), "categories": dict(categories), "classes": dict(classes)}
+
+class MetricsStore:
+    """
+    Agregados por release de CK, SpotBugs e JaCoCo, calculados sob demanda e mantidos em um cache LRU.
+
+    Cada entrada é associada à assinatura (tamanho e data de modificação) do relatório de origem; quando um
+    relatório aparece ou muda, apenas as entradas daquela release são descartadas.
+
+    O lock do store protege apenas o cache e as assinaturas: os agregados são calculados fora dele, e consultas
+    simultâneas à mesma release aguardam o mesmo cálculo (um Future por chave) em vez de repeti-lo.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE, refresh_seconds=REFRESH_SECONDS):
+        self.cache = LRUCache(cache_size)
+        self.refresh_seconds = refresh_seconds
+        self.signatures = {}  # {(fonte, safe_tag): assinatura}
+        self.paths = {}  # {(fonte, safe_tag): caminho do relatório}
+        self.coverage = {}  # {safe_tag: {contador: cobertura}}
+        self.jacoco_signature = None
+        self.checked_at = 0.0
+        self.pending = {}  # {(fonte, safe_tag): Future do agregado em cálculo}
+        self.lock = threading.RLock()
+
+    def scan(self):
+        """Assinaturas atuais dos relatórios: {(fonte, safe_tag): assinatura}."""
+        signatures = {}
+        if os.path.exists(charts.CK_REPORTS_DIR):
+            for entry in os.scandir(charts.CK_REPORTS_DIR):
+                match = ck_store.REPORT_PATTERN.match(entry.name)
+                if match and match.group("level") == "class":
+                    signatures[("ck", match.group("safe_tag"))] = (entry.stat().st_size, entry.stat().st_mtime_ns)
+                    self.paths[("ck", match.group("safe_tag"))] = entry.path
+        if os.path.exists(charts.SPOTBUGS_REPORTS_DIR):
+            for entry in os.scandir(charts.SPOTBUGS_REPORTS_DIR):
+                if entry.name.endswith("_spotbugs.xml"):
+                    safe_tag = entry.name[:-len("_spotbugs.xml")]
+                    signatures[("bugs", safe_tag)] = (entry.stat().st_size, entry.stat().st_mtime_ns)
+                    self.paths[("bugs", safe_tag)] = entry.path
+        signatures.update(self.scan_coverage())
+        return signatures
+
+    def scan_coverage(self):
+        """Assinatura das linhas de cada release no CSV do JaCoCo (o CSV só é relido quando muda)."""
+        if not os.path.exists(charts.JACOCO_CSV_PATH):
+            self.coverage = {}
+            return {}
+        stat = os.stat(charts.JACOCO_CSV_PATH)
+        if (stat.st_size, stat.st_mtime_ns) != self.jacoco_signature:
+            self.jacoco_signature = (stat.st_size, stat.st_mtime_ns)
+            df = pd.read_csv(charts.JACOCO_CSV_PATH).drop_duplicates(["Release", "Metric"], keep="last")
+            self.coverage = {
+                tag.replace("/", "_"): rows.set_index("Metric")["Coverage"].astype("float64").to_dict()
+                for tag, rows in df.groupby("Release")
+            }
+        return {("coverage", safe_tag): hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
+                for safe_tag, values in self.coverage.items()}
+
+    def refresh(self, force=False):
+        """Descarta do cache as releases cujos relatórios mudaram desde a última verificação."""
+        with self.lock:
+            if not force and time.monotonic() - self.checked_at < self.refresh_seconds:
+                return
+            self.checked_at = time.monotonic()
+            signatures = self.scan()
+            changed = {key for key in signatures.keys() | self.signatures.keys()
+                       if signatures.get(key) != self.signatures.get(key)}
+            if changed and any(source == "ck" for source, _ in changed):
+                ck_store.ingest(levels=["class"])  # Converte apenas os CSVs novos ou alterados
+            for key in changed:
+                self.cache.invalidate(key)
+                # Um cálculo em andamento leu o relatório antigo: o resultado dele não entra no cache
+                self.pending.pop(key, None)
+            if changed and self.signatures:
+                print(f"Releases invalidadas: {', '.join(sorted(f'{source}:{safe_tag}' for source, safe_tag in changed))}")
+            self.signatures = signatures
+
+    def aggregate(self, source, safe_tag):
+        key = (source, safe_tag)
+        with self.lock:
+            if source == "coverage":
+                return self.coverage.get(safe_tag, {})
+            value = self.cache.lookup(key)
+            if value is not MISSING:
+                return value
+            future = self.pending.get(key)
+            if future is None:
+                future = self.pending[key] = Future()
+                path = self.paths.get(key)
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return future.result()
+
+        try:
+            value = ck_aggregate(safe_tag) if source == "ck" else bugs_aggregate(path)
+        except BaseException as e:
+            with self.lock:
+                if self.pending.get(key) is future:
+                    del self.pending[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            if self.pending.get(key) is future:
+                del self.pending[key]
+                self.cache.put(key, value)
+        future.set_result(value)
+        return value
+
+    def releases(self, source):
+        """safe_tags com relatório da fonte, em ordem de versão."""
+        return sorted((safe_tag for key_source, safe_tag in self.signatures if key_source == source), key=ck_store.release_sort_key)
+
+    def series(self, source, value):
+        """Série temporal {release: valor} a partir do agregado de cada release (None quando não há valor)."""
+        series = {}
+        for safe_tag in self.releases(source):
+            result = value(self.aggregate(source, safe_tag))
+            series[ck_store.release_from_tag(safe_tag)] = None if result is None or pd.isna(result) else result
+        return series
+
+def check_names(parameter, names, valid):
+    """Lança UnknownNames se algum dos nomes pedidos não estiver entre os válidos."""
+    unknown = [name for name in names if name not in valid]
+    if unknown:
+        raise UnknownNames(parameter, unknown, sorted(valid))
+
+def ck_series(store, params):
+    valid = list(charts.CK_METRIC_NAMES) + ["health"]
+    metrics = params.get("metric") or valid
+    check_names("metric", metrics, valid)
+    return {metric: store.series("ck", lambda aggregate: aggregate["health"] if metric == "health" else aggregate["means"].get(metric))
+            for metric in metrics}
+
+def bugs_series(store, params):
+    categories = params.get("category")
+    valid = sorted({category for safe_tag in store.releases("bugs") for category in store.aggregate("bugs", safe_tag)["categories"]})
+    if not categories:
+        series = {"total": store.series("bugs", lambda aggregate: aggregate["total"])}
+        categories = valid
+    else:
+        check_names("category", categories, valid)
+        series = {}
+    for category in categories:
+        series[category] = store.series("bugs", lambda aggregate: aggregate["categories"].get(category, 0))
+    return series
+
+def coverage_series(store, params):
+    valid = sorted({counter for values in store.coverage.values() for counter in values})
+    counters = params.get("counter") or valid
+    check_names("counter", counters, valid)
+    return {counter: store.series("coverage", lambda aggregate: aggregate.get(counter)) for counter in counters}
+
+def class_series(store, params):
+    names = params.get("name", [])
+    series = {}
+    for name in names:
+        for metric in charts.CK_METRIC_NAMES:
+            series[f"{name}:{metric}"] = store.series("ck", lambda aggregate: aggregate["classes"].get(name, {}).get(metric))
+        series[f"{name}:bugs"] = store.series("bugs", lambda aggregate: aggregate["classes"].get(name, 0))
+    return series
+
+ENDPOINTS = {
+    "ck": (ck_series, "Métricas do CK (média por release)"),
+    "bugs": (bugs_series, "Número de bugs"),
+    "coverage": (coverage_series, "Cobertura (%)"),
+    "class": (class_series, "Métricas da classe"),
+}
+
+def render_png(title, ylabel, series):
+    """Renderiza as séries com o mesmo estilo do charts.py, em memória."""
+    buffer = io.BytesIO()
+    chart_series = {label: pd.Series(values, dtype="float64") for label, values in series.items()}
+    charts.render_chart({"path": buffer, "title": title, "ylabel": ylabel, "series": chart_series})
+    return buffer.getvalue()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    GET /releases
+    GET /ck?metric=wmc&metric=health | /bugs?category=PERFORMANCE | /coverage?counter=LINE | /class?name=org.x.Classe
+    GET /chart/<endpoint>?... renderiza as mesmas séries em PNG
+    GET /stats
+    """
+
+    store = None
+
+    def send(self, status, body, content_type="application/json"):
+        if content_type == "application/json":
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+        self.store.refresh()
+
+        if parts == ["releases"]:
+            return self.send(200, {source: [ck_store.release_from_tag(safe_tag) for safe_tag in self.store.releases(source)]
+                                   for source in ("ck", "bugs", "coverage")})
+        if parts == ["stats"]:
+            cache = self.store.cache
+            return self.send(200, {"entries": len(cache.entries), "hits": cache.hits, "misses": cache.misses})
+
+        chart = bool(parts) and parts[0] == "chart"
+        name = parts[1] if chart and len(parts) == 2 else (parts[0] if len(parts) == 1 else None)
+        if name not in ENDPOINTS:
+            return self.send(404, {"error": f"Endpoint desconhecido: {url.path}", "endpoints": ["releases", "stats", *ENDPOINTS]})
+
+        function, ylabel = ENDPOINTS[name]
+        try:
+            series = function(self.store, params)
+        except UnknownNames as e:
+            return self.send(400, {"error": str(e), "valid": e.valid})
+        except Exception as e:
+            return self.send(500, {"error": str(e)})
+        if chart:
+            with _render_lock:
+                return self.send(200, render_png(ylabel, ylabel, series), "image/png")
+        return self.send(200, {"series": series})
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(host=HOST, port=PORT, cache_size=CACHE_SIZE):
+    """Carrega os relatórios uma vez e atende as consultas até ser interrompido (Ctrl+C)."""
+    MetricsHandler.store = MetricsStore(cache_size)
+    MetricsHandler.store.refresh(force=True)
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    print(f"Servindo as métricas em http://{host}:{port}/ (Ctrl+C para sair)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço HTTP local com as séries de CK, SpotBugs e JaCoCo por release.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="Número de agregados por release mantidos em memória")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.cache_size)
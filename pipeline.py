@@ -0,0 +1,144 @@
+import os
+import argparse
+from collections import namedtuple
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+import ck
+import bugs
+import tests
+import cache
+import journal
+import tracing
+from build import RUN_ID, report_timings
+from common import REPO_DIR, fetch_releases, clone_repository, checkout_release, compile_code
+from worktrees import run_parallel
+
+N_WORKERS = 1  # Número de processos paralelos (1 = modo sequencial)
+
+# Estágio de análise executado sobre a árvore já compilada de uma release.
+#   name: nome do analisador (também usado como chave no cache)
+#   run: função run(tag, repo_dir) que retorna um valor verdadeiro em caso de sucesso
+#   report_paths: função report_paths(tag) com os relatórios gerados pelo estágio
+#   config: hash da versão/configuração do analisador
+#   output_dir: diretório dos relatórios da release
+#   exclusive: True se o estágio altera a árvore e não pode rodar junto com os demais
+Stage = namedtuple("Stage", ["name", "run", "report_paths", "config", "output_dir", "exclusive"])
+
+STAGES = {
+    "ck": Stage("ck", ck.run_ck_metrics, ck.ck_report_paths, ck.CK_CONFIG, ck.OUTPUT_DIR, False),
+    "spotbugs": Stage("spotbugs", bugs.run_spotbugs, bugs.spotbugs_report_paths, bugs.SPOTBUGS_CONFIG,
+                      os.path.join(REPO_DIR, bugs.OUTPUT_DIR), False),
+    # Os testes com JaCoCo alteram o pom.xml e o diretório target, então rodam depois dos demais
+    "jacoco": Stage("jacoco", tests.run_jacoco, tests.jacoco_release_paths, tests.JACOCO_CONFIG,
+                    tests.COVERAGE_BY_RELEASE_DIR, True),
+}
+
+def run_stage(stage, name, commit_sha, repo_dir):
+    """Executa um estágio, guarda seus relatórios no cache e registra a conclusão no journal. Retorna o resultado do estágio."""
+    print(f"Executando o estágio {stage.name} para a tag {name}...")
+    result = stage.run(name, repo_dir)
+    if result:
+        data = result if isinstance(result, dict) else None
+        cache.store(commit_sha, stage.name, stage.config, name, stage.report_paths(name), data=data)
+        journal.record_stage(name, commit_sha, stage.name, stage.config, stage.report_paths(name), data)
+    return result
+
+def process_release(name, commit_sha, repo_dir=REPO_DIR, stage_names=tuple(STAGES)):
+    """
+    Faz o checkout e compila a release uma única vez e executa sobre ela todos os estágios pendentes.
+
+    Estágios já concluídos (no journal, com os relatórios intactos) ou em cache não são executados de novo,
+    então uma execução interrompida retoma no primeiro estágio incompleto.
+    Estágios independentes rodam ao mesmo tempo; estágios exclusivos rodam em seguida, um por vez.
+
+    Returns:
+        dict: Resultado de cada estágio, com a flag indicando se veio do cache: {nome: (resultado, do_cache)}.
+    """
+    print(f"\nProcessando release {name} - Commit: {commit_sha}")
+    results = {}
+    pending = []
+    entries = journal.load()
+    for stage in (STAGES[stage_name] for stage_name in stage_names):
+        entry = journal.completed_stage(entries, name, commit_sha, stage.name, stage.config)
+        if entry is not None:
+            print(f"Estágio {stage.name} da tag {name} já concluído.")
+            results[stage.name] = (entry["data"] or True, True)
+            continue
+
+        manifest = cache.restore(commit_sha, stage.name, stage.config, name, stage.output_dir)
+        if manifest is None:
+            pending.append(stage)
+        else:
+            print(f"Estágio {stage.name} da tag {name} restaurado do cache.")
+            journal.record_stage(name, commit_sha, stage.name, stage.config, stage.report_paths(name), manifest["data"])
+            results[stage.name] = (manifest["data"] or True, True)
+
+    if not pending:
+        return results
+
+    checkout_release(commit_sha, repo_dir, name)
+    if not compile_code(repo_dir, name):
+        print(f"Erro na compilação da tag {name}. Pulando para a próxima.\n")
+        return results
+
+    concurrent = [stage for stage in pending if not stage.exclusive]
+    if concurrent:
+        with ThreadPoolExecutor(max_workers=len(concurrent)) as executor:
+            futures = {stage.name: executor.submit(run_stage, stage, name, commit_sha, repo_dir) for stage in concurrent}
+            for stage_name, future in futures.items():
+                results[stage_name] = (future.result(), False)
+
+    for stage in pending:
+        if stage.exclusive:
+            results[stage.name] = (run_stage(stage, name, commit_sha, repo_dir), False)
+
+    print(f"Pipeline concluído para a tag {name}.\n")
+    return results
+
+def save_results(releases, results):
+    """
+    Grava no CSV consolidado do JaCoCo as métricas de cada release, na ordem das releases.
+
+    O CSV é atualizado por release (sem duplicar linhas), então as releases restauradas também são
+    gravadas: isso completa o CSV de uma execução interrompida antes de chegar aqui.
+    """
+    os.makedirs(tests.OUTPUT_REPORTS_DIR, exist_ok=True)
+    for name, _ in releases:
+        metrics, _ = results.get(name, {}).get("jacoco", (None, True))
+        if isinstance(metrics, dict) and metrics:
+            tests.save_metrics_to_csv(name, metrics)
+
+def process_releases(workers=N_WORKERS, stage_names=tuple(STAGES), keep_worktrees=False):
+    """Executa o pipeline compile-once sobre as releases, em sequência ou em paralelo."""
+    releases = fetch_releases()
+    os.makedirs(tests.COVERAGE_BY_RELEASE_DIR, exist_ok=True)
+    clone_repository()
+
+    # Tags com a mesma árvore (ex.: o último RC e a release final) são compiladas e analisadas uma única vez
+    unique, duplicates = cache.split_duplicates(releases)
+    if workers > 1:
+        results = run_parallel(unique, partial(process_release, stage_names=tuple(stage_names)), REPO_DIR, workers, keep_worktrees)
+    else:
+        results = {name: process_release(name, commit_sha, REPO_DIR, stage_names) for name, commit_sha in unique}
+
+    # As duplicadas são restauradas do cache
+    for name, commit_sha in duplicates:
+        results[name] = process_release(name, commit_sha, REPO_DIR, stage_names)
+
+    save_results(releases, results)
+    report_timings(run_id=RUN_ID)
+    tracing.report_trace(run_id=RUN_ID)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compila cada release uma vez e executa CK, SpotBugs e JaCoCo sobre ela.")
+    parser.add_argument("--workers", type=int, default=N_WORKERS, help="Número de processos paralelos (1 = modo sequencial)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Estágios a executar, separados por vírgula ({', '.join(STAGES)})")
+    parser.add_argument("--keep-worktrees", action="store_true", help="Mantém as worktrees dos workers ao final (reaproveitadas na próxima execução)")
+    args = parser.parse_args()
+
+    stage_names = [stage_name.strip() for stage_name in args.stages.split(",")]
+    unknown = [stage_name for stage_name in stage_names if stage_name not in STAGES]
+    if unknown:
+        parser.error(f"estágios desconhecidos: {', '.join(unknown)} (válidos: {', '.join(STAGES)})")
+    process_releases(args.workers, stage_names, args.keep_worktrees)
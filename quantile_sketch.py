@@ -0,0 +1,95 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+RELATIVE_ACCURACY = 0.01  # Erro relativo máximo dos quantis estimados
+KEY_OFFSET = 4000  # Deslocamento dos índices dos buckets (o bucket 0 fica reservado para o valor zero)
+
+class QuantileSketch:
+    """
+    Sketch de quantis com erro relativo limitado (histograma em buckets logarítmicos).
+
+    Cada valor cai no bucket ceil(log_gamma(|v|)); dois sketches são combinados somando as
+    contagens dos buckets, então o resultado é o mesmo de processar todos os valores juntos.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = Counter()
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _keys(self, values):
+        magnitude = np.abs(values)
+        keys = np.zeros(len(values), dtype=np.int64)
+        nonzero = magnitude > 0
+        exponents = np.ceil(np.log(magnitude[nonzero]) / self.log_gamma).astype(np.int64)
+        keys[nonzero] = np.sign(values[nonzero]).astype(np.int64) * (np.clip(exponents + KEY_OFFSET, 1, None))
+        return keys
+
+    def _value(self, key):
+        if key == 0:
+            return 0.0
+        magnitude = 2 * self.gamma ** (abs(key) - KEY_OFFSET) / (self.gamma + 1)
+        return math.copysign(magnitude, key)
+
+    def add(self, values):
+        """Adiciona um lote de valores (NaN são ignorados)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        keys, counts = np.unique(self._keys(values), return_counts=True)
+        self.buckets.update(dict(zip(keys.tolist(), counts.tolist())))
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        """Combina outro sketch (com a mesma precisão) neste."""
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def quantile(self, q):
+        """Quantil aproximado (0 <= q <= 1), limitado ao mínimo e máximo exatos."""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        cumulative = 0
+        for key in sorted(self.buckets, key=self._value):
+            cumulative += self.buckets[key]
+            if cumulative > rank:
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    def to_frame(self):
+        """Buckets do sketch como DataFrame (bucket, count)."""
+        return pd.DataFrame({
+            "bucket": np.fromiter(self.buckets.keys(), dtype=np.int32, count=len(self.buckets)),
+            "count": np.fromiter(self.buckets.values(), dtype=np.int64, count=len(self.buckets)),
+        })
+
+    @classmethod
+    def from_frame(cls, buckets, count, total, minimum, maximum, relative_accuracy=RELATIVE_ACCURACY):
+        """Reconstrói um sketch a partir dos buckets gravados e das estatísticas exatas."""
+        sketch = cls(relative_accuracy)
+        sketch.buckets = Counter(dict(zip(buckets["bucket"].tolist(), buckets["count"].tolist())))
+        sketch.count = int(count)
+        sketch.sum = float(total)
+        sketch.min = float(minimum)
+        sketch.max = float(maximum)
+        return sketch
@@ -0,0 +1,115 @@
+import os
+import re
+import json
+import argparse
+import subprocess
+from packaging.version import Version, InvalidVersion
+
+RELEASES_CACHE_PATH = "releases_cache.json"  # Mapa tag -> sha resolvido na última leitura do clone local
+
+# Ex.: rel/commons-lang-3.17.0, commons-lang-3.17.0-RC1, LANG_3_8_1, LANG_3_8_RC1, LANG_1_0_B1
+# e os commits entre releases do ck_quick.py (ex.: commons-lang-3.16.0.post5).
+# A versão não pode começar grudada em uma letra (exceto o "v" de v1.0), para que sufixos
+# desconhecidos como _M1 não sejam lidos como a versão 1.
+TAG_VERSION_PATTERN = re.compile(r'(?<![^\W\d_vV])(\d+(?:[._]\d+)*)(?:[-_.]?(RC\d*|B(?:ETA)?\d*|A(?:LPHA)?\d*))?(?:\.(post\d+))?$', re.IGNORECASE)
+PRE_RELEASE_LABELS = {"a": "a", "b": "b", "r": "rc"}  # Primeira letra do sufixo -> pre-release do PEP 440
+
+def tag_version(tag):
+    """Extrai a versão semântica de uma tag (alphas, betas e RCs viram pre-releases), ou None se a tag não for de release."""
+    match = TAG_VERSION_PATTERN.search(tag)
+    if not match:
+        return None
+    version = match.group(1).replace("_", ".")
+    if match.group(2):
+        label, number = re.match(r'([a-z]+)(\d*)', match.group(2).lower()).groups()
+        version += PRE_RELEASE_LABELS[label[0]] + number
+    if match.group(3):
+        version += "." + match.group(3).lower()
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+def read_local_tags(repo_dir):
+    """Lê as tags do clone local via git refs. Retorna uma lista de (tag, sha do commit)."""
+    result = subprocess.run(
+        ["git", "for-each-ref", "--format=%(refname:short) %(objectname) %(*objectname)", "refs/tags"],
+        cwd=repo_dir, capture_output=True, text=True, check=True
+    )
+    tags = []
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        # Tags anotadas apontam para um objeto tag; o commit é o objeto "descascado" (*objectname)
+        tags.append((parts[0], parts[2] if len(parts) > 2 else parts[1]))
+    return tags
+
+def save_cached_tags(tags, path=RELEASES_CACHE_PATH):
+    """Grava o mapa tag -> sha no disco."""
+    with open(path + ".tmp", "w", encoding="utf-8") as cache_file:
+        json.dump(dict(tags), cache_file, indent=2)
+    os.replace(path + ".tmp", path)
+
+def load_cached_tags(path=RELEASES_CACHE_PATH):
+    """Lê o mapa tag -> sha gravado no disco, ou None se ainda não existir."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as cache_file:
+        return list(json.load(cache_file).items())
+
+def fetch_tags(repo_dir):
+    """Atualiza as tags do clone local a partir do remoto (único passo que usa a rede)."""
+    subprocess.run(["git", "fetch", "--tags", "--quiet"], cwd=repo_dir, check=True)
+
+def resolve_tags(repo_dir):
+    """
+    Resolve o mapa tag -> sha sem acesso à rede.
+
+    Usa as refs do clone local quando ele existe (e atualiza o cache em disco);
+    sem o clone, usa o cache da última execução.
+
+    Returns:
+        list: Pares (tag, sha), ou None se não houver clone nem cache.
+    """
+    if os.path.exists(repo_dir):
+        tags = read_local_tags(repo_dir)
+        save_cached_tags(tags)
+        return tags
+    return load_cached_tags()
+
+def select_releases(tags, limit=None, pattern=None, include_rc=True):
+    """
+    Filtra e ordena as tags de release da mais recente para a mais antiga.
+
+    Args:
+        tags (list): Pares (tag, sha).
+        limit (int): Número máximo de releases (None retorna todas).
+        pattern (str): Expressão regular que o nome da tag deve conter (ex.: "^rel/").
+        include_rc (bool): Se False, descarta os release candidates.
+    """
+    selected = []
+    for tag, sha in tags:
+        version = tag_version(tag)
+        if version is None or (pattern and not re.search(pattern, tag)):
+            continue
+        if not include_rc and version.is_prerelease:
+            continue
+        selected.append((version, tag, sha))
+
+    selected.sort(reverse=True)
+    return [(tag, sha) for _, tag, sha in selected[:limit]]
+
+if __name__ == "__main__":
+    from common import REPO_DIR
+
+    parser = argparse.ArgumentParser(description="Lista as releases a partir das tags do clone local.")
+    parser.add_argument("--limit", type=int, default=None, help="Número máximo de releases")
+    parser.add_argument("--pattern", default=None, help="Expressão regular para filtrar as tags (ex.: ^rel/)")
+    parser.add_argument("--no-rc", action="store_true", help="Descarta os release candidates")
+    parser.add_argument("--fetch", action="store_true", help="Atualiza as tags a partir do remoto antes de listar")
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_tags(REPO_DIR)
+    tags = resolve_tags(REPO_DIR) or []
+    for tag, sha in select_releases(tags, args.limit, args.pattern, not args.no_rc):
+        print(f"{tag} {sha}")
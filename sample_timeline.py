@@ -0,0 +1,131 @@
+import os
+import time
+import heapq
+import argparse
+import subprocess
+
+import pandas as pd
+
+from common import REPO_DIR, fetch_releases, clone_repository, commit_range
+from bisect_metrics import commit_name, measure
+from journal import atomic_write
+
+SAMPLES_DIR = os.path.abspath("sample_reports")  # Relatórios dos commits amostrados (mesmo layout de ck_reports/spotbugs_reports)
+COARSE_STEP = 20  # Amostragem inicial: um commit a cada COARSE_STEP entre duas tags
+MAX_COMMITS = 60  # Orçamento: número máximo de commits analisados (as tags contam)
+MAX_SECONDS = None  # Orçamento: tempo máximo de parede em segundos (None = sem limite)
+
+def commit_date(commit_sha, repo_dir=REPO_DIR):
+    """Data (ISO 8601) do commit, usada como eixo da linha do tempo."""
+    return subprocess.run(["git", "log", "-1", "--format=%cI", commit_sha], cwd=repo_dir,
+                          capture_output=True, text=True, check=True).stdout.strip()
+
+def sample(tags, metric, threshold, step=COARSE_STEP, max_commits=MAX_COMMITS, max_seconds=MAX_SECONDS, repo_dir=REPO_DIR):
+    """
+    Amostra commits entre tags consecutivas para uma linha do tempo mais fina da métrica.
+
+    Primeiro analisa as tags e um commit a cada step; depois refina (pelo ponto médio) apenas os intervalos
+    em que a métrica variou mais que threshold, começando pelas maiores variações, até esgotar o orçamento.
+    Commits que não compilam são ignorados, como na bisseção.
+
+    Args:
+        tags (list): Tags em ordem cronológica (da mais antiga para a mais nova).
+
+    Returns:
+        DataFrame: Um ponto por commit analisado com sucesso, em ordem cronológica.
+    """
+    start = time.monotonic()
+    # Posição global de cada commit: as tags e os commits entre elas em uma única sequência
+    commits, labels, tag_positions = [], [], []
+    for base_tag, target_tag in zip(tags, tags[1:]):
+        interval = commit_range(base_tag, target_tag, repo_dir)
+        if not commits:
+            tag_positions.append(0)
+            commits.append(interval[0])
+            labels.append(base_tag)
+        if len(interval) < 2:
+            continue  # Tags no mesmo commit
+        commits.extend(interval[1:])
+        labels.extend([base_tag] * (len(interval) - 2) + [target_tag])
+        tag_positions.append(len(commits) - 1)
+
+    values, failed = {}, set()
+
+    def within_budget():
+        if max_commits is not None and len(values) + len(failed) >= max_commits:
+            return False
+        return max_seconds is None or time.monotonic() - start < max_seconds
+
+    def analyze(index):
+        value = measure(commits[index], metric, repo_dir, SAMPLES_DIR)
+        if value is None:
+            failed.add(index)
+        else:
+            values[index] = value
+        shown = "falhou" if value is None else f"{value:.4f}"
+        print(f"[{len(values) + len(failed)}] {commits[index][:12]} ({labels[index]}) {metric} = {shown}")
+
+    # Fase grossa: as tags primeiro (pontos das releases), depois um commit a cada step
+    coarse = tag_positions + [index for index in range(0, len(commits), step) if index not in tag_positions]
+    for index in coarse:
+        if not within_budget():
+            break
+        analyze(index)
+
+    # Refinamento: os intervalos entre pontos vizinhos com a maior variação são divididos primeiro
+    def push(heap, low, high):
+        if high - low > 1 and abs(values[high] - values[low]) > threshold:
+            heapq.heappush(heap, (-abs(values[high] - values[low]), low, high))
+
+    heap = []
+    measured = sorted(values)
+    for low, high in zip(measured, measured[1:]):
+        push(heap, low, high)
+    while heap and within_budget():
+        _, low, high = heapq.heappop(heap)
+        candidates = [index for index in range(low + 1, high) if index not in failed]
+        if not candidates:
+            continue
+        middle = min(candidates, key=lambda index: abs(index - (low + high) // 2))
+        analyze(middle)
+        if middle in values:
+            push(heap, low, middle)
+            push(heap, middle, high)
+        else:
+            push(heap, low, high)
+
+    if heap:
+        print(f"Orçamento esgotado com {len(heap)} intervalos ainda acima do limite.")
+    return pd.DataFrame([{
+        "Release": labels[index],
+        "position": index,
+        "commit": commits[index],
+        "name": commit_name(commits[index]),
+        "date": commit_date(commits[index], repo_dir),
+        "is_tag": index in tag_positions,
+        metric: values[index],
+    } for index in sorted(values)])
+
+def save_timeline(df, metric, output_dir=SAMPLES_DIR):
+    """Grava a linha do tempo da métrica ao lado dos relatórios dos commits amostrados."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"timeline_{metric.replace(':', '_')}.csv")
+    with atomic_write(path, newline="") as file:
+        df.to_csv(file, index=False)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Amostra commits entre releases para uma linha do tempo mais fina de uma métrica.")
+    parser.add_argument("metric", help='Métrica de classe do CK (ex.: cbo) ou "bugs" / "bugs:CATEGORIA" do SpotBugs')
+    parser.add_argument("threshold", type=float, help="Variação mínima entre dois pontos para refinar o intervalo")
+    parser.add_argument("--tags", nargs="+", default=None, help="Tags em ordem cronológica (padrão: as releases do common.py, sem RCs)")
+    parser.add_argument("--step", type=int, default=COARSE_STEP, help="Amostragem inicial: um commit a cada STEP")
+    parser.add_argument("--max-commits", type=int, default=MAX_COMMITS, help="Número máximo de commits analisados")
+    parser.add_argument("--max-seconds", type=float, default=MAX_SECONDS, help="Tempo máximo de parede em segundos")
+    args = parser.parse_args()
+
+    clone_repository()
+    tags = args.tags or [tag for tag, _ in reversed(fetch_releases(include_rc=False))]
+    timeline = sample(tags, args.metric, args.threshold, args.step, args.max_commits, args.max_seconds)
+    print(timeline.to_string(index=False))
+    print(f"\nLinha do tempo gravada em {save_timeline(timeline, args.metric)}")
@@ -0,0 +1,153 @@
+import os
+import argparse
+from html import escape
+from collections import Counter, defaultdict
+
+from journal import atomic_write
+from spotbugs_stream import iter_elements
+
+SPOTBUGS_REPORTS_DIR = "./spotbugs_reports"
+
+CATEGORY_NAMES = {
+    "BAD_PRACTICE": "Bad practice",
+    "CORRECTNESS": "Correctness",
+    "EXPERIMENTAL": "Experimental",
+    "I18N": "Internationalization",
+    "MALICIOUS_CODE": "Malicious code vulnerability",
+    "MT_CORRECTNESS": "Multithreaded correctness",
+    "PERFORMANCE": "Performance",
+    "SECURITY": "Security",
+    "STYLE": "Dodgy code",
+}
+PRIORITY_NAMES = {1: "High", 2: "Medium", 3: "Low", 4: "Experimental"}
+
+STYLE = """
+  body { font-family: sans-serif; }
+  table { border-collapse: collapse; margin-bottom: 1em; }
+  th, td { padding: 4px 8px; text-align: left; }
+  .tableheader { background: #b9b9fe; }
+  .tablerow0 { background: #EEEEEE; }
+  .tablerow1 { background: white; }
+  .priority-1 { color: red; font-weight: bold; }
+  .priority-2 { color: orange; font-weight: bold; }
+  .priority-3 { color: green; font-weight: bold; }
+  .priority-4 { color: blue; font-weight: bold; }
+"""
+
+def read_report(xml_path):
+    """
+    Lê de forma incremental o que o relatório HTML precisa do XML do SpotBugs.
+
+    Returns:
+        tuple: (atributos do BugCollection, atributos do FindBugsSummary, lista de bugs)
+    """
+    collection = {}
+    summary = {}
+    bugs = []
+    for elem in iter_elements(xml_path, tags=("BugCollection", "BugInstance", "FindBugsSummary")):
+        if elem.tag == "BugCollection":
+            collection = dict(elem.attrib)
+        elif elem.tag == "FindBugsSummary":
+            summary = dict(elem.attrib)
+        else:
+            class_elem = elem.find("Class")
+            method_elem = elem.find("Method")
+            line_elem = elem.find("SourceLine")
+            bugs.append({
+                "type": elem.get("type"),
+                "category": elem.get("category"),
+                "priority": int(elem.get("priority", 0)),
+                "rank": int(elem.get("rank", 0)),
+                "class": class_elem.get("classname", "") if class_elem is not None else "",
+                "method": method_elem.get("name", "") if method_elem is not None else "",
+                "line": line_elem.get("start", "") if line_elem is not None else "",
+                "sourcepath": line_elem.get("sourcepath", "") if line_elem is not None else "",
+            })
+    return collection, summary, bugs
+
+def _bug_table(out, bugs):
+    out.append('<table><tr class="tableheader"><th>Type</th><th>Class</th><th>Method</th><th>Line</th><th>Priority</th><th>Rank</th></tr>')
+    for i, bug in enumerate(bugs):
+        priority = bug["priority"]
+        out.append(
+            f'<tr class="tablerow{i % 2}"><td>{escape(bug["type"])}</td><td>{escape(bug["class"])}</td>'
+            f'<td>{escape(bug["method"])}</td><td>{escape(bug["line"])}</td>'
+            f'<td class="priority-{priority}">{PRIORITY_NAMES.get(priority, priority)}</td><td>{bug["rank"]}</td></tr>'
+        )
+    out.append("</table>")
+
+def render_html(collection, summary, bugs):
+    """Monta o relatório HTML (resumo, seções por categoria e por classe) a partir dos dados do XML."""
+    ncss = int(summary.get("total_size", 0) or 0)
+    priorities = Counter(bug["priority"] for bug in bugs)
+    by_category = defaultdict(list)
+    by_class = defaultdict(list)
+    for bug in bugs:
+        by_category[bug["category"]].append(bug)
+        by_class[bug["class"]].append(bug)
+
+    def density(count):
+        return f"{count * 1000 / ncss:.2f}" if ncss else "N/A"
+
+    out = [
+        "<!DOCTYPE html>",
+        '<html><head><meta charset="UTF-8"/><title>SpotBugs Report</title>',
+        f"<style>{STYLE}</style></head><body>",
+        "<h1>SpotBugs Report</h1>",
+        "<h2>Project Information</h2>",
+        f"<p>SpotBugs version: {escape(collection.get('version', ''))}</p>",
+        "<h2>Metrics</h2>",
+        f"<p>{ncss} lines of code analyzed, in {escape(summary.get('total_classes', '?'))} classes, "
+        f"in {escape(summary.get('num_packages', '?'))} packages.</p>",
+        '<table><tr class="tableheader"><th>Metric</th><th>Total</th><th>Density*</th></tr>',
+    ]
+    for i, priority in enumerate(sorted(priorities)):
+        name = PRIORITY_NAMES.get(priority, priority)
+        out.append(f'<tr class="tablerow{i % 2}"><td>{name} Priority Warnings</td><td>{priorities[priority]}</td><td>{density(priorities[priority])}</td></tr>')
+    out.append(f"<tr><td><b>Total Warnings</b></td><td><b>{len(bugs)}</b></td><td><b>{density(len(bugs))}</b></td></tr></table>")
+    out.append("<p><i>(* Defects per Thousand lines of non-commenting source statements)</i></p>")
+
+    out.append("<h2>Contents</h2><ul>")
+    for category in sorted(by_category):
+        name = CATEGORY_NAMES.get(category, category)
+        out.append(f'<li><a href="#Warnings_{escape(category)}">{escape(name)} Warnings</a> ({len(by_category[category])})</li>')
+    out.append('<li><a href="#Classes">Warnings by class</a></li></ul>')
+
+    for category in sorted(by_category):
+        name = CATEGORY_NAMES.get(category, category)
+        out.append(f'<h2><a name="Warnings_{escape(category)}">{escape(name)} Warnings</a></h2>')
+        _bug_table(out, sorted(by_category[category], key=lambda bug: (bug["priority"], bug["rank"], bug["class"])))
+
+    out.append('<h2><a name="Classes">Warnings by class</a></h2>')
+    for class_name in sorted(by_class):
+        out.append(f"<h3>{escape(class_name)} ({len(by_class[class_name])})</h3>")
+        _bug_table(out, by_class[class_name])
+
+    out.append("</body></html>")
+    return "\n".join(out)
+
+def render_report(xml_path, html_path):
+    """Gera o relatório HTML do SpotBugs a partir do XML já produzido, sem uma nova análise."""
+    collection, summary, bugs = read_report(xml_path)
+    with atomic_write(html_path, encoding="utf-8") as html_file:
+        html_file.write(render_html(collection, summary, bugs))
+    return html_path
+
+def render_directory(directory=SPOTBUGS_REPORTS_DIR):
+    """Regenera o HTML de todos os relatórios XML de um diretório."""
+    rendered = 0
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith("_spotbugs.xml"):
+            xml_path = os.path.join(directory, filename)
+            html_path = xml_path[:-len(".xml")] + ".html"
+            render_report(xml_path, html_path)
+            print(f"Relatório SpotBugs em HTML gerado: {html_path}")
+            rendered += 1
+    return rendered
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os relatórios HTML do SpotBugs a partir dos XMLs existentes.")
+    parser.add_argument("directory", nargs="?", default=SPOTBUGS_REPORTS_DIR, help="Diretório com os relatórios XML")
+    args = parser.parse_args()
+
+    render_directory(args.directory)
@@ -0,0 +1,74 @@
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from columnar import ColumnBuffer
+
+REPORT_VERSION_PATTERN = re.compile(r'commons-lang-(.+?)_spotbugs')
+
+def release_from_filename(filename):
+    """Extrai a versão do nome do arquivo de relatório do SpotBugs."""
+    match = REPORT_VERSION_PATTERN.search(filename)
+    return match.group(1) if match else filename
+
+def iter_elements(file_path, tags=("BugInstance",)):
+    """
+    Percorre um relatório XML do SpotBugs de forma incremental, gerando os elementos com as tags pedidas.
+
+    O elemento raiz (BugCollection) é gerado no início, apenas com seus atributos, se estiver em tags.
+    Cada elemento é descartado da árvore logo após ser consumido, mantendo a memória constante.
+    """
+    context = ET.iterparse(file_path, events=("start", "end"))
+    _, root = next(context)
+    if root.tag in tags:
+        yield root
+    for event, elem in context:
+        if event == "end" and elem.tag in tags and elem is not root:
+            yield elem
+            # Descarta o elemento (e tudo que já foi lido antes dele) da árvore
+            root.clear()
+
+def iter_bug_instances(file_path):
+    """Gera uma tupla (type, category, priority, rank, class, method) por BugInstance de um relatório."""
+    for elem in iter_elements(file_path):
+        class_elem = elem.find("Class")
+        method_elem = elem.find("Method")
+        yield (
+            elem.get("type"),
+            elem.get("category"),
+            int(elem.get("priority", 0)),
+            int(elem.get("rank", 0)),
+            class_elem.get("classname") if class_elem is not None else "",
+            method_elem.get("name") if method_elem is not None else "",
+        )
+
+class BugBuffer(ColumnBuffer):
+    """Buffer colunar tipado para registros de bugs: textos codificados em dicionário e inteiros em arrays."""
+
+    STRING_COLUMNS = ("Release", "Type", "Category", "Class", "Method")
+    INT_COLUMNS = ("Priority", "Rank")
+    INT_TYPECODE = "b"
+
+    def append(self, release, type_, category, priority, rank, class_name, method):
+        """Adiciona um registro ao buffer."""
+        self._encode("Release", release)
+        self._encode("Type", type_)
+        self._encode("Category", category)
+        self._encode("Class", class_name)
+        self._encode("Method", method)
+        self.ints["Priority"].append(priority)
+        self.ints["Rank"].append(rank)
+
+    def add_report(self, file_path, release):
+        """Lê um relatório XML de forma incremental diretamente para o buffer."""
+        for record in iter_bug_instances(file_path):
+            self.append(release, *record)
+
+def read_reports(directory):
+    """Lê todos os relatórios XML do SpotBugs de um diretório para um BugBuffer."""
+    buffer = BugBuffer()
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".xml"):
+            print(f"Processando arquivo: {filename}")
+            buffer.add_report(os.path.join(directory, filename), release_from_filename(filename))
+    return buffer
@@ -1,27 +1,25 @@
 import os
+import argparse
 import subprocess
 import requests
 import csv
-import shutil
-import xml.etree.ElementTree as ET
-
-# URLs e configurações
-GITHUB_API_URL_REPO  = "https://github.com/apache/commons-lang.git"
-GITHUB_API_URL = "https://api.github.com/repos/apache/commons-lang/tags"
-REPO_DIR = "apache_commons_repo"  # Nome do diretório onde o repositório será clonado
-POM_PATH = os.path.join(REPO_DIR, "pom.xml") # Caminho do pom no repositório
-MAVEN_PATH = "C:/apache-maven-3.9.9/bin/mvn.cmd"  # Caminho do Maven
+import cache
+import journal
+import tracing
+import jacoco_stream
+from common import GITHUB_API_URL, REPO_DIR, MAVEN_PATH, build_executor, fetch_releases, clone_repository, checkout_release
+from worktrees import run_parallel
+
+# Configurações (repositório, Maven e releases ficam em common.py)
 OUTPUT_REPORTS_DIR = "jacoco_reports"
 CSV_OUTPUT_PATH = os.path.join(OUTPUT_REPORTS_DIR, "jacoco_metrics.csv")
-JACOCO_REPORT_PATH = os.path.join(REPO_DIR, "target", "site", "jacoco", "jacoco.xml")
-JACOCO_CSV_PATH = os.path.join(REPO_DIR, "target", "site", "jacoco", "jacoco.csv")
+JACOCO_SITE_DIR = os.path.join("target", "site", "jacoco")  # Relativo à raiz do repositório
 COVERAGE_BY_RELEASE_DIR = os.path.join(OUTPUT_REPORTS_DIR, "jacoco_coverage_by_release")
 RELEASES_NUMBER = 20
-
-# Função para clonar o repositório
-def clone_repository():
-    if not os.path.exists(REPO_DIR):
-        subprocess.run(["git", "clone", GITHUB_API_URL_REPO, REPO_DIR], check=True)
+CANDIDATE_RELEASES = 30  # Releases candidatas (sobram algumas caso a compilação de alguma falhe)
+N_WORKERS = 1  # Número de processos paralelos (1 = modo sequencial)
+MAVEN_JACOCO_TEST_GOALS = ["-Dmaven.test.failure.ignore=true", "jacoco:prepare-agent", "test", "jacoco:report"]
+JACOCO_CONFIG = cache.config_hash(MAVEN_PATH, *MAVEN_JACOCO_TEST_GOALS)  # Chave de cache da configuração do JaCoCo
 
 # Teste
 def teste_busca_releases():
@@ -34,143 +32,213 @@ def teste_busca_releases():
         release_count = release_count + 1
         print(f"Release {release_count}: ", release["name"])
 
-def fetch_releases_1():
-    """Busca as últimas releases no GitHub."""
-    response = requests.get(GITHUB_API_URL)
-    response.raise_for_status()
-    releases = response.json()[:RELEASES_NUMBER]
-    return [(release["name"], release["commit"]["sha"]) for release in releases]
+# Função para compilar o código com o plugin JaCoCo
+def compile_with_jacoco(repo_dir=REPO_DIR, release=""):
+    # Adiciona o plugin do JaCoCo e compila o projeto com o Maven (o clean é omitido se a árvore não mudou)
+    result = build_executor.run_after_compile(MAVEN_JACOCO_TEST_GOALS, repo_dir, "compile + jacoco", release)
+    return result.returncode == 0
 
-def fetch_releases():
-    """Busca as últimas releases no GitHub."""
-    response = requests.get(GITHUB_API_URL)
-    response.raise_for_status()
-    releases = response.json()
-    return [(release["name"], release["commit"]["sha"]) for release in releases]
+def run_jacoco(name, repo_dir=REPO_DIR):
+    """
+    Executa os testes com JaCoCo sobre uma árvore já compilada (usado pelo pipeline.py).
 
-# Função para mudar para uma release específica
-def checkout_release(tag):
-    os.chdir(REPO_DIR)
-    subprocess.run(["git", "checkout", tag], check=True)
-    os.chdir("..")
+    Returns:
+        dict: Métricas de cobertura da release (vazio se os testes ou o relatório falharam).
+    """
+    update_jacoco_skip(skip_value=False, repo_dir=repo_dir)
+    result = build_executor.run(MAVEN_JACOCO_TEST_GOALS, repo_dir, "jacoco", name)
 
-# Função para compilar o código com o plugin JaCoCo
-def compile_with_jacoco():
-    os.chdir(REPO_DIR)
-    # Adiciona o plugin do JaCoCo e compila o projeto com o Maven
-    result = subprocess.run([MAVEN_PATH, "clean", "compile", "-Dmaven.test.failure.ignore=true", "jacoco:prepare-agent", "test", "jacoco:report"],
-                            capture_output=True, text=True)
-    os.chdir("..")
-    return result.returncode == 0
+    metrics = {}
+    if result.returncode == 0:
+        metrics = extract_jacoco_metrics(name, repo_dir)
+        if metrics:
+            copy_and_rename_jacoco_files(name, repo_dir)
+    else:
+        print(f"Erro na execução dos testes da tag {name}:")
+        print(result.stdout)
+
+    reset_release(name, repo_dir)
+    return metrics
 
 # Função para extrair métricas do relatório do JaCoCo
-def extract_jacoco_metrics(name):
-    if not os.path.exists(JACOCO_REPORT_PATH):
+def extract_jacoco_metrics(name, repo_dir=REPO_DIR):
+    jacoco_report_path = os.path.join(repo_dir, JACOCO_SITE_DIR, "jacoco.xml")
+    if not os.path.exists(jacoco_report_path):
         print(f"Relatório do JaCoCo não encontrado para a branch {name}.")
         return {}
 
-    tree = ET.parse(JACOCO_REPORT_PATH)
-    root = tree.getroot()
+    # Leitura incremental; as métricas da release são os contadores do nível do relatório (totais do projeto)
+    return jacoco_stream.report_metrics(jacoco_stream.read_coverage(jacoco_report_path))
 
-    metrics = {}
-    for counter in root.findall(".//counter"):
-        type_ = counter.get("type")
-        covered = int(counter.get("covered"))
-        missed = int(counter.get("missed"))
-        total = covered + missed
-        metrics[type_] = {
-            "covered": covered,
-            "missed": missed,
-            "total": total,
-            "coverage": (covered / total) * 100 if total > 0 else 0
-        }
-
-    save_metrics_to_csv(name, metrics)
+def save_metrics_to_csv(release_name, metrics):
+    """
+    Salva as métricas extraídas no CSV, substituindo as linhas que a release já tinha.
 
-    return metrics
+    Gravar a mesma release de novo (ex.: ao retomar uma execução interrompida) não duplica linhas,
+    e o arquivo é reescrito de forma atômica.
+    """
+    rows = []
+    position = None
+    if os.path.isfile(CSV_OUTPUT_PATH):
+        with open(CSV_OUTPUT_PATH, newline="") as csv_file:
+            reader = csv.reader(csv_file)
+            next(reader, None)  # Cabeçalho
+            for row in reader:
+                if row and row[0] == release_name:
+                    position = len(rows) if position is None else position
+                elif row:
+                    rows.append(row)
 
-def save_metrics_to_csv(release_name, metrics):
-    """Salva as métricas extraídas no CSV."""
-    file_exists = os.path.isfile(CSV_OUTPUT_PATH)
-    with open(CSV_OUTPUT_PATH, mode="a", newline="") as csv_file:
+    new_rows = [[release_name, metric, values["coverage"], values["covered"], values["total"], values["missed"]]
+                for metric, values in metrics.items()]
+    position = len(rows) if position is None else position
+    rows[position:position] = new_rows
+
+    with journal.atomic_write(CSV_OUTPUT_PATH, newline="") as csv_file:
         writer = csv.writer(csv_file)
-        if not file_exists:
-            # Escreve o cabeçalho do arquivo se não existir
-            writer.writerow(["Release", "Metric", "Coverage", "Covered", "Total", "Missed"])
-        for metric, values in metrics.items():
-            writer.writerow([release_name, metric, values["coverage"], values["covered"], values["total"], values["missed"]])
+        writer.writerow(["Release", "Metric", "Coverage", "Covered", "Total", "Missed"])
+        writer.writerows(rows)
+
+def process_release(name, commit_sha, repo_dir=REPO_DIR):
+    """
+    Faz checkout, compila, executa os testes com JaCoCo e copia os relatórios de uma release.
+
+    Returns:
+        dict: Métricas de cobertura da release (vazio se a release falhou).
+    """
+    print(f"\nProcessando release {name} - Commit: {commit_sha}")
+
+    # Faz o checkout da release específica
+    checkout_release(commit_sha, repo_dir, name)
+
+    if update_jacoco_skip(skip_value=False, repo_dir=repo_dir):
+        print("Propriedade <jacoco.skip> ajustada com sucesso.")
+    else:
+        print("Ajuste de <jacoco.skip> falhou ou a propriedade não foi encontrada.")
+
+    metrics = {}
+    # Compila o código
+    if compile_with_jacoco(repo_dir, name):
+        print("Compilação e execução de testes concluídas.")
+        metrics = extract_jacoco_metrics(name, repo_dir)
+        if not metrics:
+            print(f"Sem métricas de cobertura para {name}:")
+        else :
+            print(f"Métricas de cobertura para {name}:")
+            for metric, values in metrics.items():
+                print(f"{metric}: {values['coverage']:.2f}% ({values['covered']}/{values['total']})")
+
+            copy_and_rename_jacoco_files(name, repo_dir)
+            cache.store(commit_sha, "jacoco", JACOCO_CONFIG, name, jacoco_release_paths(name), data=metrics)
+            print(f"Análise Jacoco concluída para a tag {name}.\n")
+    else:
+        print(f"Erro na compilação da tag {name}. Pulando para a próxima.\n")
+
+    reset_release(name, repo_dir)
+    return metrics
 
 # Função principal para iterar sobre as releases e extrair métricas
 def process_releases(releases_number=20):
+    # O clone vem antes do cache: as entradas são indexadas pelo hash da árvore, resolvido no clone
     clone_repository()
-    releases = fetch_releases()
+
+    # Restaura do cache as releases já analisadas (o CSV é regravado com as métricas delas ao final)
+    candidates = fetch_releases(limit=CANDIDATE_RELEASES)
+    releases, restored = cache.split_cached(candidates, "jacoco", JACOCO_CONFIG, COVERAGE_BY_RELEASE_DIR)
+    releases_number = releases_number - len(restored)
+    if not releases or releases_number < 0:
+        print("Nenhuma release pendente de análise JaCoCo.")
+        save_restored_metrics(candidates)
+        return
 
     if not os.path.exists(OUTPUT_REPORTS_DIR):
         os.makedirs(OUTPUT_REPORTS_DIR)
 
     for name, commit_sha in releases:
-        print(f"\nProcessando release {name} - Commit: {commit_sha}")
-            
-        # Faz o checkout da release específica
-        checkout_release(commit_sha)
-
-        if update_jacoco_skip(skip_value=False):
-            print("Propriedade <jacoco.skip> ajustada com sucesso.")
-        else:
-            print("Ajuste de <jacoco.skip> falhou ou a propriedade não foi encontrada.")
-            
-        # Compila o código
-        if compile_with_jacoco():
-            print("Compilação e execução de testes concluídas.")
-            metrics = extract_jacoco_metrics(name)
-            if not metrics:
-                print(f"Sem métricas de cobertura para {name}:")
-            else :
-                print(f"Métricas de cobertura para {name}:")
-                for metric, values in metrics.items():
-                    print(f"{metric}: {values['coverage']:.2f}% ({values['covered']}/{values['total']})")
-                    
-                copy_and_rename_jacoco_files(name)
-                print(f"Análise Jacoco concluída para a tag {name}.\n")
-                releases_number = releases_number - 1
-        else:
-            print(f"Erro na compilação da tag {name}. Pulando para a próxima.\n")
+        metrics = process_release(name, commit_sha)
+        if metrics:
+            save_metrics_to_csv(name, metrics)
+            releases_number = releases_number - 1
 
         if releases_number < 0:
             break
 
-        reset_release(name)
+    save_restored_metrics(candidates)
+
+def process_releases_parallel(workers=N_WORKERS, keep_worktrees=False):
+    """Processa as releases em paralelo, uma worktree do repositório por worker."""
+    clone_repository()
+    candidates = fetch_releases(limit=CANDIDATE_RELEASES)
+    releases, _ = cache.split_cached(candidates, "jacoco", JACOCO_CONFIG, COVERAGE_BY_RELEASE_DIR)
+    if not releases:
+        print("Nenhuma release pendente de análise JaCoCo.")
+        save_restored_metrics(candidates)
+        return
+
+    if not os.path.exists(OUTPUT_REPORTS_DIR):
+        os.makedirs(OUTPUT_REPORTS_DIR)
+
+    results = run_parallel(releases, process_release, REPO_DIR, workers, keep_worktrees)
+
+    # O CSV consolidado é escrito apenas pelo processo principal, na ordem das releases
+    for name, _ in releases:
+        if results.get(name):
+            save_metrics_to_csv(name, results[name])
+    save_restored_metrics(candidates)
+
+def save_restored_metrics(candidates):
+    """
+    Restaura do cache as releases já analisadas (inclusive as com a mesma árvore de uma release
+    processada nesta execução) e grava suas métricas no CSV consolidado.
 
-def copy_and_rename_jacoco_files(release_name):
+    Como o CSV é atualizado por release, isso também completa o CSV de uma execução interrompida.
+    """
+    _, restored = cache.split_cached(candidates, "jacoco", JACOCO_CONFIG, COVERAGE_BY_RELEASE_DIR)
+    for name, _ in candidates:
+        if restored.get(name):
+            save_metrics_to_csv(name, restored[name])
+
+def jacoco_release_paths(release_name):
+    """Retorna os caminhos dos relatórios XML e CSV copiados para uma release."""
+    # Substitui caracteres inválidos no nome da release
+    sanitized_release_name = release_name.replace("/", "_")
+    return [
+        os.path.join(COVERAGE_BY_RELEASE_DIR, f"jacoco_{sanitized_release_name}.xml"),
+        os.path.join(COVERAGE_BY_RELEASE_DIR, f"jacoco_{sanitized_release_name}.csv"),
+    ]
+
+def copy_and_rename_jacoco_files(release_name, repo_dir=REPO_DIR):
     """
     Copia e renomeia os arquivos jacoco.xml e jacoco.csv para a pasta 'jacoco_coverage_by_release'.
     
     Args:
         release_name (str): Nome da release para identificar os arquivos.
+        repo_dir (str): Diretório do repositório (ou worktree) onde o relatório foi gerado.
     """
-    try:
-        # Substitui caracteres inválidos no nome da release
-        sanitized_release_name = release_name.replace("/", "_")
+    with tracing.span("copy reports", release_name, outputs=jacoco_release_paths(release_name)) as record:
+        try:
+            new_xml_path, new_csv_path = jacoco_release_paths(release_name)
+            jacoco_report_path = os.path.join(repo_dir, JACOCO_SITE_DIR, "jacoco.xml")
+            jacoco_csv_path = os.path.join(repo_dir, JACOCO_SITE_DIR, "jacoco.csv")
 
-        if os.path.exists(JACOCO_REPORT_PATH):
-            new_xml_path = os.path.join(COVERAGE_BY_RELEASE_DIR, f"jacoco_{sanitized_release_name}.xml")
-            shutil.copy(JACOCO_REPORT_PATH, new_xml_path)
-            print(f"Arquivo {JACOCO_REPORT_PATH} copiado para {new_xml_path}.")
+            if os.path.exists(jacoco_report_path):
+                journal.atomic_copy(jacoco_report_path, new_xml_path)
+                print(f"Arquivo {jacoco_report_path} copiado para {new_xml_path}.")
+                # Tabela de cobertura por pacote/classe/método da release
+                jacoco_stream.ingest_file(new_xml_path, release_name.replace("/", "_"))
         
-        if os.path.exists(JACOCO_CSV_PATH):
-            new_csv_path = os.path.join(COVERAGE_BY_RELEASE_DIR, f"jacoco_{sanitized_release_name}.csv")
-            shutil.copy(JACOCO_CSV_PATH, new_csv_path)
-            print(f"Arquivo {JACOCO_CSV_PATH} copiado para {new_csv_path}.")
-        else:
-            print(f"Arquivo CSV para a release {release_name} não encontrado.")
-    except Exception as e:
-        print(f"Erro ao copiar e renomear arquivos JaCoCo para a release {release_name}: {e}")
+            if os.path.exists(jacoco_csv_path):
+                journal.atomic_copy(jacoco_csv_path, new_csv_path)
+                print(f"Arquivo {jacoco_csv_path} copiado para {new_csv_path}.")
+            else:
+                print(f"Arquivo CSV para a release {release_name} não encontrado.")
+        except Exception as e:
+            record["status"] = 1
+            print(f"Erro ao copiar e renomear arquivos JaCoCo para a release {release_name}: {e}")
 
-def reset_release(name):
+def reset_release(name, repo_dir=REPO_DIR):
     try:
-        os.chdir(REPO_DIR)
-        subprocess.run(["git", "reset", "--hard"], check=True)
-        os.chdir("..")
+        subprocess.run(["git", "reset", "--hard"], cwd=repo_dir, check=True)
         print("Reset release efetuado com sucesso. Passando para próxima versão.")
     
     except Exception as e:
@@ -178,20 +246,22 @@ def reset_release(name):
 
 
 # Altera a propriedade <jacoco.skip> do POM.xml
-def update_jacoco_skip(skip_value=False):
+def update_jacoco_skip(skip_value=False, repo_dir=REPO_DIR):
     """
     Atualiza o valor da propriedade <jacoco.skip> no arquivo pom.xml, fazendo apenas o replace de true para false,
     sem alterar a estrutura do arquivo XML.
     
     Args:
         skip_value (bool): Valor desejado para jacoco.skip (True ou False).
+        repo_dir (str): Diretório do repositório (ou worktree) cujo pom.xml será alterado.
         
     Returns:
         bool: True se a propriedade foi encontrada e atualizada, False caso contrário.
     """
+    pom_path = os.path.join(repo_dir, "pom.xml")
     try:
         # Define o caminho do arquivo
-        with open(POM_PATH, 'r', encoding='utf-8') as file:
+        with open(pom_path, 'r', encoding='utf-8') as file:
             # Lê o conteúdo do arquivo como texto
             content = file.read()
 
@@ -205,21 +275,29 @@ def update_jacoco_skip(skip_value=False):
             content = content.replace(f"<jacoco.skip>{old_value}</jacoco.skip>", f"<jacoco.skip>{new_value}</jacoco.skip>")
             
             # Escreve o conteúdo de volta no arquivo
-            with open(POM_PATH, 'w', encoding='utf-8') as file:
+            with open(pom_path, 'w', encoding='utf-8') as file:
                 file.write(content)
             
-            print(f"Propriedade <jacoco.skip> alterada para {new_value} no arquivo {POM_PATH}.")
+            print(f"Propriedade <jacoco.skip> alterada para {new_value} no arquivo {pom_path}.")
             return True
         else:
-            print(f"A tag <jacoco.skip> com o valor {old_value} não foi encontrada no arquivo {POM_PATH}.")
+            print(f"A tag <jacoco.skip> com o valor {old_value} não foi encontrada no arquivo {pom_path}.")
             return False
 
     except Exception as e:
-        print(f"Erro ao atualizar o arquivo {POM_PATH}: {e}")
+        print(f"Erro ao atualizar o arquivo {pom_path}: {e}")
         return False
 
 # Executa o script
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai a cobertura JaCoCo das releases do commons-lang.")
+    parser.add_argument("--workers", type=int, default=N_WORKERS, help="Número de processos paralelos (1 = modo sequencial)")
+    parser.add_argument("--keep-worktrees", action="store_true", help="Mantém as worktrees dos workers ao final (reaproveitadas na próxima execução)")
+    args = parser.parse_args()
+
     os.makedirs(COVERAGE_BY_RELEASE_DIR, exist_ok=True)
-    process_releases()
+    if args.workers > 1:
+        process_releases_parallel(args.workers, args.keep_worktrees)
+    else:
+        process_releases()
     #teste_busca_releases()
\ No newline at end of file
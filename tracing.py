@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import argparse
+import threading
+import subprocess
+from contextlib import contextmanager
+from collections import defaultdict
+
+try:
+    import psutil as _psutil  # Opcional: amostragem de memória em qualquer sistema
+except ImportError:
+    _psutil = None
+
+if os.name == "nt":
+    import ctypes
+    from ctypes import wintypes
+
+TRACE_PATH = "pipeline_trace.jsonl"  # Uma linha JSON por etapa executada (clone, checkout, build, analisadores, cópias)
+RUN_ID = os.environ.setdefault("METRICS_RUN_ID", time.strftime("%Y%m%d-%H%M%S"))  # Herdado pelos processos workers
+
+JOB_OBJECT_EXTENDED_LIMIT_INFORMATION = 9  # Classe de informação do QueryInformationJobObject
+
+_write_lock = threading.Lock()
+
+def output_bytes(paths):
+    """Soma dos tamanhos dos arquivos gerados (os que não existem são ignorados)."""
+    return sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+
+@contextmanager
+def span(stage, release="", outputs=(), trace_path=TRACE_PATH):
+    """
+    Mede uma etapa e grava um registro no trace ao final.
+
+    O registro é entregue ao bloco, que pode preencher "status" (código de saída),
+    "stdout_bytes" ou os dados exatos do processo filho. O tempo de CPU do processo
+    inclui todas as suas threads; o dos filhos inclui apenas os processos já encerrados.
+    """
+    record = {"run": RUN_ID, "pid": os.getpid(), "thread": threading.get_ident(), "release": release,
+              "stage": stage, "start_us": int(time.time() * 1_000_000), "status": 0}
+    times = os.times()
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record["status"] = "error"
+        raise
+    finally:
+        end_times = os.times()
+        record["wall_seconds"] = round(time.perf_counter() - start, 4)
+        record["cpu_seconds"] = max(0.0, round(end_times.user + end_times.system - times.user - times.system, 4))
+        record.setdefault("child_cpu_seconds", max(0.0, round(end_times.children_user + end_times.children_system
+                                                              - times.children_user - times.children_system, 4)))
+        record.setdefault("child_peak_rss_kb", None)
+        record["output_bytes"] = output_bytes(outputs)
+        with _write_lock, open(trace_path, "a", encoding="utf-8") as trace_file:
+            trace_file.write(json.dumps(record) + "\n")
+
+class PeakMemoryMonitor:
+    """
+    Pico de memória de um processo filho e de seus descendentes (ex.: o java iniciado pelo mvn.cmd), em KB.
+
+    No Windows, o processo é colocado em um job object e o pico é o PeakJobMemoryUsed do job (memória
+    comprometida de toda a árvore). Nos demais sistemas, a memória residente da árvore é amostrada a cada
+    SAMPLE_SECONDS com o psutil, se instalado, ou pelo /proc no Linux. Sem nenhum desses meios, o pico é None.
+    """
+
+    SAMPLE_SECONDS = 0.05
+
+    def __init__(self, process):
+        self.process = process
+        self.peak_bytes = None
+        self.job = None
+        self.stopped = threading.Event()
+        self.sampler = None
+
+    def start(self):
+        if os.name == "nt":
+            self.job = _windows_job(self.process)
+        elif _psutil is not None or os.path.exists(f"/proc/{self.process.pid}"):
+            self.sampler = threading.Thread(target=self._sample, daemon=True)
+            self.sampler.start()
+        return self
+
+    def stop(self):
+        """Encerra a medição (depois do processo terminar) e retorna o pico em KB."""
+        if self.job is not None:
+            self.peak_bytes = _windows_job_peak(self.job)
+        if self.sampler is not None:
+            self.stopped.set()
+            self.sampler.join()
+        return None if self.peak_bytes is None else self.peak_bytes // 1024
+
+    def _sample(self):
+        while True:
+            rss = tree_rss_bytes(self.process.pid)
+            if rss is not None:
+                self.peak_bytes = max(self.peak_bytes or 0, rss)
+            if self.stopped.wait(self.SAMPLE_SECONDS):
+                return
+
+def tree_rss_bytes(pid):
+    """Memória residente (bytes) de um processo e de seus descendentes, ou None se ele já terminou."""
+    if _psutil is not None:
+        try:
+            root = _psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except _psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except _psutil.Error:
+                pass
+        return total
+
+    # Linux sem psutil: VmRSS (em kB) de cada processo da árvore, seguindo /proc/<pid>/task/*/children
+    total, pending, found = 0, [pid], False
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status", encoding="ascii", errors="replace") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            found = True
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children", encoding="ascii") as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue
+    return total if found else None
+
+def _windows_job(process):
+    """Cria um job object com o processo (os descendentes criados depois entram no job automaticamente)."""
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+    kernel32.AssignProcessToJobObject.argtypes = (wintypes.HANDLE, wintypes.HANDLE)
+    job = kernel32.CreateJobObjectW(None, None)
+    if not job:
+        return None
+    if not kernel32.AssignProcessToJobObject(job, int(process._handle)):
+        kernel32.CloseHandle(wintypes.HANDLE(job))
+        return None
+    return job
+
+def _windows_job_peak(job):
+    """PeakJobMemoryUsed (bytes) do job, que é fechado em seguida."""
+    class IoCounters(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in ("ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                                                             "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+    class BasicLimitInformation(ctypes.Structure):
+        _fields_ = [("PerProcessUserTimeLimit", ctypes.c_int64), ("PerJobUserTimeLimit", ctypes.c_int64),
+                    ("LimitFlags", wintypes.DWORD), ("MinimumWorkingSetSize", ctypes.c_size_t),
+                    ("MaximumWorkingSetSize", ctypes.c_size_t), ("ActiveProcessLimit", wintypes.DWORD),
+                    ("Affinity", ctypes.c_size_t), ("PriorityClass", wintypes.DWORD), ("SchedulingClass", wintypes.DWORD)]
+
+    class ExtendedLimitInformation(ctypes.Structure):
+        _fields_ = [("BasicLimitInformation", BasicLimitInformation), ("IoInfo", IoCounters),
+                    ("ProcessMemoryLimit", ctypes.c_size_t), ("JobMemoryLimit", ctypes.c_size_t),
+                    ("PeakProcessMemoryUsed", ctypes.c_size_t), ("PeakJobMemoryUsed", ctypes.c_size_t)]
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    info = ExtendedLimitInformation()
+    ok = kernel32.QueryInformationJobObject(wintypes.HANDLE(job), JOB_OBJECT_EXTENDED_LIMIT_INFORMATION,
+                                            ctypes.byref(info), ctypes.sizeof(info), None)
+    kernel32.CloseHandle(wintypes.HANDLE(job))
+    return info.PeakJobMemoryUsed if ok else None
+
+def run(command, stage, release="", cwd=None, outputs=(), check=False):
+    """
+    Equivalente a subprocess.run(command, capture_output=True, text=True) registrado no trace.
+
+    O pico de memória do processo filho e de seus descendentes é medido pelo PeakMemoryMonitor.
+
+    Returns:
+        CompletedProcess: Resultado do comando.
+    """
+    with span(stage, release, outputs) as record:
+        with subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as process:
+            monitor = PeakMemoryMonitor(process).start()
+            try:
+                stdout, stderr = process.communicate()
+            finally:
+                record["child_peak_rss_kb"] = monitor.stop()
+        result = subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+        record["status"] = result.returncode
+        record["stdout_bytes"] = len(result.stdout or "") + len(result.stderr or "")
+
+    if check:
+        result.check_returncode()
+    return result
+
+def read_trace(trace_path=TRACE_PATH, run_id=None):
+    """Registros do trace (de uma execução ou de todas)."""
+    if not os.path.exists(trace_path):
+        return []
+    with open(trace_path, encoding="utf-8") as trace_file:
+        records = [json.loads(line) for line in trace_file if line.strip()]
+    return [record for record in records if run_id is None or record["run"] == run_id]
+
+def export_chrome_trace(output_path, trace_path=TRACE_PATH, run_id=None):
+    """Exporta o trace no formato do chrome://tracing / Perfetto (uma faixa por processo e thread)."""
+    events = []
+    for record in read_trace(trace_path, run_id):
+        args = {key: value for key, value in record.items() if key not in ("pid", "thread", "start_us", "stage")}
+        events.append({
+            "name": f"{record['stage']} {record['release']}".strip(),
+            "cat": record["stage"],
+            "ph": "X",
+            "ts": record["start_us"],
+            "dur": int(record["wall_seconds"] * 1_000_000),
+            "pid": record["pid"],
+            "tid": record["thread"],
+            "args": args,
+        })
+    with open(output_path, "w", encoding="utf-8") as output_file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, output_file)
+    return len(events)
+
+def report_trace(trace_path=TRACE_PATH, run_id=None, top=10):
+    """Imprime o tempo total de cada etapa e as combinações release/etapa mais lentas."""
+    records = read_trace(trace_path, run_id)
+    if not records:
+        print("Nenhuma etapa registrada no trace.")
+        return
+
+    totals = defaultdict(float)
+    for record in records:
+        totals[record["stage"]] += record["wall_seconds"]
+    print(f"{'Etapa':<32}{'Total (s)':>12}")
+    for stage, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+        print(f"{stage:<32}{seconds:>12.1f}")
+
+    print(f"\n{'Release':<32}{'Etapa':<28}{'Tempo (s)':>10}{'Status':>8}")
+    for record in sorted(records, key=lambda record: -record["wall_seconds"])[:top]:
+        print(f"{record['release']:<32}{record['stage']:<28}{record['wall_seconds']:>10.1f}{str(record['status']):>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumo do trace das etapas do pipeline e exportação para o chrome://tracing.")
+    parser.add_argument("--run", help="Considera apenas uma execução (METRICS_RUN_ID)")
+    parser.add_argument("--chrome", help="Arquivo JSON a gerar no formato do chrome://tracing / Perfetto")
+    args = parser.parse_args()
+
+    if args.chrome:
+        print(f"{export_chrome_trace(args.chrome, run_id=args.run)} eventos exportados para {args.chrome}.")
+    else:
+        report_trace(run_id=args.run)
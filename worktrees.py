@@ -0,0 +1,78 @@
+import os
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+WORKTREES_DIR = "apache_commons_worktrees"  # Diretório onde ficam as worktrees de cada worker
+
+# Worktree atribuída ao processo worker atual (definida pelo initializer do pool)
+_worktree = None
+
+def worktree_path(index):
+    """Retorna o caminho absoluto da worktree de um worker."""
+    return os.path.abspath(os.path.join(WORKTREES_DIR, f"worker_{index}"))
+
+def create_worktrees(repo_dir, n_workers):
+    """Cria (ou reaproveita) uma git worktree desacoplada para cada worker."""
+    os.makedirs(WORKTREES_DIR, exist_ok=True)
+    paths = []
+    for i in range(n_workers):
+        path = worktree_path(i)
+        if not os.path.exists(path):
+            print(f"Criando worktree {path}...")
+            subprocess.run(["git", "worktree", "add", "--detach", path], cwd=repo_dir, check=True)
+        paths.append(path)
+    return paths
+
+def remove_worktrees(repo_dir):
+    """Remove todas as worktrees criadas para os workers."""
+    if not os.path.exists(WORKTREES_DIR):
+        return
+    for entry in sorted(os.listdir(WORKTREES_DIR)):
+        path = os.path.abspath(os.path.join(WORKTREES_DIR, entry))
+        subprocess.run(["git", "worktree", "remove", "--force", path], cwd=repo_dir)
+    subprocess.run(["git", "worktree", "prune"], cwd=repo_dir)
+
+def _init_worker(queue):
+    """Reserva uma worktree exclusiva para o processo worker."""
+    global _worktree
+    _worktree = queue.get()
+
+def _run_in_worktree(func, name, commit_sha):
+    return func(name, commit_sha, _worktree)
+
+def run_parallel(releases, func, repo_dir, workers, keep_worktrees=False):
+    """
+    Executa func(name, commit_sha, worktree) para cada release em um pool de processos.
+
+    Cada processo recebe sua própria worktree, então checkout, compilação e análise
+    de releases diferentes não interferem entre si. Ao final (mesmo após um erro), as
+    worktrees são removidas, a não ser que keep_worktrees seja verdadeiro.
+
+    Returns:
+        dict: Resultado de func para cada release processada com sucesso, indexado pelo nome.
+    """
+    workers = max(1, min(workers, len(releases)))
+    worktrees = create_worktrees(repo_dir, workers)
+
+    queue = multiprocessing.Queue()
+    for path in worktrees:
+        queue.put(path)
+
+    results = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(queue,)) as executor:
+            futures = {
+                executor.submit(_run_in_worktree, func, name, commit_sha): name
+                for name, commit_sha in releases
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Erro ao processar a release {name}: {e}")
+    finally:
+        if not keep_worktrees:
+            remove_worktrees(repo_dir)
+    return results